@@ -150,6 +150,8 @@ if __name__ == "__main__":
 
     agz = zero.load_zero_agent(h5py.File('agz_bot.h5', 'r'))
     agz.num_rounds = 400
+    # carry the search tree over from one move to the next
+    agz.reuse_tree = True
 
     gnu_go = LocalGtpBot(go_bot=agz, termination=PassWhenOpponentPasses(), handicap=0, opponent='gnugo', our_color='w')
     gnu_go.run()
@@ -24,6 +24,7 @@ def run(board_size, first, second):
     }
 
     game_state = GameState.new_game(board_size)
+    area_score = scoring.AreaScore(game_state.board)
     next_move = None
 
     while not game_state.is_over() and (next_move is None or not next_move.is_pass):  # random bot too stupid to stop the game
@@ -42,7 +43,7 @@ def run(board_size, first, second):
         print_board(game_state.board)
 
         print('Estimated result: ')
-        print(scoring.compute_game_result(game_state))
+        print(area_score.update(game_state))
 
     print(f'Finished game in {time.time() - start} s')
     game_result = scoring.compute_game_result(game_state)
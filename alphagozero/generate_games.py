@@ -14,7 +14,7 @@ from dlgo.gotypes import Player
 from dlgo import scoring
 
 
-def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0):
+def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0, early_stop=False):
     start = time.time()
     print(f'Generating {game_id_str}...')
 
@@ -38,6 +38,9 @@ def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0):
         black_agent = zero.ZeroAgent(model, encoder, rounds_per_move=rounds_per_move, c=c)
         white_agent = zero.ZeroAgent(model, encoder, rounds_per_move=rounds_per_move, c=c)
 
+    # stop each search once its move is decided
+    black_agent.early_stop = white_agent.early_stop = early_stop
+
     agents = {
         Player.black: black_agent,
         Player.white: white_agent,
@@ -52,9 +55,15 @@ def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0):
     c1.begin_episode()
     c2.begin_episode()
 
+    num_moves = 0
     while not game.is_over():
         next_move = agents[game.next_player].select_move(game)
         game = game.apply_move(next_move)
+        num_moves += 1
+
+    if early_stop:
+        rounds_saved = black_agent.total_rounds_saved + white_agent.total_rounds_saved
+        print(f'{game_id_str}: {rounds_saved / max(num_moves, 1):.1f} rounds saved per move')
 
     game_result = scoring.compute_game_result(game)
 
@@ -84,7 +93,7 @@ def generate_game(board_size, game_id_str, rounds_per_move=10, c=2.0):
     return combined, game_id_str, time.time() - start
 
 
-def generate_games(iteration, num_games, board_size, rounds_per_move, c, max_jobs=2):
+def generate_games(iteration, num_games, board_size, rounds_per_move, c, max_jobs=2, early_stop=False):
     print(f'Beginning iteration #{iteration}...')
     K.clear_session()
 
@@ -100,7 +109,8 @@ def generate_games(iteration, num_games, board_size, rounds_per_move, c, max_job
                                       board_size,
                                       f'Iteration #[{iteration}] / Game {submitted_count + 1} of {num_games}',
                                       rounds_per_move,
-                                      c)
+                                      c,
+                                      early_stop)
                 jobs[job] = job
                 submitted_count += 1
 
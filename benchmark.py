@@ -0,0 +1,312 @@
+import argparse
+import copy
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from dlgo import rollout
+from dlgo.agent.helpers import is_point_an_eye
+from dlgo.agent.naive import FastRandomBot
+from dlgo.encoders.base import get_encoder_by_name
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+
+
+def random_position(board_size, num_moves, board_type='fast', seed=0):
+    # a reproducible position reached by random legal plays
+    rng = random.Random(seed)
+    game = GameState.new_game(board_size, board_type)
+
+    for _ in range(num_moves):
+        moves = [move for move in game.legal_moves() if move.is_play]
+        if not moves:
+            break
+        game = game.apply_move(rng.choice(moves))
+
+    return game
+
+
+def time_per_call(fn, repeat):
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        fn()
+
+    return (time.perf_counter() - start) / repeat
+
+
+def legal_moves_by_copying(game_state):
+    # the legality check legal_moves() used to make: play every candidate on
+    # two copies of the board, one for the suicide and one for the ko test
+    moves = []
+    player = game_state.next_player
+
+    for row in range(1, game_state.board.num_rows + 1):
+        for col in range(1, game_state.board.num_cols + 1):
+            point = Point(row, col)
+
+            if game_state.board.get(point) is not None:
+                continue
+
+            next_board = copy.deepcopy(game_state.board)
+            next_board.place_stone(player, point)
+            if next_board.get_go_string(point).num_liberties == 0:
+                continue
+
+            next_board = copy.deepcopy(game_state.board)
+            next_board.place_stone(player, point)
+            if game_state.is_situation_repeated((player.other, next_board.zobrist_hash())):
+                continue
+
+            moves.append(Move.play(point))
+
+    moves.append(Move.pass_turn())
+    moves.append(Move.resign())
+
+    return moves
+
+
+def legal_mask_by_points(game_state):
+    # how the agents used to find the points they may play: legality and
+    # eye test point by point
+    board = game_state.board
+    mask = np.zeros((board.num_rows, board.num_cols), dtype=bool)
+
+    for row in range(1, board.num_rows + 1):
+        for col in range(1, board.num_cols + 1):
+            point = Point(row, col)
+            mask[row - 1, col - 1] = game_state.is_valid_move(Move.play(point)) and \
+                not is_point_an_eye(board, point, game_state.next_player)
+
+    return mask
+
+
+def bench_legal_moves(args):
+    for board_type in args.board_types:
+        game = random_position(args.board_size, args.num_moves, board_type)
+        assert legal_moves_by_copying(game) == game.legal_moves()
+
+        by_copying = time_per_call(lambda: legal_moves_by_copying(game), args.repeat)
+        current = time_per_call(game.legal_moves, args.repeat)
+
+        print('%-8s %dx%d after %d moves: legal_moves() %.2f ms, by copying %.2f ms (%.1fx faster)' % (
+            board_type, args.board_size, args.board_size, args.num_moves,
+            current * 1000, by_copying * 1000, by_copying / current))
+
+
+def bench_legal_mask(args):
+    for board_type in args.board_types:
+        game = random_position(args.board_size, args.num_moves, board_type)
+        assert (legal_mask_by_points(game) == game.legal_mask(exclude_eyes=True)).all()
+
+        by_points = time_per_call(lambda: legal_mask_by_points(game), args.repeat)
+        current = time_per_call(lambda: game.legal_mask(exclude_eyes=True), args.repeat)
+
+        print('%-8s %dx%d after %d moves: legal_mask() %.3f ms, point by point %.2f ms (%.1fx faster)' % (
+            board_type, args.board_size, args.board_size, args.num_moves,
+            current * 1000, by_points * 1000, by_points / current))
+
+
+def bench_encode(args):
+    for encoder_name in args.encoders:
+        encoder = get_encoder_by_name(encoder_name, args.board_size)
+
+        for board_type in args.board_types:
+            game = random_position(args.board_size, args.num_moves, board_type)
+            current = time_per_call(lambda: encoder.encode(game), args.repeat)
+
+            print('%-10s %-8s %dx%d after %d moves: encode() %.3f ms' % (
+                encoder_name, board_type, args.board_size, args.board_size, args.num_moves, current * 1000))
+
+
+def grow_tree(game, num_nodes, seed=0):
+    # game states kept alive the way a search tree keeps them: every new state
+    # is a child of a randomly chosen earlier one
+    rng = random.Random(seed)
+    states = [game]
+
+    while len(states) <= num_nodes:
+        parent = rng.choice(states)
+        moves = [move for move in parent.legal_moves() if move.is_play]
+
+        if moves:
+            states.append(parent.apply_move(rng.choice(moves)))
+
+    return states
+
+
+def bench_node_memory(args):
+    for board_type in args.board_types:
+        game = random_position(args.board_size, args.num_moves, board_type)
+
+        tracemalloc.start()
+        states = grow_tree(game, args.num_nodes)
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        print('%-8s %dx%d after %d moves: %d bytes per node over %d nodes' % (
+            board_type, args.board_size, args.board_size, args.num_moves,
+            allocated / (len(states) - 1), len(states) - 1))
+
+
+def simulate_with_game_states(game_state):
+    # how MCTSAgent used to play rollouts: FastRandomBot on a game state
+    bot = FastRandomBot()
+    game_state = game_state.search_copy()
+
+    while not game_state.is_over():
+        game_state.play(bot.select_move(game_state))
+
+    return game_state.winner()
+
+
+def bench_rollouts(args):
+    for board_size in args.board_sizes:
+        game = random_position(board_size, args.num_moves)
+
+        with_game_states = time_per_call(lambda: simulate_with_game_states(game), args.repeat)
+        current = time_per_call(lambda: rollout.simulate_random_game(game), args.repeat)
+
+        print('%dx%d after %d moves: simulate_random_game() %.1f playouts/s, with game states %.1f playouts/s '
+              '(%.1fx faster)' % (board_size, board_size, args.num_moves, 1 / current, 1 / with_game_states,
+                                  with_game_states / current))
+
+        for batch_size in args.batch_sizes:
+            batched = time_per_call(lambda: rollout.simulate_random_games([game] * batch_size), 1) / batch_size
+            print('%dx%d after %d moves: simulate_random_games() of %d games %.1f playouts/s' % (
+                board_size, board_size, args.num_moves, batch_size, 1 / batched))
+
+
+def small_zero_model(encoder):
+    # a few convolutions with policy and value heads, enough to time the
+    # search around the network rather than the network itself
+    from keras.layers import Conv2D, Dense, Flatten, Input
+    from keras.models import Model
+
+    board_input = Input(shape=encoder.shape())
+    hidden = board_input
+    for _ in range(4):
+        hidden = Conv2D(64, (3, 3), padding='same', data_format='channels_first', activation='relu')(hidden)
+    hidden = Flatten()(hidden)
+    policy_output = Dense(encoder.num_moves(), activation='softmax')(hidden)
+    value_output = Dense(1, activation='tanh')(hidden)
+
+    return Model(inputs=[board_input], outputs=[policy_output, value_output])
+
+
+def bench_zero_search(args):
+    from dlgo.zero import ZeroAgent, ZeroEncoder
+
+    encoder = ZeroEncoder(args.board_size)
+    model = small_zero_model(encoder)
+    game = random_position(args.board_size, args.num_moves)
+
+    for batch_size in args.batch_sizes:
+        agent = ZeroAgent(model, encoder, rounds_per_move=args.num_rounds, batch_size=batch_size)
+        current = time_per_call(lambda: agent.select_move(game), args.repeat)
+
+        print('%dx%d after %d moves, batch size %d: %.1f evaluations/s' % (
+            args.board_size, args.board_size, args.num_moves, batch_size, args.num_rounds / current))
+
+
+def select_branch_by_moves(branches, total_visit_count, c):
+    # how ZeroAgent used to pick a branch: a dict of (prior, visit count,
+    # total value) per move, scored one move at a time
+    def score_branch(move):
+        prior, visit_count, total_value = branches[move]
+        q = total_value / visit_count if visit_count > 0 else 0.0
+
+        return q + c * prior * np.sqrt(total_visit_count) / (visit_count + 1)
+
+    return max(branches.keys(), key=score_branch)
+
+
+def bench_zero_select(args):
+    from dlgo.zero import ZeroAgent, ZeroEncoder
+    from dlgo.zero.agent import ZeroTreeNode
+
+    encoder = ZeroEncoder(args.board_size)
+    agent = ZeroAgent(None, encoder)
+    game = random_position(args.board_size, args.num_moves)
+    rng = np.random.RandomState(0)
+
+    node = ZeroTreeNode(game, 0.0, rng.dirichlet(np.ones(encoder.num_moves())), None, None)
+    for _ in range(args.num_visits):
+        node.record_visit(rng.choice(node.moves()), rng.uniform(-1, 1))
+    branches = {move: (node.prior(move), node.visit_count(move), node.total_values[node.index(move)])
+                for move in node.moves()}
+    assert select_branch_by_moves(branches, node.total_visit_count, agent.c) == agent.select_branch(node)
+
+    by_moves = time_per_call(lambda: select_branch_by_moves(branches, node.total_visit_count, agent.c), args.repeat)
+    current = time_per_call(lambda: agent.select_branch(node), args.repeat)
+
+    print('%dx%d after %d moves, %d branches: select_branch() %.1f us, move by move %.1f us (%.1fx faster)' % (
+        args.board_size, args.board_size, args.num_moves, len(branches),
+        current * 1e6, by_moves * 1e6, by_moves / current))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='benchmark')
+    subparsers.required = True
+
+    legal_moves = subparsers.add_parser('legal-moves', help='Time GameState.legal_moves().')
+    legal_moves.add_argument('--board-size', '-b', type=int, default=19)
+    legal_moves.add_argument('--num-moves', '-m', type=int, default=150, help='Random moves played first.')
+    legal_moves.add_argument('--repeat', '-r', type=int, default=20)
+    legal_moves.add_argument('--board-types', nargs='+', default=['fast', 'array', 'bitboard'])
+    legal_moves.set_defaults(run=bench_legal_moves)
+
+    legal_mask = subparsers.add_parser('legal-mask', help='Time GameState.legal_mask() against checking every point.')
+    legal_mask.add_argument('--board-size', '-b', type=int, default=19)
+    legal_mask.add_argument('--num-moves', '-m', type=int, default=150, help='Random moves played first.')
+    legal_mask.add_argument('--repeat', '-r', type=int, default=20)
+    legal_mask.add_argument('--board-types', nargs='+', default=['fast', 'array', 'bitboard'])
+    legal_mask.set_defaults(run=bench_legal_mask)
+
+    encode = subparsers.add_parser('encode', help='Time Encoder.encode() on each board type.')
+    encode.add_argument('--board-size', '-b', type=int, default=19)
+    encode.add_argument('--num-moves', '-m', type=int, default=150, help='Random moves played first.')
+    encode.add_argument('--repeat', '-r', type=int, default=20)
+    encode.add_argument('--board-types', nargs='+', default=['fast', 'array', 'bitboard'])
+    encode.add_argument('--encoders', nargs='+', default=['oneplane', 'sevenplane'])
+    encode.set_defaults(run=bench_encode)
+
+    node_memory = subparsers.add_parser('node-memory', help='Measure the memory each game state in a search tree holds.')
+    node_memory.add_argument('--board-size', '-b', type=int, default=19)
+    node_memory.add_argument('--num-moves', '-m', type=int, default=150, help='Random moves played first.')
+    node_memory.add_argument('--num-nodes', '-n', type=int, default=1600)
+    node_memory.add_argument('--board-types', nargs='+', default=['fast', 'array', 'bitboard'])
+    node_memory.set_defaults(run=bench_node_memory)
+
+    rollouts = subparsers.add_parser('rollouts', help='Playouts per second of random games played to the end.')
+    rollouts.add_argument('--board-sizes', nargs='+', type=int, default=[9, 19])
+    rollouts.add_argument('--num-moves', '-m', type=int, default=0, help='Random moves played first.')
+    rollouts.add_argument('--repeat', '-r', type=int, default=20)
+    rollouts.add_argument('--batch-sizes', nargs='+', type=int, default=[16, 256, 1024])
+    rollouts.set_defaults(run=bench_rollouts)
+
+    zero_search = subparsers.add_parser('zero-search',
+                                        help='Leaf evaluations per second of ZeroAgent.select_move().')
+    zero_search.add_argument('--board-size', '-b', type=int, default=9)
+    zero_search.add_argument('--num-moves', '-m', type=int, default=20, help='Random moves played first.')
+    zero_search.add_argument('--num-rounds', '-n', type=int, default=64)
+    zero_search.add_argument('--repeat', '-r', type=int, default=2)
+    zero_search.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 32])
+    zero_search.set_defaults(run=bench_zero_search)
+
+    zero_select = subparsers.add_parser('zero-select', help='Time ZeroAgent.select_branch() on one node.')
+    zero_select.add_argument('--board-size', '-b', type=int, default=19)
+    zero_select.add_argument('--num-moves', '-m', type=int, default=0, help='Random moves played first.')
+    zero_select.add_argument('--num-visits', '-n', type=int, default=1600)
+    zero_select.add_argument('--repeat', '-r', type=int, default=1000)
+    zero_select.set_defaults(run=bench_zero_select)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
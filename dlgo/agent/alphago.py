@@ -1,8 +1,8 @@
 import numpy as np
 from dlgo.agent.base import Agent
 from dlgo.goboard_fast import Move
+from dlgo.time_control import SearchBudget
 # from dlgo import kerasutil
-import operator
 
 __all__ = [
     'AlphaGoNode',
@@ -10,6 +10,10 @@ __all__ = [
 ]
 
 
+def situation(game_state):
+    return game_state.next_player, game_state.board.zobrist_hash()
+
+
 class AlphaGoNode:
     def __init__(self, parent=None, probability=1.0):
         self.parent = parent  # <1>
@@ -17,6 +21,9 @@ class AlphaGoNode:
 
         self.visit_count = 0
         self.q_value = 0
+        # simulations in flight through this node, each taking virtual_loss
+        # off its score until its leaf is evaluated
+        self.virtual_loss = 0
         self.prior_value = probability  # <2>
         self.u_value = probability  # <3>
         # <1> Tree nodes have one parent and potentially many children.
@@ -25,25 +32,35 @@ class AlphaGoNode:
 
     def select_child(self):
         return max(self.children.items(),
-                   key=lambda child: child[1].q_value + child[1].u_value)
+                   key=lambda child: child[1].q_value + child[1].u_value - child[1].virtual_loss)
 
     def expand_children(self, moves, probabilities):
         for move, prob in zip(moves, probabilities):
             if move not in self.children:
-                self.children[move] = AlphaGoNode(probability=prob)
+                self.children[move] = AlphaGoNode(parent=self, probability=prob)
+
+    def add_virtual_loss(self, loss):
+        node = self
+        while node is not None:
+            node.virtual_loss += loss
+            node = node.parent
 
     def update_values(self, leaf_value):
-        if self.parent is not None:
-            self.parent.update_values(leaf_value)  # <1>
+        path = []
+        node = self
+        while node is not None:
+            path.append(node)
+            node = node.parent
 
-        self.visit_count += 1  # <2>
+        for node in reversed(path):  # <1>
+            node.visit_count += 1  # <2>
 
-        self.q_value += leaf_value / self.visit_count  # <3>
+            node.q_value += leaf_value / node.visit_count  # <3>
 
-        if self.parent is not None:
-            c_u = 5
-            self.u_value = c_u * np.sqrt(self.parent.visit_count) \
-                * self.prior_value / (1 + self.visit_count)  # <4>
+            if node.parent is not None:
+                c_u = 5
+                node.u_value = c_u * np.sqrt(node.parent.visit_count) \
+                    * node.prior_value / (1 + node.visit_count)  # <4>
 
         # <1> We update parents first to ensure we traverse the tree top to bottom.
         # <2> Increment the visit count for this node.
@@ -54,7 +71,7 @@ class AlphaGoNode:
 class AlphaGoMCTS(Agent):
     def __init__(self, policy_agent, fast_policy_agent, value_agent,
                  lambda_value=0.5, num_simulations=1000,
-                 depth=50, rollout_limit=100):
+                 depth=50, rollout_limit=100, rollout_batch_size=1, virtual_loss=1.0):
         Agent.__init__(self)
         self.policy = policy_agent
         self.rollout_policy = fast_policy_agent
@@ -64,52 +81,131 @@ class AlphaGoMCTS(Agent):
         self.num_simulations = num_simulations
         self.depth = depth
         self.rollout_limit = rollout_limit
+        # leaves whose values and rollouts are computed together in each
+        # simulate(); the virtual loss steers them apart
+        self.rollout_batch_size = rollout_batch_size
+        self.virtual_loss = virtual_loss
         self.root = AlphaGoNode()
+        # (next player, board hash) of the position at self.root
+        self.root_situation = None
+        self.time_manager = None
+
+    def set_time_manager(self, time_manager):
+        self.time_manager = time_manager
+
+    def set_evaluation_cache(self, evaluation_cache):
+        # the policy and value networks look positions up in evaluation_cache
+        self.policy.set_evaluation_cache(evaluation_cache)
+        self.value.set_evaluation_cache(evaluation_cache)
 
     def select_move(self, game_state):
+        self.root = self.find_root(game_state)
+        search_state = game_state.search_root()
+
+        # num_simulations at most; with a time manager, no longer than the
+        # time it gives the move, and no longer than it takes to decide it
+        seconds = self.time_manager.budget(game_state) if self.time_manager is not None else None
+        budget = SearchBudget(self.num_simulations, seconds, stop_when_decided=seconds is not None)
+
         # From current state play out a number of simulations
-        for simulation in range(self.num_simulations):
-            current_state = game_state
-            node = self.root
+        while not budget.is_over([child.visit_count for child in self.root.children.values()]):
+            num_leaves = budget.reserve(self.rollout_batch_size)
+            budget.finish(num_leaves, self.simulate(search_state, num_leaves))
 
-            # Play moves until the specified depth is reached.
-            for depth in range(self.depth):
-                # If the current node doesn't have any children...
-                if not node.children:
-                    if current_state.is_over():
-                        break
-                    moves, probabilities = self.policy_probabilities(current_state)  # <4>
+        # Pick most visited child of the root as next move.
+        move = max(self.root.children,
+                   key=lambda z: self.root.children.get(z).visit_count)
 
-                    # expand them with probabilities from the strong policy.
-                    node.expand_children(moves, probabilities)
+        # Keep the subtree of the picked move for the next search.
+        self.root = self.root.children[move]
+        self.root.parent = None
+        self.root_situation = situation(search_state.apply_move(move))
+        return move
 
-                # If there are children, we can select one and play the corresponding move.
-                move, node = node.select_child()
-                current_state = current_state.apply_move(move)
+    def simulate(self, game_state, num_leaves=1):
+        # up to num_leaves simulations from self.root, the node of
+        # game_state, a search_root() of the game's state. Their leaves are
+        # scored with one batch of rollouts; a leaf reached a second time
+        # ends the batch early. Returns the number of simulations played.
+        leaves = []
+        for _ in range(num_leaves):
+            node, leaf_state = self.select_leaf(game_state)
+            if any(node is leaf for leaf, _ in leaves):
+                break
+            node.add_virtual_loss(self.virtual_loss)
+            leaves.append((node, leaf_state))
 
-            # Compute output of value network and a rollout by the fast policy.
-            value = self.value.predict(current_state)
-            rollout = self.policy_rollout(current_state)
+        for node, _ in leaves:
+            node.add_virtual_loss(-self.virtual_loss)
 
-            if rollout == 1:
-                print("yay")
+        # Compute output of value network and a rollout by the fast policy.
+        values = self.value.predict_batch([leaf_state for _, leaf_state in leaves])
+        rollouts = self.policy_rollouts([leaf_state for _, leaf_state in leaves])
 
+        for (node, _), value, rollout in zip(leaves, values, rollouts):
             # Determine the combined value function.
             weighted_value = (1 - self.lambda_value) * value + self.lambda_value * rollout
 
             # Update values for this node in the backup phase
             node.update_values(weighted_value)
 
-        # Pick most visited child of the root as next move.
-        move = max(self.root.children,
-                   key=lambda z: self.root.children.get(z).visit_count)
+        return len(leaves)
 
-        self.root = AlphaGoNode()
-        # If the picked move is a child, set new root to this child node.
-        if move in self.root.children:
-            self.root = self.root.children[move]
-            self.root.parent = None
-        return move
+    def select_leaf(self, game_state):
+        # the node to evaluate next and its position
+        current_state = game_state
+        node = self.root
+
+        # Play moves until the specified depth is reached.
+        for depth in range(self.depth):
+            # If the current node doesn't have any children...
+            if not node.children:
+                if current_state.is_over():
+                    break
+                moves, probabilities = self.policy_probabilities(current_state)  # <4>
+
+                # expand them with probabilities from the strong policy.
+                node.expand_children(moves, probabilities)
+
+            # If there are children, we can select one and play the corresponding move.
+            move, node = node.select_child()
+            current_state = current_state.apply_move(move)
+
+        return node, current_state
+
+    def can_ponder(self):
+        return True
+
+    def ponder(self, game_state, stop, max_simulations=None):
+        # keep searching the position after our move until stop is set, so
+        # the next select_move resumes from the subtree of the reply
+        if game_state.is_over():
+            return
+
+        self.root = self.find_root(game_state)
+        self.root_situation = situation(game_state)
+        search_state = game_state.search_root()
+        num_simulations = 0
+        while not stop.is_set() and (max_simulations is None or num_simulations < max_simulations):
+            num_leaves = self.rollout_batch_size if max_simulations is None else \
+                min(self.rollout_batch_size, max_simulations - num_simulations)
+            num_simulations += self.simulate(search_state, num_leaves)
+
+    def find_root(self, game_state):
+        # the node of the kept tree at game_state: its root, or the root's
+        # child for the opponent's reply, matched by position hash; a new
+        # tree for any other position
+        if self.root_situation == situation(game_state):
+            return self.root
+
+        previous = game_state.previous_state
+        if previous is not None and self.root_situation == situation(previous) and \
+                game_state.last_move in self.root.children:
+            node = self.root.children[game_state.last_move]
+            node.parent = None
+            return node
+
+        return AlphaGoNode()
 
     def policy_probabilities(self, game_state):
         encoder = self.policy._encoder
@@ -123,27 +219,42 @@ class AlphaGoMCTS(Agent):
         return legal_moves, normalized_outputs
 
     def policy_rollout(self, game_state):
+        return self.policy_rollouts([game_state])[0]
+
+    def policy_rollouts(self, game_states):
+        # greedy fast policy rollouts of several positions in lockstep, with
+        # one prediction for all the games still going at each step. Each
+        # result is 1 if the player to move at the start won, else -1, or 0
+        # if the game wasn't over after rollout_limit moves.
+        encoder = self.rollout_policy.encoder
+        game_states = list(game_states)
+        players = [game_state.next_player for game_state in game_states]
+
         for step in range(self.rollout_limit):
-            if game_state.is_over():
+            playing = [i for i, game_state in enumerate(game_states) if not game_state.is_over()]
+            if not playing:
                 break
-            move_probabilities = self.rollout_policy.predict(game_state)
-            encoder = self.rollout_policy.encoder
-            legal_moves = game_state.legal_moves()
-
-            valid_moves = [m for idx, m in enumerate(move_probabilities)
-                           if Move(encoder.decode_point_index(idx)) in legal_moves]
-            max_index, max_value = max(enumerate(valid_moves), key=operator.itemgetter(1))
-            max_point = encoder.decode_point_index(max_index)
-            greedy_move = Move(max_point)
-            if greedy_move in legal_moves:
-                game_state = game_state.apply_move(greedy_move)
-
-        next_player = game_state.next_player
-        winner = game_state.winner()
-        if winner is not None:
-            return 1 if winner == next_player else -1
-        else:
-            return 0
+
+            inputs = np.array([encoder.encode(game_states[i]) for i in playing])
+            move_probabilities = self.rollout_policy.model.predict(inputs)
+
+            for i, probabilities in zip(playing, move_probabilities):
+                legal = game_states[i].legal_mask().ravel()
+                if legal.any():
+                    greedy_index = int(np.argmax(np.where(legal, probabilities, -1)))
+                    greedy_move = Move.play(encoder.decode_point_index(greedy_index))
+                else:
+                    greedy_move = Move.pass_turn()
+                game_states[i] = game_states[i].apply_move(greedy_move)
+
+        results = []
+        for game_state, player in zip(game_states, players):
+            winner = game_state.winner()
+            if winner is not None:
+                results.append(1 if winner == player else -1)
+            else:
+                results.append(0)
+        return results
 
     def serialize(self, h5file):
         raise IOError("AlphaGoMCTS agent cant be serialized, consider serializing the 3 underlying," +
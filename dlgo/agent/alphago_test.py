@@ -0,0 +1,157 @@
+import threading
+import unittest
+
+import numpy as np
+
+from dlgo.agent.alphago import AlphaGoMCTS, AlphaGoNode
+from dlgo.encoders.oneplane import OnePlaneEncoder
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Player, Point
+from dlgo.time_control import TimeManager
+
+
+class UniformPolicy:
+    # the same probability for every point
+    def __init__(self, board_size):
+        self._encoder = OnePlaneEncoder((board_size, board_size))
+        self.encoder = self._encoder
+
+    def predict(self, game_state):
+        return np.ones(self._encoder.num_points()) / self._encoder.num_points()
+
+
+class ConstantValue:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_batch(self, game_states):
+        self.batch_sizes.append(len(game_states))
+        return [0.5] * len(game_states)
+
+
+class PreferencePolicy:
+    # a fast policy that always prefers the points in the order given
+    def __init__(self, board_size, preferences=()):
+        self.encoder = OnePlaneEncoder((board_size, board_size))
+        self.model = self
+        self.probabilities = np.zeros(self.encoder.num_points())
+        for rank, point in enumerate(preferences):
+            self.probabilities[self.encoder.encode_point(point)] = len(preferences) - rank
+        self.inputs = []
+
+    def predict(self, model_input):
+        self.inputs.append(model_input)
+        return np.tile(self.probabilities, (len(model_input), 1))
+
+
+def alphago_mcts(num_simulations):
+    # rollout_limit=0 scores every position by the value agent alone, so
+    # the fast policy is never asked for a move
+    return AlphaGoMCTS(UniformPolicy(5), UniformPolicy(5), ConstantValue(), num_simulations=num_simulations, depth=3,
+                       rollout_limit=0)
+
+
+class TreeReuseTest(unittest.TestCase):
+    def test_search_resumes_from_the_opponents_reply(self):
+        agent = alphago_mcts(100)
+        game = GameState.new_game(5)
+
+        move = agent.select_move(game)
+        game = game.apply_move(move)
+        reply, reused = max(agent.root.children.items(), key=lambda child: child[1].visit_count)
+        reused_visits = reused.visit_count
+        self.assertGreater(reused_visits, 0)
+
+        agent.select_move(game.apply_move(reply))
+        self.assertEqual(reused_visits + 100, reused.visit_count)
+        self.assertIn(agent.root, reused.children.values())
+        self.assertIsNone(agent.root.parent)
+
+    def test_pondered_visits_are_reused(self):
+        agent = alphago_mcts(20)
+        game = GameState.new_game(5)
+        game = game.apply_move(agent.select_move(game))
+        visits = agent.root.visit_count
+
+        agent.ponder(game, threading.Event(), max_simulations=50)
+        self.assertEqual(visits + 50, agent.root.visit_count)
+        reply, reused = max(agent.root.children.items(), key=lambda child: child[1].visit_count)
+        reused_visits = reused.visit_count
+
+        agent.select_move(game.apply_move(reply))
+        self.assertEqual(reused_visits + 20, reused.visit_count)
+
+    def test_simulations_stay_out_of_the_game_history(self):
+        agent = alphago_mcts(30)
+        game = GameState.new_game(5)
+        game = game.apply_move(agent.select_move(game))
+        agent.ponder(game, threading.Event(), max_simulations=30)
+
+        self.assertEqual(2, sum(len(depths) for depths in game._history._depths.values()))
+
+    def test_leaves_are_rolled_out_in_batches(self):
+        fast_policy = PreferencePolicy(5)
+        value = ConstantValue()
+        agent = AlphaGoMCTS(UniformPolicy(5), fast_policy, value, num_simulations=12, depth=2,
+                            rollout_limit=3, rollout_batch_size=4)
+        played = agent.simulate(GameState.new_game(5).search_root(), 4)
+
+        self.assertEqual(4, played)
+        self.assertEqual([4], value.batch_sizes)
+        self.assertEqual(4, agent.root.visit_count)
+        self.assertEqual([4, 4, 4], [len(model_input) for model_input in fast_policy.inputs])
+        self.assertEqual(0, agent.root.virtual_loss)
+
+        agent.select_move(GameState.new_game(5))
+        self.assertTrue(all(len(model_input) <= 4 for model_input in fast_policy.inputs))
+
+    def test_backup_updates_every_node_on_the_path(self):
+        root = AlphaGoNode()
+        root.expand_children(['a', 'b'], [0.5, 0.5])
+        child = root.children['a']
+        child.expand_children(['c'], [1.0])
+        leaf = child.children['c']
+
+        leaf.update_values(1.0)
+        self.assertEqual([1, 1, 1, 0], [root.visit_count, child.visit_count, leaf.visit_count,
+                                        root.children['b'].visit_count])
+        self.assertEqual(5 * np.sqrt(1) * 1.0 / 2, leaf.u_value)
+
+
+class TimeControlTest(unittest.TestCase):
+    def test_exhausted_clock_still_gives_a_move(self):
+        time_manager = TimeManager()
+        time_manager.set_time_settings(60)
+        time_manager.set_time_left(Player.black, 0, 0)
+        agent = alphago_mcts(100)
+        agent.set_time_manager(time_manager)
+        game = GameState.new_game(5)
+
+        self.assertTrue(game.is_valid_move(agent.select_move(game)))
+
+
+class PolicyRolloutTest(unittest.TestCase):
+    def test_rollouts_play_the_most_likely_legal_move(self):
+        fast_policy = PreferencePolicy(5, [Point(3, 3), Point(1, 1)])
+        agent = AlphaGoMCTS(UniformPolicy(5), fast_policy, ConstantValue(), rollout_limit=2)
+        game = GameState.new_game(5).apply_move(Move.play(Point(3, 3)))
+
+        self.assertEqual([0], agent.policy_rollouts([game]))
+        # white took (1, 1) as (3, 3) was taken; black to move sees it as -1
+        after_white = fast_policy.inputs[1][0, 0]
+        self.assertEqual((1, -1), (after_white[2, 2], after_white[0, 0]))
+        self.assertEqual(2, np.count_nonzero(after_white))
+
+    def test_result_is_for_the_player_to_move_at_the_leaf(self):
+        # black fills the 3x3 board but for its eye while white passes, so
+        # black has to pass as well and wins by the whole board
+        game = GameState.new_game(3)
+        for point in [Point(row, col) for row in range(1, 4) for col in range(1, 4) if (row, col) != (2, 2)]:
+            game = game.apply_move(Move.play(point)).apply_move(Move.pass_turn())
+        agent = AlphaGoMCTS(UniformPolicy(3), PreferencePolicy(3), ConstantValue(), rollout_limit=5)
+
+        self.assertEqual([1, -1], agent.policy_rollouts([game, game.apply_move(Move.pass_turn())]))
+
+
+if __name__ == '__main__':
+    unittest.main()
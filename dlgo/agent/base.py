@@ -8,3 +8,19 @@ class Agent:
 
     def diagnostics(self):
         return {}
+
+    def can_ponder(self):
+        # whether ponder() does anything: ZeroAgent and AlphaGoMCTS keep
+        # their search tree between moves and can, other agents can't
+        return False
+
+    def ponder(self, game_state, stop):
+        # think about game_state, the position after our move, until the
+        # threading.Event stop is set; agents that keep their search tree
+        # between moves pick up from there
+        pass
+
+    def set_time_manager(self, time_manager):
+        # agents with a search budget take the time for each move from
+        # time_manager, others play at their own pace
+        pass
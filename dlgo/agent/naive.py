@@ -3,6 +3,7 @@ import numpy as np
 
 from dlgo.agent.base import Agent
 from dlgo.agent.helpers import is_point_an_eye
+from dlgo.goboard_fast import get_grid
 from dlgo.goboard_slow import Move
 from dlgo.gotypes import Point
 
@@ -28,33 +29,14 @@ class RandomBot(Agent):
 
 
 class FastRandomBot(Agent):
-    def __init__(self):
-        super().__init__()
-        self.dim = None
-        self.point_cache = []
-
-    def _update_cache(self, dim):
-        self.dim = dim
-        rows, cols = dim
-        self.point_cache = []
-        for row in range(1, rows + 1):
-            for col in range(1, cols + 1):
-                self.point_cache.append(Point(row=row, col=col))
-
     def select_move(self, game_state):
         # choose a move that preserves own eyes
-        dim = (game_state.board.num_rows, game_state.board.num_cols)
-
-        if dim != self.dim:
-            self._update_cache(dim)
+        grid = get_grid(game_state.board.num_rows, game_state.board.num_cols)
 
-        idx = np.arange(len(self.point_cache))
-        np.random.shuffle(idx)
+        # the mask is row-major, like the grid's moves
+        candidates = np.flatnonzero(game_state.legal_mask(exclude_eyes=True))
 
-        for i in idx:
-            p = self.point_cache[i]
-            if game_state.is_valid_move(Move.play(p)) and \
-                    not is_point_an_eye(game_state.board, p, game_state.next_player):
-                return Move.play(p)
+        if not len(candidates):
+            return Move.pass_turn()  # can't make a move that doesn't ruin own eyes
 
-        return Move.pass_turn()  # can't make a move that doesn't ruin own eyes
+        return grid.moves[candidates[np.random.randint(len(candidates))]]
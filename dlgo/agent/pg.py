@@ -3,7 +3,6 @@ from keras import backend as K
 from keras.optimizers import SGD
 
 from dlgo.agent.base import Agent
-from dlgo.agent.helpers import is_point_an_eye
 from dlgo import encoders
 from dlgo import goboard
 from dlgo import kerasutil
@@ -36,8 +35,12 @@ class PolicyAgent(Agent):
         self._encoder = encoder  # Implements the Encoder interface
         self._collector = None
         self._temperature = 0.0
+        self._evaluation_cache = None
 
     def predict(self, game_state):
+        if self._evaluation_cache is not None:
+            return self._evaluation_cache.predict(self._model, self._encoder, [game_state])[0]
+
         encoded_state = self._encoder.encode(game_state)
         input_tensor = np.array([encoded_state])
         return self._model.predict(input_tensor)[0]
@@ -45,6 +48,9 @@ class PolicyAgent(Agent):
     def set_temperature(self, temperature):
         self._temperature = temperature
 
+    def set_evaluation_cache(self, evaluation_cache):
+        self._evaluation_cache = evaluation_cache
+
     def set_collector(self, collector):  # 9.17
         self._collector = collector      # Allows the self-play driver program to attach a collector to the agent
 
@@ -67,26 +73,23 @@ class PolicyAgent(Agent):
         move_probs = np.clip(move_probs, eps, 1 - eps)
         move_probs = move_probs / np.sum(move_probs)
 
-        # move_probs = move_probs.astype(dtype=np.float64)
-        candidates = np.arange(num_moves)  # Creates an array containing the index of every point on the board
-
-        # Samples from the points on the board according to the policy, creates a ranked list of points to try
-        ranked_moves = np.random.choice(candidates, num_moves, replace=False, p=move_probs)
-
-        for point_idx in ranked_moves:  # Loops over each point, checks if it's valid, and picks the first valid one
-            point = self._encoder.decode_point_index(point_idx)
-            move = goboard.Move.play(point)
-            is_valid = game_state.is_valid_move(move)
-            is_an_eye = is_point_an_eye(game_state.board, point, game_state.next_player)
-            if is_valid and (not is_an_eye):
-                if self._collector is not None:     # At the time it chooses a move, notifies the collector of the deci
-                    self._collector.record_decision(
-                        state=board_tensor,
-                        action=point_idx
-                    )
-                return goboard.Move.play(point)
-
-        return goboard.Move.pass_turn()     # If you fall through here, there are not reasonable moves left.
+        # Drops the points that are illegal or fill our own eyes (the encoder indexes points row by row,
+        # like the legal mask) and samples a point from what is left of the policy
+        move_probs = move_probs * game_state.legal_mask(exclude_eyes=True).ravel()
+        total = np.sum(move_probs)
+
+        if total == 0:
+            return goboard.Move.pass_turn()     # There are no reasonable moves left.
+
+        point_idx = np.random.choice(num_moves, p=move_probs / total)
+        point = self._encoder.decode_point_index(point_idx)
+
+        if self._collector is not None:     # At the time it chooses a move, notifies the collector of the deci
+            self._collector.record_decision(
+                state=board_tensor,
+                action=point_idx
+            )
+        return goboard.Move.play(point)
 
     def serialize(self, h5file):    # 9.9
         h5file.create_group('encoder')  # stores enough information to reconstruct the board encoder
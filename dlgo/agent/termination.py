@@ -29,6 +29,7 @@ class ResignLargeMargin(TerminationStrategy):
         self.margin = margin
 
         self.moves_played = 0
+        self.area_score = None
 
     def should_pass(self, game_state):
         return False
@@ -37,7 +38,9 @@ class ResignLargeMargin(TerminationStrategy):
         self.moves_played += 1
 
         if self.moves_played:
-            game_result = scoring.compute_game_result(self)
+            if self.area_score is None:
+                self.area_score = scoring.AreaScore(game_state.board)
+            game_result = self.area_score.update(game_state)
 
             if game_result.winner != self.own_color and game_result.winning_margin >= self.margin:
                 return True
@@ -52,6 +55,15 @@ class TerminationAgent(Agent):
         self.agent = agent
         self.strategy = strategy if strategy is not None else TerminationStrategy()
 
+    def set_time_manager(self, time_manager):
+        self.agent.set_time_manager(time_manager)
+
+    def can_ponder(self):
+        return self.agent.can_ponder()
+
+    def ponder(self, game_state, stop):
+        self.agent.ponder(game_state, stop)
+
     def select_move(self, game_state):
         if self.strategy.should_pass(game_state):
             return goboard_fast.Move.pass_turn()
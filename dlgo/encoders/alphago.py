@@ -1,7 +1,7 @@
 from dlgo.encoders.base import Encoder
 from dlgo.encoders.encoder_utils import is_ladder_escape, is_ladder_capture
-from dlgo.gotypes import Point, Player
-from dlgo.goboard_fast import Move
+from dlgo.gotypes import Player
+from dlgo.goboard_fast import Move, get_grid
 from dlgo.agent.helpers_fast import is_point_an_eye
 import numpy as np
 
@@ -52,9 +52,18 @@ class AlphaGoEncoder(Encoder):
 
     def encode(self, game_state):
         board_tensor = np.zeros((self.num_planes, self.board_height, self.board_width))
+
+        # all turns-since planes at once; the last of the 8 planes collects
+        # every stone that old or older
+        ages = np.minimum(game_state.board.move_ages.ages(), 7)
+        rows, cols = np.nonzero(ages > 0)
+        board_tensor[offset("turns_since") + ages[rows, cols], rows, cols] = 1
+
+        points = get_grid(self.board_height, self.board_width).points
+
         for r in range(self.board_height):
             for c in range(self.board_width):
-                point = Point(row=r + 1, col=c + 1)
+                point = points[r * self.board_width + c]
 
                 go_string = game_state.board.get_go_string(point)
                 if go_string and go_string.color == game_state.next_player:
@@ -70,16 +79,11 @@ class AlphaGoEncoder(Encoder):
                 if not is_point_an_eye(game_state.board, point, game_state.next_player):
                     board_tensor[offset("sensibleness")][r][c] = 1
 
-                ages = int(min(game_state.board.move_ages.get(r, c), 8))
-                if ages > 0:
-                    # print(ages)
-                    board_tensor[offset("turns_since") + ages][r][c] = 1
-
                 if game_state.board.get_go_string(point):
                     liberties = int(min(game_state.board.get_go_string(point).num_liberties, 8))
                     board_tensor[offset("liberties") + liberties][r][c] = 1
 
-                move = Move(point)
+                move = Move.play(point)
                 if game_state.is_valid_move(move):
                     new_state = game_state.apply_move(move)
                     liberties = int(min(new_state.board.get_go_string(point).num_liberties, 8))
@@ -128,9 +132,7 @@ class AlphaGoEncoder(Encoder):
         return self.board_width * (point.row - 1) + (point.col - 1)
 
     def decode_point_index(self, index):
-        row = index // self.board_width
-        col = index % self.board_width
-        return Point(row=row + 1, col=col + 1)
+        return get_grid(self.board_height, self.board_width).points[index]
 
     def num_points(self):
         return self.board_width * self.board_height
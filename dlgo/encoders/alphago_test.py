@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from dlgo.goboard_fast import Board, GameState, Move
 from dlgo.gotypes import Player, Point
 from dlgo.encoders.alphago import AlphaGoEncoder
@@ -19,6 +21,37 @@ class AlphaGoEncoderTest(unittest.TestCase):
         self.assertEquals(alphago.num_planes, 49)
         self.assertEquals(alphago.shape(), (49, 19, 19))
 
+    def test_turns_since(self):
+        alphago = AlphaGoEncoder()
+        game = GameState.new_game(19)
+
+        for col in range(1, 11):
+            game = game.apply_move(Move.play(Point(1, col)))
+
+        turns_since = alphago.encode(game)[6:14]
+
+        # the newest stone has age 0 and no plane, stones 7 or more moves old share the last one
+        self.assertEqual(0, turns_since[:, 0, 9].sum())
+        self.assertEqual(1, turns_since[1, 0, 8])
+        self.assertEqual(1, turns_since[6, 0, 3])
+        self.assertTrue(turns_since[7, 0, :3].all())
+        self.assertEqual(9, turns_since.sum())
+
+
+    def test_board_engines_agree(self):
+        # the ladder features look up moves and off-board neighbours
+        alphago = AlphaGoEncoder()
+        moves = [Point(1, 1), Point(1, 2), Point(2, 1), Point(19, 19), Point(18, 19), Point(3, 3), Point(2, 2)]
+        encoded = {}
+        for board_type in ('fast', 'array', 'bitboard'):
+            game = GameState.new_game(19, board_type)
+            for point in moves:
+                game = game.apply_move(Move.play(point))
+            encoded[board_type] = alphago.encode(game)
+
+        np.testing.assert_array_equal(encoded['fast'], encoded['array'])
+        np.testing.assert_array_equal(encoded['fast'], encoded['bitboard'])
+
 
 if __name__ == '__main__':
     unittest.main()
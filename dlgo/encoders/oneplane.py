@@ -3,6 +3,8 @@
 import numpy as np
 
 from dlgo.encoders.base import Encoder
+from dlgo import goboard_bitboard
+from dlgo.goboard_fast import get_grid
 from dlgo.gotypes import Point
 
 
@@ -17,6 +19,12 @@ class OnePlaneEncoder(Encoder):
     def encode(self, game_state):
         board_matrix = np.zeros(self.shape())
         next_player = game_state.next_player
+        board = game_state.board
+        if isinstance(board, goboard_bitboard.Board):
+            # unpack the planes straight from the bitboards
+            board_matrix[0] = board.unpack(board.stones(next_player))
+            board_matrix[0] -= board.unpack(board.stones(next_player.other))
+            return board_matrix
         for r in range(self.board_height):
             for c in range(self.board_width):
                 p = Point(row=r+1, col=c+1)
@@ -33,9 +41,7 @@ class OnePlaneEncoder(Encoder):
         return self.board_width * (point.row - 1) + (point.col - 1)
 
     def decode_point_index(self, index):
-        row = index // self.board_width
-        col = index % self.board_width
-        return Point(row=row+1, col=col+1)
+        return get_grid(self.board_height, self.board_width).points[index]
 
     def num_points(self):
         return self.board_width * self.board_height
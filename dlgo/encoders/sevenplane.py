@@ -3,7 +3,9 @@
 import numpy as np
 
 from dlgo.encoders.base import Encoder
+from dlgo import goboard_bitboard
 from dlgo.goboard import Move
+from dlgo.goboard_fast import get_grid
 from dlgo.gotypes import Point
 
 
@@ -19,6 +21,8 @@ class SevenPlaneEncoder(Encoder):
         board_tensor = np.zeros(self.shape())
         base_plane = {game_state.next_player: 0,
                       game_state.next_player.other: 3}
+        if isinstance(game_state.board, goboard_bitboard.Board):
+            return self.encode_bitboard(game_state, board_tensor, base_plane)
         for row in range(self.board_height):
             for col in range(self.board_width):
                 p = Point(row=row+1, col=col+1)
@@ -32,13 +36,24 @@ class SevenPlaneEncoder(Encoder):
                     board_tensor[liberty_plane][row][col] = 1
         return board_tensor
 
+    def encode_bitboard(self, game_state, board_tensor, base_plane):
+        board = game_state.board
+        for player, base in base_plane.items():
+            for plane, stones in enumerate(board.liberty_planes(player, 3)):
+                board_tensor[base + plane] = board.unpack(stones)
+        # a move can only repeat a position if it puts back a captured stone
+        next_player = game_state.next_player
+        candidates = board.unpack(board.empty()) & board.ever_captured[next_player.value - 1]
+        for index in np.flatnonzero(candidates).tolist():
+            if game_state.does_move_violate_ko(next_player, Move.play(self.decode_point_index(index))):
+                board_tensor[6].flat[index] = 1
+        return board_tensor
+
     def encode_point(self, point):
         return self.board_width * (point.row-1) + (point.col-1)
 
     def decode_point_index(self, index):
-        row = index // self.board_width
-        col = index % self.board_width
-        return Point(row=row+1, col=col+1)
+        return get_grid(self.board_height, self.board_width).points[index]
 
     def num_points(self):
         return self.board_width * self.board_height
@@ -0,0 +1,81 @@
+import collections
+import threading
+
+import numpy as np
+
+__all__ = ['EvaluationCache']
+
+
+class EvaluationCache:
+    """Network outputs by position, shared between agents and searches.
+
+    Entries are keyed by the model, the encoder name, the side to move and
+    the board hash, and the least recently used one is evicted once there
+    are capacity of them. Encoders that also look at the move history (ko,
+    move age) see positions with the same board as the same.
+    """
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._outputs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model, encoder, game_state):
+        return model, encoder.name(), game_state.next_player, game_state.board.zobrist_hash()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._outputs.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def predict(self, model, encoder, game_states):
+        # the output of model.predict for each of game_states: a row of its
+        # output, or a tuple of rows for a model with several outputs. The
+        # positions not in the cache are encoded and predicted together.
+        keys = [self.key(model, encoder, game_state) for game_state in game_states]
+        with self._lock:
+            outputs = [self._get(key) for key in keys]
+
+        missing = [i for i, output in enumerate(outputs) if output is None]
+        if missing:
+            model_input = np.array([encoder.encode(game_states[i]) for i in missing])
+            predicted = model.predict(model_input)
+            if isinstance(predicted, (list, tuple)):
+                rows = list(zip(*predicted))
+            else:
+                rows = list(predicted)
+
+            with self._lock:
+                for i, row in zip(missing, rows):
+                    outputs[i] = row
+                    self._put(keys[i], row)
+
+        return outputs
+
+    def _get(self, key):
+        output = self._outputs.get(key)
+
+        if output is None:
+            self.misses += 1
+        else:
+            self._outputs.move_to_end(key)
+            self.hits += 1
+
+        return output
+
+    def _put(self, key, output):
+        self._outputs[key] = output
+        self._outputs.move_to_end(key)
+
+        while len(self._outputs) > self.capacity:
+            self._outputs.popitem(last=False)
+
+    def __len__(self):
+        return len(self._outputs)
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from dlgo.evaluation_cache import EvaluationCache
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+from dlgo.zero.encoder import ZeroEncoder
+
+
+class CountingModel:
+    # a policy and a value head that tell the positions apart by their
+    # number of stones, counting the positions it is asked about
+    def __init__(self):
+        self.num_predicted = 0
+
+    def predict(self, model_input):
+        self.num_predicted += len(model_input)
+        stones = model_input[:, :8].sum(axis=(1, 2, 3))
+        return np.outer(stones, np.ones(26)), stones.reshape(-1, 1)
+
+
+def play(*points):
+    game = GameState.new_game(5)
+    for point in points:
+        game = game.apply_move(Move.play(point))
+    return game
+
+
+class EvaluationCacheTest(unittest.TestCase):
+    def test_only_new_positions_are_predicted(self):
+        cache = EvaluationCache()
+        model = CountingModel()
+        encoder = ZeroEncoder(5)
+        first, second = play(Point(1, 1)), play(Point(1, 1), Point(2, 2))
+
+        cache.predict(model, encoder, [first])
+        outputs = cache.predict(model, encoder, [second, first])
+        self.assertEqual(2, model.num_predicted)
+        self.assertEqual([2, 1], [value[0] for priors, value in outputs])
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+        self.assertAlmostEqual(1 / 3, cache.hit_rate())
+
+        # the same position by another move order
+        cache.predict(model, encoder, [play(Point(3, 3), Point(4, 4), Point(1, 1), Point(3, 4))])
+        cache.predict(model, encoder, [play(Point(1, 1), Point(4, 4), Point(3, 3), Point(3, 4))])
+        self.assertEqual(3, model.num_predicted)
+
+    def test_models_do_not_share_entries(self):
+        cache = EvaluationCache()
+        models = CountingModel(), CountingModel()
+        encoder = ZeroEncoder(5)
+
+        for model in models:
+            cache.predict(model, encoder, [play(Point(1, 1))])
+        self.assertEqual([1, 1], [model.num_predicted for model in models])
+
+    def test_least_recently_used_is_evicted(self):
+        cache = EvaluationCache(capacity=2)
+        model = CountingModel()
+        encoder = ZeroEncoder(5)
+        positions = [play(Point(1, col)) for col in range(1, 4)]
+
+        cache.predict(model, encoder, positions[:2])
+        cache.predict(model, encoder, positions[:1])
+        cache.predict(model, encoder, positions[2:])
+        self.assertEqual(2, len(cache))
+        cache.predict(model, encoder, positions[:1])
+        self.assertEqual(3, model.num_predicted)
+        cache.predict(model, encoder, positions[1:2])
+        self.assertEqual(4, model.num_predicted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -103,7 +103,7 @@ class Board:
         for new_string_point in new_string.stones:
             self._grid[new_string_point] = new_string
 
-        self._hash ^= zobrist.HASH_CODE[point, player]
+        self._hash ^= self._hash_code(point, player)
 
         for other_color_string in adjacent_opposite_color:
             replacement = other_color_string.without_liberty(point)
@@ -129,7 +129,11 @@ class Board:
                     self._replace_string(neighbor_string.with_liberty(point))
 
             self._grid[point] = None
-            self._hash ^= zobrist.HASH_CODE[point, string.color]
+            self._hash ^= self._hash_code(point, string.color)
+
+    def _hash_code(self, point, player):
+        codes = zobrist.get_hash_codes(self.num_rows, self.num_cols)
+        return codes[(point.row - 1) * self.num_cols + point.col - 1][player.value]
 
     def is_on_grid(self, point):
         return 1 <= point.row <= self.num_rows and \
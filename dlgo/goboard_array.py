@@ -0,0 +1,480 @@
+import copy
+import numpy as np
+from dlgo.gotypes import Player, Point
+from dlgo import goboard_fast
+from dlgo import zobrist
+from dlgo.goboard_fast import GoString, Move
+from dlgo.goboard_fast import BLACK_PLAYABLE, WHITE_PLAYABLE, BLACK_CAPTURES, WHITE_CAPTURES, BLACK_EYE, WHITE_EYE
+from .utils import MoveAge
+
+__all__ = ['Board', 'GameState', 'Move']
+
+# point contents, stored as small ints so the board is a handful of flat lists
+EMPTY, BLACK, WHITE, BORDER = 0, 1, 2, 3
+COLOR_TO_PLAYER = (None, Player.black, Player.white, None)
+
+# padded layouts are shared between all boards of the same size
+layouts = {}
+
+
+class Layout:
+    """Padded 1-D indexing of a board.
+
+    Rows and columns are numbered from 1 as in Point; row 0, row num_rows + 1
+    and column 0 are off-board. Column 0 of the next row doubles as the right
+    hand border, so the four neighbours of any on-board index are always
+    index +/- 1 and index +/- stride.
+    """
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.stride = num_cols + 1
+        self.size = (num_rows + 2) * self.stride + 1
+        self.offsets = (-self.stride, self.stride, -1, 1)
+        self.diagonals = (-self.stride - 1, -self.stride + 1, self.stride - 1, self.stride + 1)
+        self.empty_flags = None
+
+        self.points = [None] * self.size
+        self.empty_colors = [BORDER] * self.size
+        self.on_board = []
+        self.hash_codes = [None] * self.size
+        codes = zobrist.get_hash_codes(num_rows, num_cols)
+        grid = goboard_fast.get_grid(num_rows, num_cols)
+
+        for row in range(1, num_rows + 1):
+            for col in range(1, num_cols + 1):
+                idx = row * self.stride + col
+                pt = grid.point(row, col)
+
+                self.points[idx] = pt
+                self.empty_colors[idx] = EMPTY
+                self.on_board.append(idx)
+                self.hash_codes[idx] = tuple(codes[(row - 1) * num_cols + col - 1])
+
+    def index(self, point):
+        return point.row * self.stride + point.col
+
+
+def get_layout(num_rows, num_cols):
+    dim = (num_rows, num_cols)
+
+    if dim not in layouts:
+        layouts[dim] = Layout(num_rows, num_cols)
+
+    return layouts[dim]
+
+
+class Board:
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self._layout = get_layout(num_rows, num_cols)
+
+        # per point: colour code and id of the string occupying it (0 if empty).
+        # A string id is the index of one of its stones; the stones and
+        # liberties of every string are keyed by that id and never mutated in
+        # place, so copying the board only copies two lists and two dicts.
+        self._color = list(self._layout.empty_colors)
+        self._string_id = [0] * self._layout.size
+        self._stones = {}
+        self._liberties = {}
+
+        self._hash = zobrist.EMPTY_BOARD
+        self._go_strings = {}
+
+        dim = (num_rows, num_cols)
+
+        if dim not in goboard_fast.neighbor_tables:
+            goboard_fast.init_neighbor_table(dim)
+
+        if dim not in goboard_fast.corner_tables:
+            goboard_fast.init_corner_table(dim)
+
+        self.neighbor_table = goboard_fast.neighbor_tables[dim]
+        self.corner_table = goboard_fast.corner_tables[dim]
+        self.move_ages = MoveAge(self)
+
+        # indices whose point flags need to be brought up to date
+        self._stale_flags = set()
+
+        if self._layout.empty_flags is None:
+            self._point_flags = np.zeros(dim, dtype=np.uint8)
+            self._update_flags(self._layout.on_board)
+            self._layout.empty_flags = self._point_flags
+
+        self._point_flags = self._layout.empty_flags.copy()
+        self.ever_captured = np.zeros((2, num_rows, num_cols), dtype=bool)
+
+    def neighbors(self, point):
+        return self.neighbor_table[point]
+
+    def corners(self, point):
+        return self.corner_table[point]
+
+    def place_stone(self, player, point):
+        assert self.is_on_grid(point)
+
+        idx = point.row * self._layout.stride + point.col
+        colors = self._color
+        string_ids = self._string_id
+
+        assert colors[idx] == EMPTY
+
+        self.move_ages.add(point)
+        self._go_strings = {}
+
+        color = player.value
+        other_color = player.other.value
+
+        # examine adjacent points
+        liberties = set()
+        adjacent_same_color = []
+        adjacent_opposite_color = []
+
+        for offset in self._layout.offsets:
+            neighbor = idx + offset
+            neighbor_color = colors[neighbor]
+
+            if neighbor_color == EMPTY:
+                liberties.add(neighbor)
+            elif neighbor_color == color:
+                if string_ids[neighbor] not in adjacent_same_color:
+                    adjacent_same_color.append(string_ids[neighbor])
+            elif neighbor_color == other_color:
+                if string_ids[neighbor] not in adjacent_opposite_color:
+                    adjacent_opposite_color.append(string_ids[neighbor])
+
+        colors[idx] = color
+        codes = self._layout.hash_codes[idx]
+        self._hash ^= codes[EMPTY] ^ codes[color]
+
+        # points whose flags may have changed: the surroundings of every stone
+        # put on or taken off the board, and the liberties of every string
+        # that went into or out of atari
+        changed = self._stale_flags
+        changed.add(idx)
+        changed.update(idx + offset for offset in self._layout.offsets + self._layout.diagonals)
+        in_atari = any(len(self._liberties[same_color_id]) == 1 for same_color_id in adjacent_same_color)
+
+        # merge adjacent strings of same color into the largest of them, so
+        # only the stones of the smaller strings need relabelling
+        if adjacent_same_color:
+            string_id = max(adjacent_same_color, key=lambda same_color_id: len(self._stones[same_color_id]))
+            stones = list(self._stones[string_id])
+
+            for same_color_id in adjacent_same_color:
+                liberties |= self._liberties[same_color_id]
+
+                if same_color_id != string_id:
+                    for stone in self._stones[same_color_id]:
+                        string_ids[stone] = string_id
+
+                    stones.extend(self._stones[same_color_id])
+                    del self._stones[same_color_id]
+                    del self._liberties[same_color_id]
+
+            liberties.discard(idx)
+            stones.append(idx)
+        else:
+            string_id = idx
+            stones = [idx]
+
+        string_ids[idx] = string_id
+        self._stones[string_id] = tuple(stones)
+        self._liberties[string_id] = frozenset(liberties)
+
+        if in_atari or len(liberties) == 1:
+            changed.update(liberties)
+
+        # reduce liberties of adjacent strings of opposite color
+        # (if opposite color strings now have zero liberties, remove them)
+        for other_id in adjacent_opposite_color:
+            other_liberties = self._liberties[other_id] - {idx}
+
+            if other_liberties:
+                self._liberties[other_id] = other_liberties
+
+                if len(other_liberties) == 1:
+                    changed.update(other_liberties)
+            else:
+                changed.update(self._remove_string(other_id))
+
+    def _remove_string(self, string_id):
+        # returns the indices whose flags the capture may have changed
+        colors = self._color
+        string_ids = self._string_id
+        hash_codes = self._layout.hash_codes
+        stones = self._stones[string_id]
+        color = colors[string_id]
+
+        for stone in stones:
+            colors[stone] = EMPTY
+            string_ids[stone] = 0
+            self._hash ^= hash_codes[stone][color] ^ hash_codes[stone][EMPTY]
+            self.move_ages.reset_age(self._layout.points[stone])
+            self.ever_captured[color - 1, stone // self._layout.stride - 1, stone % self._layout.stride - 1] = True
+
+        del self._stones[string_id]
+        del self._liberties[string_id]
+
+        # the captured stones are liberties for the surrounding strings now
+        gained = {}
+
+        for stone in stones:
+            for offset in self._layout.offsets:
+                neighbor_id = string_ids[stone + offset]
+
+                if neighbor_id:
+                    gained.setdefault(neighbor_id, []).append(stone)
+
+        changed = set()
+
+        for stone in stones:
+            changed.add(stone)
+            changed.update(stone + offset for offset in self._layout.offsets + self._layout.diagonals)
+
+        for neighbor_id, new_liberties in gained.items():
+            if len(self._liberties[neighbor_id]) == 1:
+                changed.update(self._liberties[neighbor_id])
+
+            self._liberties[neighbor_id] = self._liberties[neighbor_id].union(new_liberties)
+
+        return changed
+
+    @property
+    def point_flags(self):
+        # (num_rows, num_cols) array of PLAYABLE, CAPTURES and EYE bits
+        if self._stale_flags:
+            self._update_flags(self._stale_flags)
+            self._stale_flags = set()
+
+        return self._point_flags
+
+    def _update_flags(self, indices):
+        stride = self._layout.stride
+
+        for idx in indices:
+            if self._color[idx] != BORDER:
+                row, col = divmod(idx, stride)
+                self._point_flags[row - 1, col - 1] = self._flags_at(idx)
+
+    def _flags_at(self, idx):
+        colors = self._color
+
+        if colors[idx] != EMPTY:
+            return 0
+
+        flags = 0
+        neighbor_colors = 0
+
+        for offset in self._layout.offsets:
+            neighbor = idx + offset
+            neighbor_color = colors[neighbor]
+            neighbor_colors |= 1 << neighbor_color
+
+            if neighbor_color == EMPTY:
+                flags |= BLACK_PLAYABLE | WHITE_PLAYABLE
+            elif neighbor_color == BLACK:
+                flags |= BLACK_PLAYABLE if len(self._liberties[self._string_id[neighbor]]) > 1 \
+                    else WHITE_PLAYABLE | WHITE_CAPTURES
+            elif neighbor_color == WHITE:
+                flags |= WHITE_PLAYABLE if len(self._liberties[self._string_id[neighbor]]) > 1 \
+                    else BLACK_PLAYABLE | BLACK_CAPTURES
+
+        # eyes: every neighbour (ignoring the border) is a friendly stone
+        for color, eye_flag in ((BLACK, BLACK_EYE), (WHITE, WHITE_EYE)):
+            if neighbor_colors & ~(1 << color | 1 << BORDER) == 0:
+                corner_colors = [colors[idx + offset] for offset in self._layout.diagonals]
+
+                if goboard_fast.is_eye_shape(corner_colors.count(color), corner_colors.count(BORDER)):
+                    flags |= eye_flag
+
+        return flags
+
+    def is_self_capture(self, player, point):
+        idx = point.row * self._layout.stride + point.col
+        color = player.value
+        friendly_strings = []
+
+        for offset in self._layout.offsets:
+            neighbor = idx + offset
+            neighbor_color = self._color[neighbor]
+
+            if neighbor_color == EMPTY:
+                return False  # not a capture since this point has a liberty
+            elif neighbor_color == color:
+                friendly_strings.append(self._string_id[neighbor])
+            elif neighbor_color != BORDER:
+                if len(self._liberties[self._string_id[neighbor]]) == 1:
+                    return False
+
+        return all(len(self._liberties[string_id]) == 1 for string_id in friendly_strings)
+
+    def will_capture(self, player, point):
+        idx = point.row * self._layout.stride + point.col
+        other_color = player.other.value
+
+        for offset in self._layout.offsets:
+            neighbor = idx + offset
+
+            if self._color[neighbor] == other_color and \
+                    len(self._liberties[self._string_id[neighbor]]) == 1:
+                return True  # this move would capture
+
+        return False
+
+    def hash_after_move(self, player, point):
+        # zobrist hash of the position after player plays point; only strings
+        # the move captures need to be walked
+        idx = point.row * self._layout.stride + point.col
+        hash_codes = self._layout.hash_codes
+        color = player.value
+        other_color = player.other.value
+        new_hash = self._hash ^ hash_codes[idx][EMPTY] ^ hash_codes[idx][color]
+        captured = []
+
+        for offset in self._layout.offsets:
+            neighbor = idx + offset
+            string_id = self._string_id[neighbor]
+
+            if self._color[neighbor] != other_color or len(self._liberties[string_id]) > 1 or string_id in captured:
+                continue
+
+            captured.append(string_id)
+
+            for stone in self._stones[string_id]:
+                new_hash ^= hash_codes[stone][other_color] ^ hash_codes[stone][EMPTY]
+
+        return new_hash
+
+    def record_move(self, player, point):
+        # collect the strings place_stone(player, point) is about to rewrite
+        # (neighbours, captured strings and the strings around the captured
+        # stones), which together with the hash is all undo_move needs
+        idx = point.row * self._layout.stride + point.col
+        other_color = player.other.value
+        touched = []
+
+        for offset in self._layout.offsets:
+            neighbor = idx + offset
+            string_id = self._string_id[neighbor]
+
+            if not string_id or string_id in touched:
+                continue
+
+            touched.append(string_id)
+
+            if self._color[neighbor] == other_color and len(self._liberties[string_id]) == 1:
+                for stone in self._stones[string_id]:
+                    for stone_offset in self._layout.offsets:
+                        other_id = self._string_id[stone + stone_offset]
+
+                        if other_id and other_id not in touched:
+                            touched.append(other_id)
+
+        strings = [(string_id, self._color[string_id], self._stones[string_id], self._liberties[string_id])
+                   for string_id in touched]
+
+        return idx, strings, self._hash, self.move_ages.snapshot(), \
+            self._point_flags.copy(), set(self._stale_flags), self.ever_captured.copy()
+
+    def undo_move(self, delta):
+        idx, strings, previous_hash, move_ages, point_flags, stale_flags, ever_captured = delta
+
+        # drop the string holding the placed stone, then put back every string
+        # it merged with or captured
+        string_id = self._string_id[idx]
+        del self._stones[string_id]
+        del self._liberties[string_id]
+        self._color[idx] = EMPTY
+        self._string_id[idx] = 0
+
+        for string_id, color, stones, liberties in strings:
+            self._stones[string_id] = stones
+            self._liberties[string_id] = liberties
+
+            for stone in stones:
+                self._color[stone] = color
+                self._string_id[stone] = string_id
+
+        self._hash = previous_hash
+        self._go_strings = {}
+        self.move_ages.restore(move_ages)
+        self._point_flags = point_flags
+        self._stale_flags = stale_flags
+        self.ever_captured = ever_captured
+
+    def is_on_grid(self, point):
+        return 1 <= point.row <= self.num_rows and 1 <= point.col <= self.num_cols
+
+    def get(self, point):
+        # returns content of a point on the board
+        # could be None or a Player
+        if not isinstance(point, Point) or not self.is_on_grid(point):
+            return None
+
+        return COLOR_TO_PLAYER[self._color[point.row * self._layout.stride + point.col]]
+
+    def get_go_string(self, point):
+        # returns entire string of stones at a point (if any), built on demand
+        # and cached until the next stone is placed. Off-board points, and the
+        # moves the ladder features look up, have none.
+        if not isinstance(point, Point) or not self.is_on_grid(point):
+            return None
+
+        string_id = self._string_id[point.row * self._layout.stride + point.col]
+
+        if not string_id:
+            return None
+
+        go_string = self._go_strings.get(string_id)
+
+        if go_string is None:
+            points = self._layout.points
+            go_string = GoString(COLOR_TO_PLAYER[self._color[string_id]],
+                                 [points[stone] for stone in self._stones[string_id]],
+                                 [points[liberty] for liberty in self._liberties[string_id]])
+            self._go_strings[string_id] = go_string
+
+        return go_string
+
+    def colors(self):
+        # (num_rows, num_cols) int8 array of Player values, 0 where empty
+        colors = np.array(self._color, dtype=np.int8)[self._layout.on_board]
+
+        return colors.reshape(self.num_rows, self.num_cols)
+
+    def __eq__(self, other):
+        return isinstance(other, Board) \
+               and self.num_rows == other.num_rows and \
+               self.num_cols == other.num_cols \
+               and self.zobrist_hash() == other.zobrist_hash()
+
+    def __deepcopy__(self, memodict=None):
+        copied = Board.__new__(Board)
+        copied.num_rows = self.num_rows
+        copied.num_cols = self.num_cols
+        copied._layout = self._layout
+        copied._color = self._color[:]
+        copied._string_id = self._string_id[:]
+        copied._stones = self._stones.copy()
+        copied._liberties = self._liberties.copy()
+        copied._hash = self._hash
+        copied._go_strings = {}
+        copied.neighbor_table = self.neighbor_table
+        copied.corner_table = self.corner_table
+        copied.move_ages = copy.deepcopy(self.move_ages)
+        copied._point_flags = self._point_flags.copy()
+        copied._stale_flags = set(self._stale_flags)
+        copied.ever_captured = self.ever_captured.copy()
+
+        return copied
+
+    def zobrist_hash(self):
+        return self._hash
+
+
+class GameState(goboard_fast.GameState):
+    @classmethod
+    def new_game(cls, board_size, board_type='array'):
+        return super().new_game(board_size, board_type)
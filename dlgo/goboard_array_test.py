@@ -0,0 +1,60 @@
+import random
+import unittest
+
+from dlgo import goboard_array
+from dlgo import goboard_fast
+from dlgo.gotypes import Player, Point
+
+
+class ArrayBoardTest(unittest.TestCase):
+    def test_capture(self):
+        board = goboard_array.Board(19, 19)
+        board.place_stone(Player.black, Point(2, 2))
+        board.place_stone(Player.white, Point(1, 2))
+        self.assertEqual(Player.black, board.get(Point(2, 2)))
+        board.place_stone(Player.black, Point(1, 1))
+        board.place_stone(Player.black, Point(1, 3))
+        self.assertIsNone(board.get(Point(1, 2)))
+        self.assertEqual(2, board.get_go_string(Point(1, 1)).num_liberties)
+
+    def test_merge(self):
+        board = goboard_array.Board(9, 9)
+        board.place_stone(Player.black, Point(5, 4))
+        board.place_stone(Player.black, Point(5, 6))
+        board.place_stone(Player.black, Point(5, 5))
+        go_string = board.get_go_string(Point(5, 4))
+        self.assertEqual(3, len(go_string.stones))
+        self.assertEqual(8, go_string.num_liberties)
+        self.assertIs(go_string, board.get_go_string(Point(5, 6)))
+
+    def test_matches_fast_board(self):
+        random.seed(1)
+
+        for board_size in (5, 9):
+            fast_state = goboard_fast.GameState.new_game(board_size)
+            array_state = goboard_array.GameState.new_game(board_size)
+            self.assertIsInstance(array_state.board, goboard_array.Board)
+
+            while not fast_state.is_over():
+                moves = fast_state.legal_moves()
+                self.assertEqual(moves, array_state.legal_moves())
+
+                move = random.choice([m for m in moves if not m.is_resign])
+                fast_state = fast_state.apply_move(move)
+                array_state = array_state.apply_move(move)
+                self.assert_same_position(fast_state.board, array_state.board)
+
+            self.assertEqual(fast_state.winner(), array_state.winner())
+
+    def assert_same_position(self, fast_board, array_board):
+        self.assertEqual(fast_board.zobrist_hash(), array_board.zobrist_hash())
+
+        for row in range(1, fast_board.num_rows + 1):
+            for col in range(1, fast_board.num_cols + 1):
+                point = Point(row, col)
+                self.assertEqual(fast_board.get(point), array_board.get(point))
+                self.assertEqual(fast_board.get_go_string(point), array_board.get_go_string(point))
+
+
+if __name__ == '__main__':
+    unittest.main()
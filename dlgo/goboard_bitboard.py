@@ -0,0 +1,394 @@
+import copy
+import numpy as np
+from dlgo.gotypes import Player, Point
+from dlgo import goboard_fast
+from dlgo import zobrist
+from dlgo.goboard_fast import GoString, Move
+from dlgo.goboard_fast import BLACK_PLAYABLE, WHITE_PLAYABLE, BLACK_CAPTURES, WHITE_CAPTURES, BLACK_EYE, WHITE_EYE
+from .utils import MoveAge
+
+__all__ = ['Board', 'GameState', 'Move']
+
+EMPTY = zobrist.EMPTY
+
+# bit layouts are shared between all boards of the same size
+layouts = {}
+
+
+def iter_bits(bits):
+    # indices of the set bits, lowest first
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class Layout:
+    """Bit numbering of a board.
+
+    Point (row, col) is bit (row - 1) * stride + col - 1 of a Python int, with
+    stride = num_cols + 1. The unused bit ending every row keeps shifts by one
+    from wrapping onto the next row, so the neighbours of a set of points are
+    that set shifted by 1 and by stride, masked to the board.
+    """
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.stride = num_cols + 1
+        self.num_bits = num_rows * self.stride
+        self.num_bytes = (self.num_bits + 7) // 8
+        self.on_board = 0
+
+        size = self.num_bits
+        self.points = [None] * size
+        self.hash_codes = [None] * size
+        self.neighbor_bits = [()] * size
+        self.corner_masks = [0] * size
+        codes = zobrist.get_hash_codes(num_rows, num_cols)
+
+        for grid_index, point in enumerate(goboard_fast.get_grid(num_rows, num_cols).points):
+            idx = self.index(point)
+            self.on_board |= 1 << idx
+            self.points[idx] = point
+            self.hash_codes[idx] = tuple(codes[grid_index])
+
+        for idx in iter_bits(self.on_board):
+            bit = 1 << idx
+            # same order as the neighbour table of goboard_fast
+            self.neighbor_bits[idx] = tuple(neighbor for neighbor in
+                                            (bit >> self.stride, bit << self.stride, bit >> 1, bit << 1)
+                                            if neighbor & self.on_board)
+            self.corner_masks[idx] = self.diagonal(bit)
+
+    def index(self, point):
+        return (point.row - 1) * self.stride + point.col - 1
+
+    def adjacent(self, bits):
+        # the on-board points next to any of bits
+        stride = self.stride
+        return (bits << 1 | bits >> 1 | bits << stride | bits >> stride) & self.on_board
+
+    def diagonal(self, bits):
+        stride = self.stride
+        return (bits << stride + 1 | bits << stride - 1 | bits >> stride - 1 | bits >> stride + 1) & self.on_board
+
+    def flood(self, seed, stones):
+        # the string of stones connected to seed
+        string = seed
+
+        while True:
+            grown = (string | self.adjacent(string)) & stones
+
+            if grown == string:
+                return string
+
+            string = grown
+
+    def unpack(self, bits):
+        # boolean (num_rows, num_cols) plane of a bitboard
+        data = np.frombuffer(bits.to_bytes(self.num_bytes, 'little'), dtype=np.uint8)
+        plane = np.unpackbits(data, bitorder='little')[:self.num_bits].reshape(self.num_rows, self.stride)
+
+        return plane[:, :self.num_cols].astype(bool)
+
+
+def get_layout(num_rows, num_cols):
+    dim = (num_rows, num_cols)
+
+    if dim not in layouts:
+        layouts[dim] = Layout(num_rows, num_cols)
+
+    return layouts[dim]
+
+
+class Board:
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self._layout = get_layout(num_rows, num_cols)
+
+        # one bitboard of stones per colour, indexed by Player.value. Python
+        # ints never change in place, so copying a board copies two ints.
+        self._stones = [0, 0, 0]
+        self._captured = [0, 0, 0]
+        self._hash = zobrist.EMPTY_BOARD
+        self._go_strings = {}
+
+        dim = (num_rows, num_cols)
+
+        if dim not in goboard_fast.neighbor_tables:
+            goboard_fast.init_neighbor_table(dim)
+
+        if dim not in goboard_fast.corner_tables:
+            goboard_fast.init_corner_table(dim)
+
+        self.neighbor_table = goboard_fast.neighbor_tables[dim]
+        self.corner_table = goboard_fast.corner_tables[dim]
+        self.move_ages = MoveAge(self)
+
+        # point flags are worked out for the whole board at once when asked
+        # for, and replaced rather than changed afterwards
+        self._point_flags = None
+
+    def neighbors(self, point):
+        return self.neighbor_table[point]
+
+    def corners(self, point):
+        return self.corner_table[point]
+
+    def stones(self, player):
+        # bitboard of the player's stones
+        return self._stones[player.value]
+
+    def empty(self):
+        return self._layout.on_board & ~(self._stones[1] | self._stones[2])
+
+    def unpack(self, bits):
+        return self._layout.unpack(bits)
+
+    def strings(self, player):
+        # (stones, liberties) bitboards of each of the player's strings
+        layout = self._layout
+        stones = self._stones[player.value]
+        empty = self.empty()
+
+        while stones:
+            string = layout.flood(stones & -stones, stones)
+            stones ^= string
+            yield string, layout.adjacent(string) & empty
+
+    def liberty_planes(self, player, num_planes):
+        # bitboards of the player's stones by liberties of their string:
+        # plane i holds strings with i + 1 liberties, the last plane those with
+        # num_planes or more
+        planes = [0] * num_planes
+
+        for string, liberties in self.strings(player):
+            planes[min(num_planes, liberties.bit_count()) - 1] |= string
+
+        return planes
+
+    def _captured_by(self, color, idx):
+        # opponent stones that a stone of color at idx would capture
+        layout = self._layout
+        other_stones = self._stones[3 - color]
+        empty = self.empty() & ~(1 << idx)
+        seen = 0
+        captured = 0
+
+        for neighbor in layout.neighbor_bits[idx]:
+            if not neighbor & other_stones or neighbor & seen:
+                continue
+
+            string = layout.flood(neighbor, other_stones)
+            seen |= string
+
+            if not layout.adjacent(string) & empty:
+                captured |= string
+
+        return captured
+
+    def place_stone(self, player, point):
+        assert self.is_on_grid(point)
+
+        layout = self._layout
+        idx = layout.index(point)
+        color = player.value
+        other_color = player.other.value
+
+        assert not (self._stones[1] | self._stones[2]) & 1 << idx
+
+        self.move_ages.add(point)
+        self._go_strings = {}
+        self._point_flags = None
+
+        captured = self._captured_by(color, idx)
+        self._stones[color] |= 1 << idx
+        codes = layout.hash_codes[idx]
+        self._hash ^= codes[EMPTY] ^ codes[color]
+
+        if captured:
+            self._stones[other_color] &= ~captured
+            self._captured[other_color] |= captured
+
+            for stone in iter_bits(captured):
+                codes = layout.hash_codes[stone]
+                self._hash ^= codes[other_color] ^ codes[EMPTY]
+                self.move_ages.reset_age(layout.points[stone])
+
+    @property
+    def ever_captured(self):
+        # (2, num_rows, num_cols): where black (0) and white (1) stones were captured
+        return np.stack([self.unpack(self._captured[1]), self.unpack(self._captured[2])])
+
+    @property
+    def point_flags(self):
+        # (num_rows, num_cols) array of PLAYABLE, CAPTURES and EYE bits
+        if self._point_flags is None:
+            self._point_flags = self._flags()
+
+        return self._point_flags
+
+    def _flags(self):
+        layout = self._layout
+        empty = self.empty()
+        safe = [0, 0, 0]
+        in_atari = [0, 0, 0]
+
+        for player in (Player.black, Player.white):
+            for string, liberties in self.strings(player):
+                if liberties & (liberties - 1):
+                    safe[player.value] |= string
+                else:
+                    in_atari[player.value] |= string
+
+        flags = np.zeros((self.num_rows, self.num_cols), dtype=np.uint8)
+        next_to_empty = layout.adjacent(empty)
+
+        for color, other_color, playable, captures, eye in ((1, 2, BLACK_PLAYABLE, BLACK_CAPTURES, BLACK_EYE),
+                                                             (2, 1, WHITE_PLAYABLE, WHITE_CAPTURES, WHITE_EYE)):
+            capturing = empty & layout.adjacent(in_atari[other_color])
+            flags[self.unpack(capturing)] |= captures
+            flags[self.unpack(empty & (next_to_empty | layout.adjacent(safe[color]) | capturing))] |= playable
+
+            # eyes: every neighbour is a friendly stone, and enough corners are
+            eyes = 0
+            stones = self._stones[color]
+
+            for idx in iter_bits(empty & ~layout.adjacent(empty | self._stones[other_color])):
+                corners = layout.corner_masks[idx]
+
+                if goboard_fast.is_eye_shape((corners & stones).bit_count(), 4 - corners.bit_count()):
+                    eyes |= 1 << idx
+
+            flags[self.unpack(eyes)] |= eye
+
+        return flags
+
+    def is_self_capture(self, player, point):
+        layout = self._layout
+        idx = layout.index(point)
+        bit = 1 << idx
+        empty = self.empty() & ~bit
+
+        if layout.adjacent(bit) & empty:
+            return False  # not a capture since this point has a liberty
+
+        if self._captured_by(player.value, idx):
+            return False
+
+        string = layout.flood(bit, self._stones[player.value] | bit)
+
+        return not layout.adjacent(string) & empty
+
+    def will_capture(self, player, point):
+        return self._captured_by(player.value, self._layout.index(point)) != 0
+
+    def hash_after_move(self, player, point):
+        # zobrist hash of the position after player plays point
+        layout = self._layout
+        idx = layout.index(point)
+        color = player.value
+        other_color = player.other.value
+        new_hash = self._hash ^ layout.hash_codes[idx][EMPTY] ^ layout.hash_codes[idx][color]
+
+        for stone in iter_bits(self._captured_by(color, idx)):
+            new_hash ^= layout.hash_codes[stone][other_color] ^ layout.hash_codes[stone][EMPTY]
+
+        return new_hash
+
+    def record_move(self, player, point):
+        # the whole position is a few ints, and the point flags are never
+        # changed in place, so undo_move only needs references to them
+        return list(self._stones), list(self._captured), self._hash, self.move_ages.snapshot(), \
+            self._point_flags
+
+    def undo_move(self, delta):
+        self._stones, self._captured, self._hash, move_ages, self._point_flags = delta
+        self._go_strings = {}
+        self.move_ages.restore(move_ages)
+
+    def is_on_grid(self, point):
+        return 1 <= point.row <= self.num_rows and 1 <= point.col <= self.num_cols
+
+    def get(self, point):
+        # returns content of a point on the board
+        # could be None or a Player
+        if not isinstance(point, Point) or not self.is_on_grid(point):
+            return None
+
+        bit = 1 << self._layout.index(point)
+
+        if self._stones[1] & bit:
+            return Player.black
+        if self._stones[2] & bit:
+            return Player.white
+        return None
+
+    def get_go_string(self, point):
+        # returns entire string of stones at a point (if any), built on demand
+        # and cached for all of its stones until the next stone is placed.
+        # Off-board points, and the moves the ladder features look up, have
+        # none.
+        if not isinstance(point, Point) or not self.is_on_grid(point):
+            return None
+
+        layout = self._layout
+        idx = layout.index(point)
+        go_string = self._go_strings.get(idx)
+
+        if go_string is None:
+            player = self.get(point)
+
+            if player is None:
+                return None
+
+            string = layout.flood(1 << idx, self._stones[player.value])
+            liberties = layout.adjacent(string) & self.empty()
+            points = layout.points
+            stones = list(iter_bits(string))
+            go_string = GoString(player, [points[stone] for stone in stones],
+                                 [points[liberty] for liberty in iter_bits(liberties)])
+
+            for stone in stones:
+                self._go_strings[stone] = go_string
+
+        return go_string
+
+    def colors(self):
+        # (num_rows, num_cols) int8 array of Player values, 0 where empty
+        colors = self.unpack(self._stones[1]).astype(np.int8)
+        colors[self.unpack(self._stones[2])] = Player.white.value
+
+        return colors
+
+    def __eq__(self, other):
+        return isinstance(other, Board) \
+               and self.num_rows == other.num_rows and \
+               self.num_cols == other.num_cols \
+               and self.zobrist_hash() == other.zobrist_hash()
+
+    def __deepcopy__(self, memodict=None):
+        copied = Board.__new__(Board)
+        copied.num_rows = self.num_rows
+        copied.num_cols = self.num_cols
+        copied._layout = self._layout
+        copied._stones = list(self._stones)
+        copied._captured = list(self._captured)
+        copied._hash = self._hash
+        copied._go_strings = {}
+        copied.neighbor_table = self.neighbor_table
+        copied.corner_table = self.corner_table
+        copied.move_ages = copy.deepcopy(self.move_ages)
+        copied._point_flags = self._point_flags
+
+        return copied
+
+    def zobrist_hash(self):
+        return self._hash
+
+
+class GameState(goboard_fast.GameState):
+    @classmethod
+    def new_game(cls, board_size, board_type='bitboard'):
+        return super().new_game(board_size, board_type)
@@ -0,0 +1,90 @@
+import random
+import unittest
+
+import numpy as np
+
+from dlgo import goboard_bitboard
+from dlgo import goboard_fast
+from dlgo.encoders.oneplane import OnePlaneEncoder
+from dlgo.encoders.sevenplane import SevenPlaneEncoder
+from dlgo.gotypes import Player, Point
+
+
+class BitboardTest(unittest.TestCase):
+    def test_capture(self):
+        board = goboard_bitboard.Board(19, 19)
+        board.place_stone(Player.black, Point(2, 2))
+        board.place_stone(Player.white, Point(1, 2))
+        self.assertEqual(Player.black, board.get(Point(2, 2)))
+        board.place_stone(Player.black, Point(1, 1))
+        board.place_stone(Player.black, Point(1, 3))
+        self.assertIsNone(board.get(Point(1, 2)))
+        self.assertEqual(2, board.get_go_string(Point(1, 1)).num_liberties)
+        self.assertTrue(board.ever_captured[1, 0, 1])
+
+    def test_edges_do_not_wrap(self):
+        board = goboard_bitboard.Board(9, 9)
+        board.place_stone(Player.black, Point(1, 9))
+        board.place_stone(Player.black, Point(2, 1))
+        self.assertEqual(1, len(board.get_go_string(Point(1, 9)).stones))
+        self.assertEqual(2, board.get_go_string(Point(1, 9)).num_liberties)
+        self.assertEqual(3, board.get_go_string(Point(2, 1)).num_liberties)
+
+    def test_matches_fast_board(self):
+        random.seed(2)
+
+        for board_size in (5, 9):
+            fast_state = goboard_fast.GameState.new_game(board_size)
+            bit_state = goboard_bitboard.GameState.new_game(board_size)
+            self.assertIsInstance(bit_state.board, goboard_bitboard.Board)
+            encoders = [OnePlaneEncoder((board_size, board_size)), SevenPlaneEncoder((board_size, board_size))]
+
+            while not fast_state.is_over():
+                moves = fast_state.legal_moves()
+                self.assertEqual(moves, bit_state.legal_moves())
+                np.testing.assert_array_equal(fast_state.board.point_flags, bit_state.board.point_flags)
+
+                for encoder in encoders:
+                    np.testing.assert_array_equal(encoder.encode(fast_state), encoder.encode(bit_state))
+
+                move = random.choice([m for m in moves if not m.is_resign])
+                fast_state = fast_state.apply_move(move)
+                bit_state = bit_state.apply_move(move)
+                self.assert_same_position(fast_state.board, bit_state.board)
+
+            self.assertEqual(fast_state.winner(), bit_state.winner())
+
+    def test_play_undo(self):
+        random.seed(3)
+        game = goboard_bitboard.GameState.new_game(9)
+
+        for _ in range(60):
+            game = game.apply_move(random.choice([m for m in game.legal_moves() if m.is_play]))
+
+        state = game.search_copy()
+        board = game.board
+
+        for _ in range(20):
+            state.play(random.choice([m for m in state.legal_moves() if m.is_play]))
+
+        for _ in range(20):
+            state.undo()
+
+        self.assert_same_position(board, state.board)
+        np.testing.assert_array_equal(board.point_flags, state.board.point_flags)
+        np.testing.assert_array_equal(board.ever_captured, state.board.ever_captured)
+
+    def assert_same_position(self, fast_board, bit_board):
+        self.assertEqual(fast_board.zobrist_hash(), bit_board.zobrist_hash())
+        np.testing.assert_array_equal(fast_board.move_ages.ages(), bit_board.move_ages.ages())
+        np.testing.assert_array_equal(fast_board.ever_captured, bit_board.ever_captured)
+
+        for row in range(1, fast_board.num_rows + 1):
+            for col in range(1, fast_board.num_cols + 1):
+                point = Point(row, col)
+                self.assertEqual(fast_board.get(point), bit_board.get(point))
+                self.assertEqual(fast_board.get_go_string(point), bit_board.get_go_string(point))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,56 +1,120 @@
 import copy
+import importlib
+import numpy as np
 from dlgo.gotypes import Player, Point
 from dlgo.scoring import compute_game_result
 from dlgo import zobrist
 from .utils import MoveAge
 
+grids = {}
+play_moves = {}
 neighbor_tables = {}
 corner_tables = {}
+empty_flag_tables = {}
 
+# bits of Board.point_flags, which boards keep up to date for every point as
+# stones are placed and captured: whether a player can play the point without
+# self-capture, whether playing it captures, and whether it is their eye
+BLACK_PLAYABLE, WHITE_PLAYABLE = 1, 2
+BLACK_CAPTURES, WHITE_CAPTURES = 4, 8
+BLACK_EYE, WHITE_EYE = 16, 32
 
-def init_neighbor_table(dim):
-    global neighbor_tables
+PLAYABLE = {Player.black: BLACK_PLAYABLE, Player.white: WHITE_PLAYABLE}
+CAPTURES = {Player.black: BLACK_CAPTURES, Player.white: WHITE_CAPTURES}
+EYE = {Player.black: BLACK_EYE, Player.white: WHITE_EYE}
+
+
+class Grid:
+    """Interned points and moves of one board size.
+
+    Points are numbered in row-major order, index = (row - 1) * num_cols +
+    col - 1, as in the encoders and Board.point_flags; Grid.index() gives the
+    index of a point. Hot loops look moves and neighbours up by index instead
+    of allocating them. A move doesn't depend on the board size, so every
+    play is created once and shared by all grids and Move.play().
+    """
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.points = tuple(Point(row, col)
+                            for row in range(1, num_rows + 1)
+                            for col in range(1, num_cols + 1))
+        self.moves = tuple(Move.play(point) for point in self.points)
+
+        def on_grid(row, col):
+            return 1 <= row <= num_rows and 1 <= col <= num_cols
+
+        def index(row, col):
+            return (row - 1) * num_cols + col - 1
+
+        self.neighbor_indices = tuple(
+            tuple(index(r, c) for r, c in ((pt.row - 1, pt.col), (pt.row + 1, pt.col),
+                                           (pt.row, pt.col - 1), (pt.row, pt.col + 1)) if on_grid(r, c))
+            for pt in self.points)
+        self.corner_indices = tuple(
+            tuple(index(r, c) for r, c in ((pt.row - 1, pt.col - 1), (pt.row - 1, pt.col + 1),
+                                           (pt.row + 1, pt.col - 1), (pt.row + 1, pt.col + 1)) if on_grid(r, c))
+            for pt in self.points)
+
+    def point(self, row, col):
+        return self.points[(row - 1) * self.num_cols + col - 1]
+
+    def index(self, point):
+        return (point.row - 1) * self.num_cols + point.col - 1
+
+
+def get_grid(num_rows, num_cols):
+    dim = (num_rows, num_cols)
+
+    if dim not in grids:
+        grids[dim] = Grid(num_rows, num_cols)
 
-    rows, cols = dim
-    new_table = {}
+    return grids[dim]
 
-    for row in range(1, rows + 1):
-        for col in range(1, cols + 1):
-            pt = Point(row=row, col=col)
 
-            full_neighbors = pt.neighbors()
+def init_neighbor_table(dim):
+    global neighbor_tables
 
-            new_table[pt] = [n for n in full_neighbors if 1 <= n.row <= rows and 1 <= n.col <= cols]
+    grid = get_grid(*dim)
+    points = grid.points
 
-    neighbor_tables[dim] = new_table
+    neighbor_tables[dim] = {
+        pt: tuple(points[i] for i in indices) for pt, indices in zip(points, grid.neighbor_indices)
+    }
 
 
 def init_corner_table(dim):
     global corner_tables
 
-    rows, cols = dim
-    new_table = {}
+    grid = get_grid(*dim)
+    points = grid.points
 
-    for row in range(1, rows + 1):
-        for col in range(1, cols + 1):
-            pt = Point(row=row, col=col)
+    corner_tables[dim] = {
+        pt: tuple(points[i] for i in indices) for pt, indices in zip(points, grid.corner_indices)
+    }
 
-            full_corners = [
-                Point(row=pt.row - 1, col=pt.col - 1),
-                Point(row=pt.row - 1, col=pt.col + 1),
-                Point(row=pt.row + 1, col=pt.col - 1),
-                Point(row=pt.row + 1, col=pt.col + 1)
-            ]
 
-            new_table[pt] = [n for n in full_corners if 1 <= n.row <= rows and 1 <= n.col <= cols]
+def is_eye_shape(friendly_corners, off_board_corners):
+    # for an empty point surrounded by friendly stones, as in
+    # agent.helpers.is_point_an_eye: we must control 3 out of 4 corners in the
+    # middle of the board, and all corners on the edge
+    if off_board_corners > 0:
+        return off_board_corners + friendly_corners == 4
 
-    corner_tables = new_table
+    return friendly_corners >= 3
 
 
 class IllegalMoveError(Exception):
     pass
 
 
+# Look up a board implementation by name, e.g. 'fast' (this module) or 'array'
+# (dlgo.goboard_array). All of them support the Board interface used by GameState.
+def get_board_by_name(name):
+    module = importlib.import_module('dlgo.goboard_' + name)
+    return getattr(module, 'Board')
+
+
 class GoString:
     def __init__(self, color, stones, liberties):
         self.color = color
@@ -91,7 +155,12 @@ class Board:
     def __init__(self, num_rows, num_cols):
         self.num_rows = num_rows
         self.num_cols = num_cols
-        self._grid = {}
+        # strings by point, one dict per row. Copies of a board share the row
+        # dicts, and a board copies a row the first time it changes it, so a
+        # copy only costs the rows its moves touch.
+        self._rows = [{} for _ in range(num_rows)]
+        # bit row is set for every row, 1 to num_rows, this board owns
+        self._owned_rows = ((1 << num_rows) - 1) << 1
         self._hash = zobrist.EMPTY_BOARD
 
         global neighbor_tables
@@ -105,8 +174,26 @@ class Board:
 
         self.neighbor_table = neighbor_tables[dim]
         self.corner_table = corner_tables[dim]
+        self.hash_codes = zobrist.get_hash_codes(num_rows, num_cols)
         self.move_ages = MoveAge(self)
 
+        # point flags are brought up to date when they are asked for, so only
+        # the points that changed since then are kept here
+        self._stale_flags = set()
+
+        # the flag and ever_captured arrays are replaced rather than changed
+        # in place, so copies of a board share them until one changes
+        if dim not in empty_flag_tables:
+            self._point_flags = np.zeros(dim, dtype=np.uint8)
+            self._update_flags(self.neighbor_table)
+            empty_flag_tables[dim] = self._point_flags
+
+        self._point_flags = empty_flag_tables[dim]
+
+        # points where a black (plane 0) or white (plane 1) stone has been
+        # captured; a move can only repeat a position by refilling one of them
+        self.ever_captured = np.zeros((2, num_rows, num_cols), dtype=bool)
+
     def neighbors(self, point):
         return self.neighbor_table[point]
 
@@ -116,20 +203,19 @@ class Board:
     def place_stone(self, player, point):
         assert self.is_on_grid(point)
 
-        if self._grid.get(point) is not None:
+        if self._rows[point.row - 1].get(point) is not None:
             print("Illegal play on %s by %s" % (str(point), str(player)))
-        assert self._grid.get(point) is None
+        assert self._rows[point.row - 1].get(point) is None
 
         # examine adjacent points
         adjacent_same_color = []
         adjacent_opposite_color = []
         liberties = []
 
-        self.move_ages.increment_all()
         self.move_ages.add(point)
 
         for neighbor in self.neighbor_table[point]:
-            neighbor_string = self._grid.get(neighbor)
+            neighbor_string = self._rows[neighbor.row - 1].get(neighbor)
 
             if neighbor_string is None:
                 liberties.append(neighbor)
@@ -145,11 +231,21 @@ class Board:
         for same_color_string in adjacent_same_color:
             new_string = new_string.merged_with(same_color_string)
 
-        for new_string_point in new_string.stones:
-            self._grid[new_string_point] = new_string
+        self._replace_string(new_string)
 
-        self._hash ^= zobrist.HASH_CODE[point, None]
-        self._hash ^= zobrist.HASH_CODE[point, player]
+        codes = self.hash_codes[(point.row - 1) * self.num_cols + point.col - 1]
+        self._hash ^= codes[zobrist.EMPTY] ^ codes[player.value]
+
+        # points whose flags may have changed: the surroundings of every stone
+        # put on or taken off the board, and the liberties of every string
+        # that went into or out of atari
+        changed = self._stale_flags
+        changed.add(point)
+        changed.update(self.neighbor_table[point])
+        changed.update(self.corner_table[point])
+
+        if new_string.num_liberties == 1 or any(string.num_liberties == 1 for string in adjacent_same_color):
+            changed.update(new_string.liberties)
 
         # reduce liberties of adjacent strings of opposite color
         # (if opposite color strings now have zero liberties, remove them)
@@ -158,37 +254,122 @@ class Board:
 
             if replacement.num_liberties:
                 self._replace_string(other_color_string.without_liberty(point))
+
+                if replacement.num_liberties == 1:
+                    changed.update(replacement.liberties)
             else:
-                self._remove_string(other_color_string)
+                changed.update(self._remove_string(other_color_string))
+
+    def _row_for_write(self, row):
+        # the dict of a row, copied first if other boards share it
+        if not self._owned_rows & 1 << row:
+            self._rows[row - 1] = self._rows[row - 1].copy()
+            self._owned_rows |= 1 << row
+
+        return self._rows[row - 1]
 
     def _replace_string(self, new_string):
+        rows = self._rows
+
         for point in new_string.stones:
-            self._grid[point] = new_string
+            if not self._owned_rows & 1 << point.row:
+                self._row_for_write(point.row)
+
+            rows[point.row - 1][point] = new_string
 
     def _remove_string(self, string):
+        # returns the points whose flags the capture may have changed
+        changed = set()
+        out_of_atari = []
+        self.ever_captured = self.ever_captured.copy()
+
         for point in string.stones:
             self.move_ages.reset_age(point)
 
             # might have created liberties for other strings
             for neighbor in self.neighbor_table[point]:
-                neighbor_string = self._grid.get(neighbor)
+                neighbor_string = self._rows[neighbor.row - 1].get(neighbor)
 
                 if neighbor_string is None:
                     continue
 
                 if neighbor_string is not string:
+                    if neighbor_string.num_liberties == 1:
+                        out_of_atari.append(neighbor)
+
                     self._replace_string(neighbor_string.with_liberty(point))
 
             # remove this point (stone) from board
-            self._grid[point] = None
-            self._hash ^= zobrist.HASH_CODE[point, string.color]
-            self._hash ^= zobrist.HASH_CODE[point, None]
+            del self._row_for_write(point.row)[point]
+            self.ever_captured[string.color.value - 1, point.row - 1, point.col - 1] = True
+            codes = self.hash_codes[(point.row - 1) * self.num_cols + point.col - 1]
+            self._hash ^= codes[string.color.value] ^ codes[zobrist.EMPTY]
+
+            changed.add(point)
+            changed.update(self.neighbor_table[point])
+            changed.update(self.corner_table[point])
+
+        for stone in out_of_atari:
+            changed.update(self._rows[stone.row - 1][stone].liberties)
+
+        return changed
+
+    @property
+    def point_flags(self):
+        # (num_rows, num_cols) array of PLAYABLE, CAPTURES and EYE bits
+        if self._stale_flags:
+            self._update_flags(self._stale_flags)
+            self._stale_flags = set()
+
+        return self._point_flags
+
+    def _update_flags(self, points):
+        self._point_flags = self._point_flags.copy()
+
+        for point in points:
+            self._point_flags[point.row - 1, point.col - 1] = self._flags_at(point)
+
+    def _flags_at(self, point):
+        if self._rows[point.row - 1].get(point) is not None:
+            return 0
+
+        flags = 0
+        neighbors = self.neighbor_table[point]
+        black_neighbors = white_neighbors = 0
+
+        for neighbor in neighbors:
+            neighbor_string = self._rows[neighbor.row - 1].get(neighbor)
+
+            if neighbor_string is None:
+                flags |= BLACK_PLAYABLE | WHITE_PLAYABLE
+            elif neighbor_string.color is Player.black:
+                black_neighbors += 1
+                flags |= BLACK_PLAYABLE if neighbor_string.num_liberties > 1 else WHITE_PLAYABLE | WHITE_CAPTURES
+            else:
+                white_neighbors += 1
+                flags |= WHITE_PLAYABLE if neighbor_string.num_liberties > 1 else BLACK_PLAYABLE | BLACK_CAPTURES
+
+        corners = self.corner_table[point]
+
+        if black_neighbors == len(neighbors):
+            friendly_corners = sum(1 for corner in corners if self.get(corner) is Player.black)
+
+            if is_eye_shape(friendly_corners, 4 - len(corners)):
+                flags |= BLACK_EYE
+
+        if white_neighbors == len(neighbors):
+            friendly_corners = sum(1 for corner in corners if self.get(corner) is Player.white)
+
+            if is_eye_shape(friendly_corners, 4 - len(corners)):
+                flags |= WHITE_EYE
+
+        return flags
 
     def is_self_capture(self, player, point):
         friendly_strings = []
 
         for neighbor in self.neighbor_table[point]:
-            neighbor_string = self._grid.get(neighbor)  # type: GoString
+            neighbor_string = self._rows[neighbor.row - 1].get(neighbor)  # type: GoString
 
             if neighbor_string is None:
                 return False  # not a capture since this point has a liberty
@@ -202,7 +383,7 @@ class Board:
 
     def will_capture(self, player, point):
         for neighbor in self.neighbor_table[point]:
-            neighbor_string = self._grid.get(neighbor)
+            neighbor_string = self._rows[neighbor.row - 1].get(neighbor)
 
             if neighbor_string is None or neighbor_string.color == player:
                 continue
@@ -211,19 +392,99 @@ class Board:
 
         return False
 
+    def hash_after_move(self, player, point):
+        # zobrist hash of the position after player plays point; only strings
+        # the move captures need to be walked
+        codes = self.hash_codes[(point.row - 1) * self.num_cols + point.col - 1]
+        new_hash = self._hash ^ codes[zobrist.EMPTY] ^ codes[player.value]
+        captured = []
+
+        for neighbor in self.neighbor_table[point]:
+            neighbor_string = self._rows[neighbor.row - 1].get(neighbor)
+
+            if neighbor_string is None or neighbor_string.color == player or neighbor_string.num_liberties > 1:
+                continue
+
+            if not any(neighbor_string is string for string in captured):
+                captured.append(neighbor_string)
+
+                for stone in neighbor_string.stones:
+                    codes = self.hash_codes[(stone.row - 1) * self.num_cols + stone.col - 1]
+                    new_hash ^= codes[neighbor_string.color.value] ^ codes[zobrist.EMPTY]
+
+        return new_hash
+
+    def record_move(self, player, point):
+        # collect the strings place_stone(player, point) is about to rewrite
+        # (neighbours, captured strings and the strings around the captured
+        # stones), which together with the hash is all undo_move needs
+        touched = []
+
+        for neighbor in self.neighbor_table[point]:
+            neighbor_string = self._rows[neighbor.row - 1].get(neighbor)
+
+            if neighbor_string is None or any(neighbor_string is string for string in touched):
+                continue
+
+            touched.append(neighbor_string)
+
+            if neighbor_string.color != player and neighbor_string.num_liberties == 1:
+                for stone in neighbor_string.stones:
+                    for stone_neighbor in self.neighbor_table[stone]:
+                        other_string = self._rows[stone_neighbor.row - 1].get(stone_neighbor)
+
+                        if other_string is not None and not any(other_string is string for string in touched):
+                            touched.append(other_string)
+
+        return point, touched, self._hash, self.move_ages.snapshot(), \
+            self._point_flags, set(self._stale_flags), self.ever_captured
+
+    def undo_move(self, delta):
+        point, touched, previous_hash, move_ages, point_flags, stale_flags, ever_captured = delta
+
+        del self._row_for_write(point.row)[point]
+
+        for string in touched:
+            self._replace_string(string)
+
+        self._hash = previous_hash
+        self.move_ages.restore(move_ages)
+        self._point_flags = point_flags
+        self._stale_flags = stale_flags
+        self.ever_captured = ever_captured
+
     def is_on_grid(self, point):
         return 1 <= point.row <= self.num_rows and 1 <= point.col <= self.num_cols
 
     def get(self, point):
         # returns content of a point on the board
         # could be None or a Player
-        string = self._grid.get(point)
+        string = self.get_go_string(point)
 
         return string.color if string is not None else None
 
     def get_go_string(self, point):
-        # returns entire string of stones at a point (if any)
-        return self._grid.get(point) or None
+        # returns entire string of stones at a point (if any). Off-board
+        # points, and the moves the ladder features look up, have none.
+        if not isinstance(point, Point) or not 1 <= point.row <= self.num_rows:
+            return None
+
+        return self._rows[point.row - 1].get(point) or None
+
+    def colors(self):
+        # (num_rows, num_cols) int8 array of Player values, 0 where empty
+        colors = np.zeros((self.num_rows, self.num_cols), dtype=np.int8)
+        indices = []
+        values = []
+
+        for strings in self._rows:
+            for point, string in strings.items():
+                indices.append((point.row - 1) * self.num_cols + point.col - 1)
+                values.append(1 if string.color is Player.black else 2)
+
+        colors.flat[indices] = values
+
+        return colors
 
     def __eq__(self, other):
         return isinstance(other, Board) \
@@ -232,9 +493,20 @@ class Board:
                and self.zobrist_hash() == other.zobrist_hash()
 
     def __deepcopy__(self, memodict=None):
-        copied = Board(self.num_rows, self.num_cols)
-        copied._grid = copy.copy(self._grid)
+        copied = Board.__new__(Board)
+        copied.num_rows = self.num_rows
+        copied.num_cols = self.num_cols
+        copied._rows = list(self._rows)
+        # both boards share every row from now on
+        copied._owned_rows = self._owned_rows = 0
         copied._hash = self._hash
+        copied.neighbor_table = self.neighbor_table
+        copied.corner_table = self.corner_table
+        copied.hash_codes = self.hash_codes
+        copied.move_ages = copy.deepcopy(self.move_ages)
+        copied._point_flags = self._point_flags
+        copied._stale_flags = set(self._stale_flags)
+        copied.ever_captured = self.ever_captured
 
         return copied
 
@@ -243,6 +515,8 @@ class Board:
 
 
 class Move:
+    __slots__ = ('point', 'is_play', 'is_pass', 'is_resign')
+
     def __init__(self, point=None, is_pass=False, is_resign=False):
         assert (point is not None) ^ is_pass ^ is_resign
         self.point = point
@@ -252,15 +526,24 @@ class Move:
 
     @classmethod
     def play(cls, point):
-        return Move(point=point)
+        # moves never change once made, so each play is created only once
+        move = play_moves.get(point)
+
+        if move is None:
+            move = play_moves[point] = Move(point=point)
+
+        return move
 
     @classmethod
     def pass_turn(cls):
-        return Move(is_pass=True)
+        return PASS
 
     @classmethod
     def resign(cls):
-        return Move(is_resign=True)
+        return RESIGN
+
+    def __deepcopy__(self, memodict=None):
+        return self
 
     def __hash__(self):
         return hash((self.is_play, self.is_pass, self.is_resign, self.point))
@@ -277,22 +560,134 @@ class Move:
         return "(r %d, c %d)" % (self.point.row, self.point.col)
 
 
+PASS = Move(is_pass=True)
+RESIGN = Move(is_resign=True)
+
+
+class SituationHistory:
+    """Positional superko lookup shared by all states descended from one game.
+
+    Maps the hash of every situation (zobrist.situation_hash of the next
+    player and the board hash) to the move numbers at which it occurred. A
+    state checks a situation by looking up those move numbers and walking its
+    own previous_state chain back to them, so unseen situations cost a dict
+    lookup and real repetitions a few steps, while each state only adds one
+    entry instead of copying the whole history.
+
+    A search copy gets its own layer on top of the game's history, so that
+    moves made with play() never outlive the search.
+
+    A detached state has no previous_state chain to walk back beyond its
+    parent; the situations before known_depth are those of its ancestors and
+    need no check.
+    """
+    def __init__(self, parent=None, known_depth=0):
+        self.parent = parent
+        self._depths = {}
+        self.known_depth = known_depth
+
+    def add(self, situation_hash, depth):
+        self._depths.setdefault(situation_hash, []).append(depth)
+
+    def remove(self, situation_hash, depth):
+        depths = self._depths[situation_hash]
+        depths.remove(depth)
+
+        if not depths:
+            del self._depths[situation_hash]
+
+    def contains(self, game_state, situation_hash):
+        # whether the situation occurred at game_state or one of its ancestors
+        history = self
+
+        while history is not None:
+            for depth in history._depths.get(situation_hash, ()):
+                if depth < history.known_depth:
+                    return True
+                if depth <= game_state.depth and game_state.ancestor(depth)._situation_hash == situation_hash:
+                    return True
+
+            history = history.parent
+
+        return False
+
+
 class GameState:
     def __init__(self, board, next_player, previous, move):
         self.board = board
         self.next_player = next_player
         self.previous_state = previous
-        if self.previous_state is None:
-            self.previous_states = frozenset()
-        else:
-            self.previous_states = frozenset(
-                previous.previous_states |
-                {(previous.next_player, previous.board.zobrist_hash())})
         if type(move) == tuple:
             self.last_move = Move(move)
         else:
             self.last_move = move
 
+        if previous is None:
+            self.depth = 0
+            self._history = SituationHistory()
+        else:
+            self.depth = previous.depth + 1
+            self._history = previous._history
+
+        self._situation_hash = zobrist.situation_hash(board.zobrist_hash(), next_player)
+        self._history.add(self._situation_hash, self.depth)
+        self._undo = None
+
+    @property
+    def previous_states(self):
+        # every (player, hash) situation before this one; built by walking the
+        # game, use is_situation_repeated for lookups
+        situations = set()
+        state = self.previous_state
+
+        while state is not None:
+            # xor-ing the side to move back out leaves the board hash
+            situations.add((state.next_player, zobrist.situation_hash(state._situation_hash, state.next_player)))
+            state = state.previous_state
+
+        return frozenset(situations)
+
+    def ancestor(self, depth):
+        state = self
+
+        while state.depth > depth:
+            state = state.previous_state
+
+        return state
+
+    def is_situation_repeated(self, situation):
+        # whether situation, a (next player, board hash) pair, occurred at
+        # this state or any earlier one
+        player, board_hash = situation
+        return self._history.contains(self, zobrist.situation_hash(board_hash, player))
+
+    def legal_mask(self, exclude_eyes=False):
+        # boolean (num_rows, num_cols) array of the points next_player can
+        # play, optionally leaving out the ones that fill their own eyes
+        board = self.board
+        dim = (board.num_rows, board.num_cols)
+
+        if self.is_over():
+            return np.zeros(dim, dtype=bool)
+
+        player = self.next_player
+
+        if exclude_eyes:
+            mask = (board.point_flags & (PLAYABLE[player] | EYE[player])) == PLAYABLE[player]
+        else:
+            mask = (board.point_flags & PLAYABLE[player]) != 0
+
+        # positional superko: to repeat a position, a move has to put back a
+        # stone that was captured, so only the points where one of the
+        # player's stones was captured need the hash they lead to looked up
+        for point in np.flatnonzero(mask & board.ever_captured[player.value - 1]).tolist():
+            row, col = divmod(point, board.num_cols)
+
+            if self.does_move_violate_ko(player, Move.play(Point(row + 1, col + 1))):
+                mask.flat[point] = False
+
+        return mask
+
     def apply_move(self, move):
         if move.is_play:
             next_board = copy.deepcopy(self.board)
@@ -300,15 +695,113 @@ class GameState:
         else:
             next_board = self.board
 
-        return GameState(next_board, self.next_player.other, self, move)
+        return type(self)(next_board, self.next_player.other, self, move)
+
+    def search_copy(self):
+        # a state with its own board that search code can walk with play() and
+        # undo(); the game history is shared with this state
+        state = copy.copy(self)
+        state.board = copy.deepcopy(self.board)
+        state._history = SituationHistory(self._history)
+        state._undo = None
+
+        return state
+
+    def search_root(self):
+        # this state, for search code to grow a tree from with apply_move().
+        # The tree's states go in a history layer of their own on top of the
+        # game's, so they are dropped along with the tree.
+        state = copy.copy(self)
+        state._history = SituationHistory(self._history)
+        state._undo = None
+
+        return state
+
+    @staticmethod
+    def rebase_history(states):
+        # move states, the part of a search tree kept for another search,
+        # to a new layer on top of the game's history, so the positions of
+        # the rest of the tree are dropped with it
+        states = list(states)
+        history = SituationHistory(states[0]._history.parent)
+
+        for state in states:
+            state._history = history
+            history.add(state._situation_hash, state.depth)
+
+    def detached(self):
+        # this state cut loose from its game, e.g. to send to another
+        # process: pickling the previous_state chain of a long game exceeds
+        # the recursion limit. The previous state is kept for is_over(), and
+        # the situations before it only as superko hashes.
+        previous = self.previous_state
+        known_depth = previous.depth if previous is not None else self.depth
+        history = SituationHistory(known_depth=known_depth)
+
+        ancestor = previous.previous_state if previous is not None else None
+        while ancestor is not None:
+            history.add(ancestor._situation_hash, ancestor.depth)
+            ancestor = ancestor.previous_state
+
+        if previous is not None:
+            previous = copy.copy(previous)
+            previous.previous_state = None
+            previous._history = history
+            previous._undo = None
+            history.add(previous._situation_hash, previous.depth)
+
+        state = copy.copy(self)
+        state.previous_state = previous
+        state._history = history
+        state._undo = None
+        history.add(state._situation_hash, state.depth)
+
+        return state
+
+    def play(self, move):
+        # apply a move to this state in place, without copying the board.
+        # The state left behind as previous_state shares the changed board,
+        # so only its move and history should be relied on.
+        previous = copy.copy(self)
+        delta = None
+
+        if move.is_play:
+            delta = self.board.record_move(self.next_player, move.point)
+            self.board.place_stone(self.next_player, move.point)
+
+        self.previous_state = previous
+        self.next_player = self.next_player.other
+        self.last_move = move
+        self.depth += 1
+        self._situation_hash = zobrist.situation_hash(self.board.zobrist_hash(), self.next_player)
+        self._history.add(self._situation_hash, self.depth)
+        self._undo = previous, delta
+
+    def undo(self):
+        # take back the last move made with play()
+        if self._undo is None:
+            raise ValueError('No move to undo')
+
+        previous, delta = self._undo
+
+        if delta is not None:
+            self.board.undo_move(delta)
+
+        self._history.remove(self._situation_hash, self.depth)
+        self.next_player = previous.next_player
+        self.previous_state = previous.previous_state
+        self.last_move = previous.last_move
+        self.depth = previous.depth
+        self._situation_hash = previous._situation_hash
+        self._undo = previous._undo
 
     @classmethod
-    def new_game(cls, board_size):
+    def new_game(cls, board_size, board_type='fast'):
         if isinstance(board_size, int):
             board_size = (board_size, board_size)
 
-        board = Board(*board_size)
-        return GameState(board, Player.black, None, None)
+        board = get_board_by_name(board_type)(*board_size)
+        return cls(board, Player.black, None, None)
 
     def is_over(self):
         if self.last_move is None or self.previous_state is None:
@@ -328,11 +821,7 @@ class GameState:
         if not move.is_play:
             return False
 
-        next_board = copy.deepcopy(self.board)
-        next_board.place_stone(player, move.point)
-        new_string = next_board.get_go_string(move.point)
-
-        return new_string.num_liberties == 0
+        return self.board.is_self_capture(player, move.point)
 
     @property
     def situation(self):
@@ -342,11 +831,9 @@ class GameState:
         if not move.is_play:
             return False
 
-        next_board = copy.deepcopy(self.board)
-        next_board.place_stone(player, move.point)
-        next_situation = (player.other, next_board.zobrist_hash())
+        next_situation = (player.other, self.board.hash_after_move(player, move.point))
 
-        return next_situation in self.previous_states
+        return self.is_situation_repeated(next_situation)
 
     def is_valid_move(self, move):
         if self.is_over():
@@ -354,8 +841,10 @@ class GameState:
         if move.is_pass or move.is_resign:
             return True
 
+        # decided from the neighbouring strings' liberties and the hash the
+        # move would produce, without playing it on a copy of the board
         return self.board.get(move.point) is None and \
-            not self.is_move_self_capture(self.next_player, move) and \
+            not self.board.is_self_capture(self.next_player, move.point) and \
             not self.does_move_violate_ko(self.next_player, move)
 
     def winner(self):
@@ -370,17 +859,11 @@ class GameState:
         if self.is_over():
             return []
 
-        moves = []
-
-        for row in range(1, self.board.num_rows + 1):
-            for col in range(1, self.board.num_cols + 1):
-                move = Move.play(Point(row, col))
-
-                if self.is_valid_move(move):
-                    moves.append(move)
+        grid_moves = get_grid(self.board.num_rows, self.board.num_cols).moves
+        moves = [grid_moves[i] for i in np.flatnonzero(self.legal_mask()).tolist()]
 
         # always legal
-        moves.append(Move.pass_turn())
-        moves.append(Move.resign())
+        moves.append(PASS)
+        moves.append(RESIGN)
 
         return moves
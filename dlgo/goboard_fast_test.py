@@ -0,0 +1,247 @@
+import copy
+import pickle
+import random
+import unittest
+
+import numpy as np
+
+from dlgo.agent.helpers import is_point_an_eye
+from dlgo.goboard_fast import GameState, Move, get_grid
+from dlgo.gotypes import Player, Point
+
+
+def snapshot(game_state):
+    board = game_state.board
+    stones = {}
+
+    for row in range(1, board.num_rows + 1):
+        for col in range(1, board.num_cols + 1):
+            go_string = board.get_go_string(Point(row, col))
+
+            if go_string is not None:
+                stones[row, col] = (go_string.color, go_string.stones, go_string.liberties)
+
+    return (stones, board.zobrist_hash(), game_state.next_player, game_state.last_move,
+            game_state.previous_states, board.move_ages.ages().tolist(), board.point_flags.tolist())
+
+
+class PlayUndoTest(unittest.TestCase):
+    def test_undo_capture(self):
+        for board_type in ('fast', 'array'):
+            game = GameState.new_game(5, board_type)
+
+            for row, col in [(1, 2), (1, 1), (2, 2), (5, 5)]:
+                game = game.apply_move(Move.play(Point(row, col)))
+
+            search_state = game.search_copy()
+            before = snapshot(search_state)
+            search_state.play(Move.play(Point(2, 1)))
+            self.assertEqual(Player.black, search_state.board.get(Point(2, 1)))
+            self.assertIsNone(search_state.board.get(Point(1, 1)))
+            search_state.undo()
+
+            self.assertEqual(before, snapshot(search_state))
+            self.assertEqual(Player.white, game.board.get(Point(1, 1)))
+
+    def test_random_walk(self):
+        random.seed(2)
+
+        for board_type in ('fast', 'array'):
+            game = GameState.new_game(7, board_type)
+            search_state = game.search_copy()
+            history = []
+
+            for _ in range(400):
+                if history and (random.random() < 0.3 or search_state.is_over()):
+                    search_state.undo()
+                    self.assertEqual(history.pop(), snapshot(search_state))
+                    continue
+
+                moves = [move for move in search_state.legal_moves() if not move.is_resign]
+                history.append(snapshot(search_state))
+                search_state.play(random.choice(moves))
+
+            while history:
+                search_state.undo()
+                self.assertEqual(history.pop(), snapshot(search_state))
+
+            self.assertEqual(snapshot(game), snapshot(search_state))
+            self.assertRaises(ValueError, search_state.undo)
+
+    def test_play_matches_apply_move(self):
+        random.seed(3)
+        game = GameState.new_game(9)
+        search_state = game.search_copy()
+
+        while not game.is_over():
+            move = random.choice([move for move in game.legal_moves() if not move.is_resign])
+            game = game.apply_move(move)
+            search_state.play(move)
+            self.assertEqual(game.board.zobrist_hash(), search_state.board.zobrist_hash())
+            self.assertEqual(game.previous_states, search_state.previous_states)
+
+        self.assertTrue(search_state.is_over())
+        self.assertEqual(game.winner(), search_state.winner())
+
+
+class MoveAgeTest(unittest.TestCase):
+    def test_move_ages(self):
+        for board_type in ('fast', 'array'):
+            game = GameState.new_game(5, board_type)
+
+            for row, col in [(1, 2), (1, 1), (2, 2), (5, 5), (2, 1)]:
+                game = game.apply_move(Move.play(Point(row, col)))
+
+            ages = game.board.move_ages
+            self.assertEqual(0, ages.get(1, 0))
+            self.assertEqual(4, ages.get(0, 1))
+            self.assertEqual(-1, ages.get(0, 0))  # captured
+            self.assertEqual(ages.ages().tolist(), copy.deepcopy(game.board).move_ages.ages().tolist())
+
+
+class SituationHistoryTest(unittest.TestCase):
+    def random_game(self, game, num_moves):
+        states = [game]
+
+        for _ in range(num_moves):
+            if game.is_over():
+                break
+            game = game.apply_move(random.choice([move for move in game.legal_moves() if move.is_play]
+                                                 or [Move.pass_turn()]))
+            states.append(game)
+
+        return states
+
+    def test_matches_previous_states(self):
+        random.seed(4)
+        main_line = self.random_game(GameState.new_game(5), 120)
+        branch = self.random_game(main_line[30], 60)
+        situations = {(state.next_player, state.board.zobrist_hash()) for state in main_line + branch}
+
+        for state in main_line + branch:
+            seen = state.previous_states | {(state.next_player, state.board.zobrist_hash())}
+
+            for situation in situations:
+                self.assertEqual(situation in seen, state.is_situation_repeated(situation))
+
+    def test_detached_state_keeps_superko(self):
+        random.seed(6)
+        main_line = self.random_game(GameState.new_game(5), 150)
+        situations = {(state.next_player, state.board.zobrist_hash()) for state in main_line}
+        game = main_line[-1]
+        detached = pickle.loads(pickle.dumps(game.detached()))
+
+        self.assertEqual((game.depth, game.last_move, game.is_over()),
+                         (detached.depth, detached.last_move, detached.is_over()))
+        for situation in situations:
+            self.assertEqual(game.is_situation_repeated(situation), detached.is_situation_repeated(situation))
+
+        for state in self.random_game(detached, 40)[1:]:
+            game = game.apply_move(state.last_move)
+            np.testing.assert_array_equal(game.legal_mask(), state.legal_mask())
+
+
+class LegalMaskTest(unittest.TestCase):
+    def test_matches_is_valid_move(self):
+        random.seed(5)
+
+        for board_type in ('fast', 'array'):
+            for _ in range(3):
+                game = GameState.new_game(5, board_type)
+
+                while not game.is_over() and game.depth < 200:
+                    legal_points = np.zeros((5, 5), dtype=bool)
+                    non_eye_points = np.zeros((5, 5), dtype=bool)
+
+                    for row in range(5):
+                        for col in range(5):
+                            point = Point(row + 1, col + 1)
+                            legal_points[row, col] = game.is_valid_move(Move.play(point))
+                            non_eye_points[row, col] = legal_points[row, col] and \
+                                not is_point_an_eye(game.board, point, game.next_player)
+
+                    np.testing.assert_array_equal(legal_points, game.legal_mask())
+                    np.testing.assert_array_equal(non_eye_points, game.legal_mask(exclude_eyes=True))
+
+                    game = game.apply_move(random.choice([move for move in game.legal_moves() if not move.is_resign]))
+
+                if game.is_over():
+                    self.assertFalse(game.legal_mask().any())
+
+
+class CopyOnWriteTest(unittest.TestCase):
+    def test_children_share_rows(self):
+        game = GameState.new_game(9)
+
+        for point in [Point(1, 2), Point(1, 1), Point(5, 5), Point(9, 9)]:
+            game = game.apply_move(Move.play(point))
+
+        before = copy.deepcopy(game.board)
+        child = game.apply_move(Move.play(Point(2, 1)))  # captures (1, 1)
+        other_child = game.apply_move(Move.play(Point(2, 2)))
+
+        self.assertIsNone(child.board.get(Point(1, 1)))
+        self.assertEqual(Player.white, other_child.board.get(Point(1, 1)))
+        self.assertTrue(child.board.ever_captured[1, 0, 0])
+        self.assertFalse(game.board.ever_captured.any())
+
+        for row in range(1, 10):
+            for col in range(1, 10):
+                point = Point(row, col)
+                self.assertEqual(before.get_go_string(point), game.board.get_go_string(point))
+
+        shared = [child.board._rows[row] is game.board._rows[row] for row in range(9)]
+        self.assertEqual([False, False] + [True] * 7, shared)
+
+    def test_new_board_owns_every_row(self):
+        board = GameState.new_game(9).board
+        rows = list(board._rows)
+
+        for row in range(1, 10):
+            board.place_stone(Player.black, Point(row, row))
+
+        self.assertTrue(all(new is old for new, old in zip(board._rows, rows)))
+
+
+class GridTest(unittest.TestCase):
+    def test_interned(self):
+        grid = get_grid(5, 7)
+        point = grid.point(3, 4)
+        index = grid.index(point)
+
+        self.assertEqual(Point(3, 4), point)
+        self.assertEqual(2 * 7 + 3, index)
+        self.assertIs(grid.points[index], point)
+        self.assertIs(grid.moves[index], Move.play(Point(3, 4)))
+        self.assertIs(Move.pass_turn(), Move.pass_turn())
+        self.assertEqual([grid.point(2, 4), grid.point(4, 4), grid.point(3, 3), grid.point(3, 5)],
+                         [grid.points[i] for i in grid.neighbor_indices[index]])
+        self.assertEqual((grid.point(2, 2),), tuple(grid.points[i] for i in grid.corner_indices[0]))
+        self.assertEqual(Move.play(point), pickle.loads(pickle.dumps(Move.play(point))))
+
+    def test_grids_of_different_sizes(self):
+        small, large = get_grid(9, 9), get_grid(19, 19)
+        get_grid(5, 5)
+        point = Point(3, 4)
+
+        self.assertEqual(21, small.index(point))
+        self.assertEqual(41, large.index(point))
+        self.assertEqual(point, small.moves[21].point)
+        self.assertEqual(point, large.moves[41].point)
+        self.assertIs(small.moves[21], large.moves[41])
+        self.assertIs(small.moves[21], Move.play(point))
+        self.assertIs(small.moves[21], get_grid(9, 9).moves[21])
+        self.assertEqual(Point(3, 5), large.points[large.neighbor_indices[41][3]])
+        self.assertIs(point.neighbors()[0], Point(3, 4).neighbors()[0])
+
+    def test_legal_moves(self):
+        game = GameState.new_game((5, 7)).apply_move(Move.play(Point(1, 1)))
+        grid = get_grid(5, 7)
+
+        for move in game.legal_moves():
+            if move.is_play:
+                self.assertIs(grid.moves[grid.index(move.point)], move)
+
+
+if __name__ == '__main__':
+    unittest.main()
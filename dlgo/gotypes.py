@@ -4,6 +4,8 @@ from collections import namedtuple
 
 __all__ = ['Player', 'Point']
 
+_neighbors = {}
+
 
 class Player(enum.Enum):
     black = 1
@@ -22,13 +24,22 @@ class Player(enum.Enum):
 #    col: int
 
 class Point(namedtuple('Point', 'row col')):
+    __slots__ = ()
+
     def neighbors(self):
-        return [
-            Point(self.row - 1, self.col),
-            Point(self.row + 1, self.col),
-            Point(self.row, self.col - 1),
-            Point(self.row, self.col + 1)
-        ]
+        # the neighbouring points are made once per point; callers get a
+        # list of their own, as some of them append to it
+        neighbors = _neighbors.get(self)
+
+        if neighbors is None:
+            neighbors = _neighbors[self] = (
+                Point(self.row - 1, self.col),
+                Point(self.row + 1, self.col),
+                Point(self.row, self.col - 1),
+                Point(self.row, self.col + 1)
+            )
+
+        return list(neighbors)
 
     def __deepcopy__(self, memodict=None):
         return self
@@ -1,8 +1,12 @@
 from __future__ import absolute_import
 import sys
+import time
 from dlgo.gtp import command, response
 from dlgo.gtp.board import coords_to_gtp_position, gtp_position_to_coords
+from dlgo.gtp.ponder import Ponderer
 from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Player
+from dlgo.time_control import TimeManager
 from ..utils import print_board
 
 __all__ = ['GTPFrontend']
@@ -20,9 +24,15 @@ HANDICAP_STONES = {
 
 
 class GTPFrontend:
-    def __init__(self, termination_agent, termination=None):
+    def __init__(self, termination_agent, termination=None, time_manager=None, ponder=False):
         self.agent = termination_agent
         self.game_state = GameState.new_game(19)
+        # the clocks from time_settings and time_left, which tell the agent
+        # how long to think about each move
+        self.time_manager = time_manager if time_manager is not None else TimeManager()
+        self.agent.set_time_manager(self.time_manager)
+        # keeps the agent thinking from genmove until the next command
+        self.ponderer = Ponderer(self.agent) if ponder else None
         self._input = sys.stdin
         self._output = sys.stdout
         self._stopped = False
@@ -35,8 +45,8 @@ class GTPFrontend:
             'known_command': self.handle_known_command,
             'komi': GTPFrontend.ignore,
             'showboard': self.handle_showboard,
-            'time_settings': GTPFrontend.handle_time_settings,
-            'time_left': GTPFrontend.handle_time_left,
+            'time_settings': self.handle_time_settings,
+            'time_left': self.handle_time_left,
             'play': self.handle_play,
             'protocol_version': GTPFrontend.handle_protocol_version,
             'quit': self.handle_quit,
@@ -52,6 +62,8 @@ class GTPFrontend:
             self._output.flush()
 
     def process(self, cmd):
+        if self.ponderer is not None:
+            self.ponderer.stop()
         handler = self.handlers.get(cmd.name, self.handle_unknown)
         return handler(*cmd.args)
 
@@ -65,8 +77,12 @@ class GTPFrontend:
         return response.success()
 
     def handle_genmove(self, color):
+        start = time.perf_counter()
         move = self.agent.select_move(self.game_state)
+        self.time_manager.record_move(self.game_state.next_player, time.perf_counter() - start)
         self.game_state = self.game_state.apply_move(move)
+        if self.ponderer is not None:
+            self.ponderer.start(self.game_state)
         if move.is_pass:
             return response.success('pass')
         if move.is_resign:
@@ -101,15 +117,14 @@ class GTPFrontend:
         print_board(self.game_state.board)
         return response.success()
 
-    @staticmethod
-    def handle_time_left(color, time, stones):
-        # TODO: Arguments: color color, int time, int stones
-        return GTPFrontend.not_implemented_but_respond_success("time_left")
+    def handle_time_left(self, color, time_left, stones):
+        player = Player.black if color.lower() in ('b', 'black') else Player.white
+        self.time_manager.set_time_left(player, int(time_left), int(stones))
+        return response.success()
 
-    @staticmethod
-    def handle_time_settings(main_time, byo_yomi_time, byo_yomi_stones):
-        # TODO: Arguments: int main_time, int byo_yomi_time, int byo_yomi_stones
-        return GTPFrontend.not_implemented_but_respond_success("time_settings")
+    def handle_time_settings(self, main_time, byo_yomi_time, byo_yomi_stones):
+        self.time_manager.set_time_settings(int(main_time), int(byo_yomi_time), int(byo_yomi_stones))
+        return response.success()
 
     @staticmethod
     def handle_unknown(self, *args):
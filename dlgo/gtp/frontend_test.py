@@ -0,0 +1,80 @@
+import unittest
+
+from dlgo.agent.base import Agent
+from dlgo.agent.termination import TerminationAgent
+from dlgo.gotypes import Player
+from dlgo.gtp import command
+from dlgo.gtp.frontend import GTPFrontend
+
+
+class BudgetRecordingAgent(Agent):
+    # plays the first legal point and remembers how long it was given for it
+    def __init__(self):
+        super().__init__()
+        self.time_manager = None
+        self.budgets = []
+
+    def set_time_manager(self, time_manager):
+        self.time_manager = time_manager
+
+    def select_move(self, game_state):
+        self.budgets.append(self.time_manager.budget(game_state))
+        return game_state.legal_moves()[0]
+
+
+class TimeControlTest(unittest.TestCase):
+    def test_time_commands_set_the_agents_clock(self):
+        agent = BudgetRecordingAgent()
+        frontend = GTPFrontend(TerminationAgent(agent))
+
+        frontend.process(command.parse('genmove b'))
+        frontend.process(command.parse('time_settings 0 60 10'))
+        frontend.process(command.parse('time_left w 30 3'))
+        frontend.process(command.parse('genmove w'))
+
+        self.assertIsNone(agent.budgets[0])
+        self.assertAlmostEqual(10 - frontend.time_manager.lag, agent.budgets[1])
+        self.assertEqual(2, frontend.time_manager.clocks[Player.white].stones_left)
+
+
+class PonderingAgent(BudgetRecordingAgent):
+    # remembers what it pondered on, and whether it was told to stop
+    def __init__(self):
+        super().__init__()
+        self.pondered = []
+
+    def can_ponder(self):
+        return True
+
+    def ponder(self, game_state, stop):
+        self.pondered.append(game_state)
+        self.stopped = stop.wait(5)
+
+
+class PonderTest(unittest.TestCase):
+    def test_ponders_from_genmove_until_the_next_command(self):
+        agent = PonderingAgent()
+        frontend = GTPFrontend(TerminationAgent(agent), ponder=True)
+
+        frontend.process(command.parse('genmove b'))
+        game_after_genmove = frontend.game_state
+        frontend.process(command.parse('play w D4'))
+
+        self.assertEqual([game_after_genmove], agent.pondered)
+        self.assertTrue(agent.stopped)
+        self.assertIsNone(frontend.ponderer._thread)
+
+    def test_no_pondering_by_default(self):
+        agent = PonderingAgent()
+        frontend = GTPFrontend(TerminationAgent(agent))
+        frontend.process(command.parse('genmove b'))
+
+        self.assertEqual([], agent.pondered)
+
+    def test_agents_that_cannot_ponder_are_refused(self):
+        with self.assertRaises(ValueError):
+            GTPFrontend(TerminationAgent(BudgetRecordingAgent()), ponder=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,14 +8,18 @@ from dlgo.agent.termination import PassWhenOpponentPasses, TerminationAgent
 from dlgo.goboard_fast import GameState, Move
 from dlgo.gotypes import Player
 from dlgo.gtp.board import gtp_position_to_coords, coords_to_gtp_position
+from dlgo.gtp.ponder import Ponderer
 from dlgo.gtp.gtp_utils import SGFWriter
 from dlgo.scoring import compute_game_result
 from dlgo.utils import print_board
 
 
 class LocalGtpBot:
-    def __init__(self, go_bot, termination=None, handicap=0, opponent='gnugo', output_sgf='out.sgf', our_color='b'):
+    def __init__(self, go_bot, termination=None, handicap=0, opponent='gnugo', output_sgf='out.sgf', our_color='b',
+                 ponder=False):
         self.bot = TerminationAgent(go_bot, termination)
+        # keeps our bot thinking while the opponent engine chooses its move
+        self.ponderer = Ponderer(self.bot) if ponder else None
         self.handicap = handicap
         self.game_state = GameState.new_game(19)
         self.sgf = SGFWriter(output_sgf)
@@ -118,7 +122,11 @@ class LocalGtpBot:
         their_name = self.their_color.name
         their_letter = their_name[0].upper()
 
+        if self.ponderer is not None:
+            self.ponderer.start(self.game_state)
         pos = self.command_and_response('genmove {}\n'.format(their_name))
+        if self.ponderer is not None:
+            self.ponderer.stop()
 
         if pos.lower() == 'resign':
             self.game_state = self.game_state.apply_move(Move.resign())
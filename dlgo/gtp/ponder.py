@@ -0,0 +1,31 @@
+import threading
+
+__all__ = ['Ponderer']
+
+
+class Ponderer:
+    """Lets an agent think on a background thread while the opponent moves.
+
+    start() hands the agent the position after our move; stop() ends its
+    search before anything else touches the game or the agent. Only agents
+    whose can_ponder() is true, ZeroAgent and AlphaGoMCTS, can be used.
+    """
+    def __init__(self, agent):
+        if not agent.can_ponder():
+            raise ValueError('This agent cannot ponder, only ZeroAgent and AlphaGoMCTS can')
+
+        self.agent = agent
+        self._stop = None
+        self._thread = None
+
+    def start(self, game_state):
+        self.stop()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.agent.ponder, args=(game_state, self._stop), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
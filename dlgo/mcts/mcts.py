@@ -1,8 +1,14 @@
+import concurrent.futures
 import random
 import math
+
+import numpy as np
+
 from dlgo.gotypes import Player
+from dlgo import rollout
 from dlgo.agent import Agent
-from dlgo.agent.naive import FastRandomBot
+from dlgo.time_control import SearchBudget
+from dlgo.transposition import TranspositionTable
 
 
 class MCTSNode(object):
@@ -15,11 +21,17 @@ class MCTSNode(object):
         self.children = []
         self.unvisited_moves = game_state.legal_moves()
 
-    def add_random_child(self):
+    def add_random_child(self, transpositions=None):
         index = random.randint(0, len(self.unvisited_moves) - 1)
         new_move = self.unvisited_moves.pop(index)
         new_game_state = self.game_state.apply_move(new_move)
-        new_node = MCTSNode(new_game_state, self, new_move)
+
+        # a position reached before by another move order keeps its node
+        new_node = transpositions.get(new_game_state) if transpositions is not None else None
+        if new_node is None:
+            new_node = MCTSNode(new_game_state, self, new_move)
+            if transpositions is not None:
+                transpositions.put(new_game_state, new_node)
         self.children.append(new_node)
 
         return new_node
@@ -38,33 +50,65 @@ class MCTSNode(object):
         return float(self.win_counts[player]) / float(self.num_rollouts)
 
 
+def root_statistics(num_rounds, temperature, rollout_batch_size, game_state, seed, transposition_size=None,
+                    seconds=None):
+    # one worker of a root-parallel search: its own tree from game_state,
+    # reduced to the (move, wins, rollouts) of each root child
+    random.seed(seed)
+    np.random.seed(seed)
+    agent = MCTSAgent(num_rounds, temperature, rollout_batch_size, transposition_size=transposition_size)
+    root = agent.search(game_state, num_rounds, seconds)
+
+    return [(child.move, child.win_counts[game_state.next_player], child.num_rollouts) for child in root.children]
+
+
 class MCTSAgent(Agent):
-    def __init__(self, num_rounds, temperature):
+    def __init__(self, num_rounds, temperature, rollout_batch_size=1, num_workers=1, transposition_size=None):
         super().__init__()
 
         self.num_rounds = num_rounds
         self.temperature = temperature
+        # leaves whose random games are played out together in each round
+        self.rollout_batch_size = rollout_batch_size
+        # processes growing separate trees from the same root, whose root
+        # children are added up before choosing a move
+        self.num_workers = num_workers
+        self._executor = None
+        # nodes kept by position during a search, so the move orders that
+        # lead to the same position share its statistics; None for a tree
+        self.transposition_size = transposition_size
+        self.time_manager = None
+
+    def set_time_manager(self, time_manager):
+        self.time_manager = time_manager
+
+    def close(self):
+        # shut down the worker processes of the root-parallel search
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
 
     def select_move(self, game_state):
-        root = MCTSNode(game_state)
-
-        for i in range(self.num_rounds):
-            node = root
-
-            while (not node.can_add_child()) and (not node.is_terminal()):
-                node = self.select_child(node)
+        # num_rounds at most, in the time the time manager gives the move
+        seconds = self.time_manager.budget(game_state) if self.time_manager is not None else None
 
-            if node.can_add_child():
-                node = node.add_random_child()
+        if self.num_workers > 1:
+            statistics = self.parallel_root_statistics(game_state, seconds)
+        else:
+            root = self.search(game_state, self.num_rounds, seconds)
+            statistics = [(child.move, child.win_counts[game_state.next_player], child.num_rollouts)
+                          for child in root.children]
 
-            winner = self.simulate_random_game(node.game_state)
-
-            while node is not None:
-                node.record_win(winner)
-                node = node.parent
-
-        scored_moves = [(child.winning_frac(game_state.next_player), child.move, child.num_rollouts)
-                        for child in root.children]
+        scored_moves = [(wins / rollouts, move, rollouts) for move, wins, rollouts in statistics]
 
         scored_moves.sort(key=lambda x: x[0], reverse=True)
 
@@ -73,19 +117,86 @@ class MCTSAgent(Agent):
             print('%s - %.3f (%d)' % (move, score, rollouts))
 
         # select a best move
-        best_move = None
-        best_pct = -1.0
-
-        for child in root.children:
-            child_pct = child.winning_frac(game_state.next_player)
-
-            if child_pct > best_pct:
-                best_pct = child_pct
-                best_move = child.move
+        best_pct, best_move = (scored_moves[0][0], scored_moves[0][1]) if scored_moves else (-1.0, None)
 
         print("Select move %s with win pct %.3f" % (best_move, best_pct))
         return best_move
 
+    def parallel_root_statistics(self, game_state, seconds=None):
+        # the root children of num_workers trees, num_rounds split between
+        # them, merged move by move
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers)
+
+        rounds = [len(chunk) for chunk in np.array_split(np.arange(self.num_rounds), self.num_workers)]
+        seeds = [random.getrandbits(32) for _ in rounds]
+        # the workers get the position without the game that led to it
+        position = game_state.detached()
+        futures = [self._executor.submit(root_statistics, num_rounds, self.temperature, self.rollout_batch_size,
+                                         position, seed, self.transposition_size, seconds)
+                   for num_rounds, seed in zip(rounds, seeds) if num_rounds]
+
+        merged = {}
+        for future in futures:
+            for move, wins, rollouts in future.result():
+                total_wins, total_rollouts = merged.get(move, (0, 0))
+                merged[move] = (total_wins + wins, total_rollouts + rollouts)
+
+        return [(move, wins, rollouts) for move, (wins, rollouts) in merged.items()]
+
+    def search(self, game_state, num_rounds, seconds=None):
+        # grow a tree of num_rounds rollouts from game_state, or fewer if
+        # seconds run out first
+        root = MCTSNode(game_state.search_root())
+        transpositions = TranspositionTable(self.transposition_size) if self.transposition_size else None
+        budget = SearchBudget(num_rounds, seconds)
+
+        while not budget.is_over():
+            paths = []
+            num_leaves = budget.reserve(self.rollout_batch_size)
+
+            while len(paths) < num_leaves:
+                path = self.select_leaf(root, transpositions)
+
+                if path is None:
+                    break
+
+                paths.append(path)
+
+            if len(paths) == 1:
+                winners = [self.simulate_random_game(paths[0][-1].game_state)]
+            else:
+                winners = rollout.simulate_random_games([path[-1].game_state for path in paths])
+
+            # back up along the way taken, as a shared node has more than
+            # one parent
+            for path, winner in zip(paths, winners):
+                for node in path:
+                    node.record_win(winner)
+
+            budget.finish(num_leaves, len(paths))
+
+        return root
+
+    def select_leaf(self, root, transpositions=None):
+        # the nodes from the root to the one to play a random game from, or
+        # None if the way there leads through a child still waiting for its
+        # first result
+        node = root
+        path = [node]
+
+        while (not node.can_add_child()) and (not node.is_terminal()):
+            if any(child.num_rollouts == 0 for child in node.children):
+                return None
+
+            node = self.select_child(node)
+            path.append(node)
+
+        if node.can_add_child():
+            path.append(node.add_random_child(transpositions))
+
+        return path
+
     def select_child(self, node):
         total_rollouts = sum(child.num_rollouts for child in node.children)
         log_rollouts = math.log(total_rollouts)
@@ -106,13 +217,4 @@ class MCTSAgent(Agent):
 
     @staticmethod
     def simulate_random_game(game_state):
-        bots = {
-            Player.black: FastRandomBot(),
-            Player.white: FastRandomBot()
-        }
-
-        while not game_state.is_over():
-            bot_move = bots[game_state.next_player].select_move(game_state)
-            game_state = game_state.apply_move(bot_move)
-
-        return game_state.winner()
+        return rollout.simulate_random_game(game_state)
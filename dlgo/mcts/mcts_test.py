@@ -0,0 +1,91 @@
+import unittest
+
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Player, Point
+from dlgo.mcts.mcts import MCTSAgent, MCTSNode, root_statistics
+from dlgo.time_control import TimeManager
+from dlgo.transposition import TranspositionTable
+
+
+class RootParallelTest(unittest.TestCase):
+    def test_root_statistics(self):
+        game = GameState.new_game(5)
+        statistics = root_statistics(30, 1.4, 1, game, seed=1)
+
+        self.assertEqual(30, sum(rollouts for _, _, rollouts in statistics))
+        self.assertEqual(statistics, root_statistics(30, 1.4, 1, game, seed=1))
+
+    def test_parallel_root_statistics(self):
+        game = GameState.new_game(5)
+
+        with MCTSAgent(41, 1.4, num_workers=2) as agent:
+            statistics = agent.parallel_root_statistics(game)
+            moves = [move for move, _, _ in statistics]
+            self.assertEqual(41, sum(rollouts for _, _, rollouts in statistics))
+            self.assertEqual(len(set(moves)), len(moves))
+            self.assertTrue(all(0 <= wins <= rollouts for _, wins, rollouts in statistics))
+            self.assertTrue(game.is_valid_move(agent.select_move(game)))
+
+        # a closed agent starts new workers for its next parallel search
+        self.assertTrue(game.is_valid_move(agent.select_move(game)))
+        agent.close()
+
+    def test_parallel_search_late_in_a_long_game(self):
+        # black fills the board row by row while white passes
+        game = GameState.new_game(19)
+        for point in [Point(row, col) for row in range(1, 20) for col in range(1, 20)][:175]:
+            game = game.apply_move(Move.play(point)).apply_move(Move.pass_turn())
+        self.assertEqual(350, game.depth)
+
+        with MCTSAgent(4, 1.4, num_workers=2) as agent:
+            self.assertTrue(game.is_valid_move(agent.select_move(game)))
+
+
+class TranspositionTest(unittest.TestCase):
+    def test_move_orders_share_a_node(self):
+        transpositions = TranspositionTable(100)
+        root = MCTSNode(GameState.new_game(5))
+        first, second, reply = Move.play(Point(1, 1)), Move.play(Point(3, 3)), Move.play(Point(2, 2))
+
+        def add_child(node, move):
+            node.unvisited_moves = [move]
+            return node.add_random_child(transpositions)
+
+        by_first = add_child(add_child(add_child(root, first), reply), second)
+        by_second = add_child(add_child(add_child(root, second), reply), first)
+        self.assertIs(by_first, by_second)
+
+    def test_search_backs_up_along_the_way_taken(self):
+        agent = MCTSAgent(60, 1.4, transposition_size=1000)
+        root = agent.search(GameState.new_game(3), 60)
+
+        self.assertEqual(60, root.num_rollouts)
+        self.assertEqual(60, sum(child.num_rollouts for child in root.children))
+
+
+class SearchHistoryTest(unittest.TestCase):
+    def test_search_trees_stay_out_of_the_game_history(self):
+        game = GameState.new_game(5)
+        agent = MCTSAgent(50, 1.4)
+        for _ in range(4):
+            game = game.apply_move(agent.select_move(game))
+
+        self.assertEqual(5, sum(len(depths) for depths in game._history._depths.values()))
+
+
+
+class TimeControlTest(unittest.TestCase):
+    def test_exhausted_clock_still_gives_a_move(self):
+        time_manager = TimeManager()
+        time_manager.set_time_settings(60)
+        time_manager.set_time_left(Player.black, 0, 0)
+        agent = MCTSAgent(100, 1.4)
+        agent.set_time_manager(time_manager)
+        game = GameState.new_game(5)
+
+        self.assertEqual(0, time_manager.budget(game))
+        self.assertTrue(game.is_valid_move(agent.select_move(game)))
+
+
+if __name__ == '__main__':
+    unittest.main()
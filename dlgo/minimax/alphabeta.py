@@ -5,6 +5,7 @@ from dlgo.gotypes import Player
 MIN_SCORE, MAX_SCORE = -999999, 999999
 
 
+# game_state is walked with play()/undo(), so pass in a search_copy() of the real game state
 def alpha_beta_result(game_state, max_depth, best_black, best_white, eval_fn):
     if game_state.is_over():
         return MAX_SCORE if game_state.winner() == game_state.next_player else MIN_SCORE
@@ -15,9 +16,10 @@ def alpha_beta_result(game_state, max_depth, best_black, best_white, eval_fn):
     best_so_far = MIN_SCORE
 
     for candidate_move in game_state.legal_moves():
-        next_state = game_state.apply_move(candidate_move)
+        game_state.play(candidate_move)
+        opponent_best_result = alpha_beta_result(game_state, max_depth - 1, best_black, best_white, eval_fn)
+        game_state.undo()
 
-        opponent_best_result = alpha_beta_result(next_state, max_depth - 1, best_black, best_white, eval_fn)
         best_so_far = max(best_so_far, -1 * opponent_best_result)
 
         if game_state.next_player == Player.white:
@@ -53,13 +55,16 @@ class AlphaBetaAgent(Agent):
         best_moves = []
         best_score = None
         best_black, best_white = MIN_SCORE, MIN_SCORE
+        search_state = game_state.search_copy()
 
         # all possible moves
         for possible_move in game_state.legal_moves():
             # game state if this move were selected
-            next_state = game_state.apply_move(possible_move)
+            search_state.play(possible_move)
+            opponent_best_outcome = alpha_beta_result(search_state, self.max_depth, best_black, best_white,
+                                                      self.eval_fn)
+            search_state.undo()
 
-            opponent_best_outcome = alpha_beta_result(next_state, self.max_depth, best_black, best_white, self.eval_fn)
             our_best_outcome = -opponent_best_outcome
 
             if (not best_moves) or our_best_outcome > best_score:
@@ -0,0 +1,85 @@
+import concurrent.futures
+import copy
+import os
+
+import numpy as np
+
+from dlgo import scoring
+from dlgo.agent.naive import FastRandomBot
+from dlgo.gotypes import Player
+
+__all__ = ['estimate_ownership', 'dead_stones', 'compute_game_result']
+
+
+def _start_state(game_state):
+    # the position to play out from, as a new game: a finished game would
+    # stop at once, and ownership doesn't need the game history
+    return type(game_state)(copy.deepcopy(game_state.board), game_state.next_player, None, None)
+
+
+def _playouts(game_state, num_playouts, seed):
+    # how often each player ends up owning each point (a stone or territory)
+    # over random playouts. The bot draws from the global NumPy RNG, which
+    # is seeded for the playouts and restored after them, as this also runs
+    # in the caller's process.
+    rng_state = np.random.get_state()
+    np.random.seed(seed)
+    bot = FastRandomBot()
+    board = game_state.board
+    owned = np.zeros((2, board.num_rows, board.num_cols), dtype=np.int32)
+
+    try:
+        for _ in range(num_playouts):
+            game = game_state.search_copy()
+
+            while not game.is_over():
+                game.play(bot.select_move(game))
+
+            status = scoring.territory_status(scoring.board_colors(game.board))
+            owned[0] += (status == Player.black.value) | (status == scoring.BLACK_TERRITORY)
+            owned[1] += (status == Player.white.value) | (status == scoring.WHITE_TERRITORY)
+    finally:
+        np.random.set_state(rng_state)
+
+    return owned
+
+
+def estimate_ownership(game_state, num_playouts=100, num_workers=None, seed=None):
+    """Monte-Carlo ownership map of a position.
+
+    Plays num_playouts games from game_state to the end with FastRandomBot,
+    split over num_workers processes (one per CPU by default), and returns a
+    (2, num_rows, num_cols) array: the fraction of playouts in which black
+    (plane 0) and white (plane 1) owned each point.
+    """
+    num_workers = min(num_workers or os.cpu_count(), num_playouts)
+    start = _start_state(game_state)
+    seeds = np.random.RandomState(seed).randint(2 ** 31, size=num_workers).tolist()
+    counts = [len(chunk) for chunk in np.array_split(np.arange(num_playouts), num_workers)]
+
+    if num_workers == 1:
+        owned = _playouts(start, num_playouts, seeds[0])
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+            owned = sum(executor.map(_playouts, [start] * num_workers, counts, seeds))
+
+    return owned / num_playouts
+
+
+def dead_stones(board, ownership, threshold=0.5):
+    # boolean (num_rows, num_cols) mask of the stones the opponent owns the
+    # point of in more than threshold of the playouts
+    colors = scoring.board_colors(board)
+
+    return ((colors == Player.black.value) & (ownership[1] > threshold)) | \
+        ((colors == Player.white.value) & (ownership[0] > threshold))
+
+
+def compute_game_result(game_state, num_playouts=100, num_workers=None, seed=None, komi=7.5):
+    # area score after taking off the stones the playouts find dead, so
+    # games can be scored before they are played out to the end
+    ownership = estimate_ownership(game_state, num_playouts, num_workers, seed)
+    colors = scoring.board_colors(game_state.board)
+    colors[dead_stones(game_state.board, ownership)] = 0
+
+    return scoring.area_result(scoring.territory_status(colors), komi)
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from dlgo import ownership
+from dlgo import scoring
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+
+
+class OwnershipTest(unittest.TestCase):
+    def setUp(self):
+        # black walls off the left of the board, white the right, and a lone
+        # white stone sits in black's area
+        self.game = GameState.new_game(7)
+        black = [Point(row, 3) for row in range(1, 8)] + [Point(2, 2)]
+        white = [Point(row, 5) for row in range(1, 8)] + [Point(4, 1)]
+        for black_point, white_point in zip(black, white):
+            self.game = self.game.apply_move(Move.play(black_point)).apply_move(Move.play(white_point))
+
+    def test_estimate_ownership(self):
+        owned = ownership.estimate_ownership(self.game, num_playouts=20, num_workers=1, seed=1)
+        self.assertEqual((2, 7, 7), owned.shape)
+        self.assertTrue((owned.sum(axis=0) <= 1).all())
+        self.assertGreater(owned[0, 0, 0], 0.5)
+        self.assertGreater(owned[1, 0, 6], 0.5)
+
+        dead = ownership.dead_stones(self.game.board, owned)
+        self.assertEqual([[3, 0]], list(map(list, zip(*dead.nonzero()))))
+
+    def test_callers_random_state_is_left_alone(self):
+        np.random.seed(3)
+        expected = np.random.random_sample(4)
+        np.random.seed(3)
+        ownership.estimate_ownership(self.game, num_playouts=5, num_workers=1, seed=1)
+        np.testing.assert_array_equal(expected, np.random.random_sample(4))
+
+    def test_dead_stones_are_counted_for_the_opponent(self):
+        result = ownership.compute_game_result(self.game, num_playouts=20, num_workers=1, seed=1)
+        # the dead stone and the points around it are black's
+        self.assertEqual(3 * 7, result.b)
+        self.assertEqual(3 * 7, result.w)
+        # without it black's area is dame
+        self.assertEqual(scoring.GameResult(8, 22, 7.5), scoring.compute_game_result(self.game))
+
+
+if __name__ == '__main__':
+    unittest.main()
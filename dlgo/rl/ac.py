@@ -6,7 +6,6 @@ from dlgo import encoders
 from dlgo import goboard
 from dlgo import kerasutil
 from dlgo.agent import Agent
-from dlgo.agent.helpers import is_point_an_eye
 
 __all__ = [
     'ACAgent',
@@ -51,24 +50,22 @@ class ACAgent(Agent):   # 12.6
         move_probs = np.clip(move_probs, eps, 1 - eps)
         move_probs = move_probs / np.sum(move_probs)
 
-        candidates = np.arange(num_moves)
-        ranked_moves = np.random.choice(
-            candidates, num_moves, replace=False, p=move_probs)
-        for point_idx in ranked_moves:
-            point = self.encoder.decode_point_index(point_idx)
-            move = goboard.Move.play(point)
-            move_is_valid = game_state.is_valid_move(move)
-            fills_own_eye = is_point_an_eye(
-                game_state.board, point, game_state.next_player)
-            if move_is_valid and (not fills_own_eye):
-                if self.collector is not None:
-                    # Include the estimated value in the experience buffer
-                    self.collector.record_decision(
-                        state=board_tensor,
-                        action=point_idx,
-                        estimated_value=estimated_value)
-                return goboard.Move.play(point)
-        return goboard.Move.pass_turn()
+        # Mask out illegal points and points that fill our own eyes in one go,
+        # then sample from the remaining probability mass
+        move_probs = move_probs * game_state.legal_mask(exclude_eyes=True).ravel()
+        total = np.sum(move_probs)
+        if total == 0:
+            return goboard.Move.pass_turn()
+
+        point_idx = np.random.choice(num_moves, p=move_probs / total)
+        point = self.encoder.decode_point_index(point_idx)
+        if self.collector is not None:
+            # Include the estimated value in the experience buffer
+            self.collector.record_decision(
+                state=board_tensor,
+                action=point_idx,
+                estimated_value=estimated_value)
+        return goboard.Move.play(point)
 
     # lr (learning rate) and batch_size are tuning parameters for the optimizer;
     # refer to chapter 10 for more discussion
@@ -1,3 +1,4 @@
+from dlgo import ownership
 from dlgo import rl
 from dlgo import scoring
 from dlgo import goboard_fast as goboard
@@ -10,7 +11,7 @@ class GameRecord(namedtuple('GameRecord', 'moves winner margin')):
     pass
 
 
-def simulate_game(black_player, white_player):
+def simulate_game(black_player, white_player, max_moves=None, ownership_playouts=100):
     moves = []
     game = goboard.GameState.new_game(19)
     agents = {
@@ -18,11 +19,16 @@ def simulate_game(black_player, white_player):
         Player.white: white_player,
     }
     while not game.is_over():
+        if max_moves is not None and len(moves) >= max_moves:
+            break
         next_move = agents[game.next_player].select_move(game)
         moves.append(next_move)
         game = game.apply_move(next_move)
 
-    game_result = scoring.compute_game_result(game)
+    if game.is_over():
+        game_result = scoring.compute_game_result(game)
+    else:
+        game_result = ownership.compute_game_result(game, ownership_playouts)
     print(game_result)
 
     return GameRecord(
@@ -32,7 +38,7 @@ def simulate_game(black_player, white_player):
     )
 
 
-def experience_simulation(num_games, agent1, agent2):
+def experience_simulation(num_games, agent1, agent2, max_moves=None):
     collector1 = rl.ExperienceCollector()
     collector2 = rl.ExperienceCollector()
 
@@ -47,7 +53,7 @@ def experience_simulation(num_games, agent1, agent2):
             black_player, white_player = agent1, agent2
         else:
             white_player, black_player = agent2, agent1
-        game_record = simulate_game(black_player, white_player)
+        game_record = simulate_game(black_player, white_player, max_moves)
         if game_record.winner == color1:
             collector1.complete_episode(reward=1)
             collector2.complete_episode(reward=-1)
@@ -22,17 +22,28 @@ class ValueAgent(Agent):
         self.collector = None
         self.temperature = 0.0
         self.policy = policy
+        self.evaluation_cache = None
 
         self.last_move_value = 0
 
     def predict(self, game_state):
-        encoded_state = self.encoder.encode(game_state)
-        input_tensor = np.array([encoded_state])
-        return self.model.predict(input_tensor)[0]
+        return self.predict_batch([game_state])[0]
+
+    def predict_batch(self, game_states):
+        # the value of each of game_states, with one prediction for all of
+        # them (or those not in the evaluation cache)
+        if self.evaluation_cache is not None:
+            return self.evaluation_cache.predict(self.model, self.encoder, game_states)
+
+        input_tensor = np.array([self.encoder.encode(game_state) for game_state in game_states])
+        return list(self.model.predict(input_tensor))
 
     def set_temperature(self, temperature):
         self.temperature = temperature
 
+    def set_evaluation_cache(self, evaluation_cache):
+        self.evaluation_cache = evaluation_cache
+
     def set_collector(self, collector):
         self.collector = collector
 
@@ -0,0 +1,585 @@
+import random
+
+import numpy as np
+
+from dlgo.scoring import GameResult, area_result, board_colors, territory_status
+
+__all__ = ['RolloutBoard', 'RolloutBatch', 'simulate_random_game', 'simulate_random_games']
+
+EMPTY = 0
+BORDER = 3
+
+
+class RolloutBoard:
+    """A board for playing random games out quickly.
+
+    Points are indices into flat lists padded with a border all round, so
+    the neighbours of p are p - stride, p + stride, p - 1 and p + 1. Strings
+    are circular linked lists of stones with a head and a pseudo-liberty
+    count (empty neighbours counted once per stone next to them), which is
+    zero exactly when the string has no liberties. The empty points are kept
+    in a list that random moves are drawn from.
+
+    Only simple ko is checked, not superko, and nothing is kept for undoing
+    moves: the board is thrown away at the end of the game.
+    """
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.stride = stride = num_cols + 2
+        size = (num_rows + 2) * stride
+
+        self.colors = [BORDER] * size
+        self.head = list(range(size))
+        self.next_stone = list(range(size))
+        self.liberties = [0] * size
+        self.empties = []
+        self.empty_index = [-1] * size
+        self.ko = -1
+
+        for row in range(1, num_rows + 1):
+            for col in range(1, num_cols + 1):
+                point = row * stride + col
+                self.colors[point] = EMPTY
+                self.empty_index[point] = len(self.empties)
+                self.empties.append(point)
+
+    @classmethod
+    def from_game_state(cls, game_state):
+        board = game_state.board
+        rollout_board = cls(board.num_rows, board.num_cols)
+        stride = rollout_board.stride
+
+        # strings can't lose their last liberty while the stones of a legal
+        # position are put down one by one, so nothing is captured here
+        for r, row in enumerate(board_colors(board).tolist()):
+            for c, color in enumerate(row):
+                if color:
+                    rollout_board.place_stone(color, (r + 1) * stride + c + 1)
+
+        rollout_board.ko = rollout_board._ko_point(game_state)
+        return rollout_board
+
+    def _ko_point(self, game_state):
+        # the point the next player may not play at once: where the last
+        # move took a single stone with a single stone left in atari
+        move = game_state.last_move
+        previous = game_state.previous_state
+        if move is None or not move.is_play or previous is None:
+            return -1
+
+        go_string = game_state.board.get_go_string(move.point)
+        if len(go_string.stones) != 1 or go_string.num_liberties != 1:
+            return -1
+
+        (liberty,) = go_string.liberties
+        if previous.board.get(liberty) != game_state.next_player:
+            return -1
+
+        captured = previous.board.get_go_string(liberty)
+        return liberty.row * self.stride + liberty.col if len(captured.stones) == 1 else -1
+
+    def _take_empty(self, point):
+        empties = self.empties
+        index = self.empty_index[point]
+        last = empties.pop()
+        if last != point:
+            empties[index] = last
+            self.empty_index[last] = index
+        self.empty_index[point] = -1
+
+    def _add_empty(self, point):
+        self.empty_index[point] = len(self.empties)
+        self.empties.append(point)
+
+    def place_stone(self, color, point):
+        colors = self.colors
+        head = self.head
+        liberties = self.liberties
+        next_stone = self.next_stone
+        stride = self.stride
+
+        self._take_empty(point)
+        colors[point] = color
+        head[point] = point
+        next_stone[point] = point
+        liberties[point] = 0
+        captured = []
+
+        for neighbor in (point - stride, point + stride, point - 1, point + 1):
+            neighbor_color = colors[neighbor]
+            if neighbor_color == EMPTY:
+                liberties[head[point]] += 1
+            elif neighbor_color != BORDER:
+                string = head[neighbor]
+                liberties[string] -= 1
+                if neighbor_color == color:
+                    if string != head[point]:
+                        self._merge(head[point], string)
+                elif liberties[string] == 0:
+                    captured.append(string)
+
+        num_captured = 0
+        for string in captured:
+            num_captured += self._remove(string)
+
+        self.ko = -1
+        if num_captured == 1 and next_stone[point] == point and liberties[point] == 1:
+            self.ko = captured[0]
+
+    def _merge(self, a, b):
+        # join string b into string a, relabelling the smaller of the two
+        head = self.head
+        next_stone = self.next_stone
+        if self._size(a) < self._size(b):
+            a, b = b, a
+
+        stone = b
+        while True:
+            head[stone] = a
+            stone = next_stone[stone]
+            if stone == b:
+                break
+
+        next_stone[a], next_stone[b] = next_stone[b], next_stone[a]
+        self.liberties[a] += self.liberties[b]
+
+    def _size(self, string):
+        size = 1
+        stone = self.next_stone[string]
+        while stone != string:
+            size += 1
+            stone = self.next_stone[stone]
+        return size
+
+    def _remove(self, string):
+        colors = self.colors
+        head = self.head
+        liberties = self.liberties
+        next_stone = self.next_stone
+        stride = self.stride
+
+        stones = [string]
+        stone = next_stone[string]
+        while stone != string:
+            stones.append(stone)
+            stone = next_stone[stone]
+
+        for stone in stones:
+            colors[stone] = EMPTY
+            self._add_empty(stone)
+
+        for stone in stones:
+            for neighbor in (stone - stride, stone + stride, stone - 1, stone + 1):
+                if colors[neighbor] == 1 or colors[neighbor] == 2:
+                    liberties[head[neighbor]] += 1
+
+        return len(stones)
+
+    def is_legal(self, color, point):
+        # point is empty; legal unless it is the ko point or suicide
+        if point == self.ko:
+            return False
+
+        colors = self.colors
+        head = self.head
+        liberties = self.liberties
+        stride = self.stride
+        neighbors = (point - stride, point + stride, point - 1, point + 1)
+
+        for neighbor in neighbors:
+            neighbor_color = colors[neighbor]
+            if neighbor_color == EMPTY:
+                return True
+            if neighbor_color == BORDER:
+                continue
+
+            string = head[neighbor]
+            touching = sum(1 for other in neighbors if head[other] == string and colors[other] == neighbor_color)
+            if neighbor_color == color:
+                if liberties[string] > touching:
+                    return True
+            elif liberties[string] == touching:
+                return True
+
+        return False
+
+    def is_eye(self, color, point):
+        # the same eye test as goboard_fast.is_eye_shape
+        colors = self.colors
+        stride = self.stride
+
+        for neighbor in (point - stride, point + stride, point - 1, point + 1):
+            if colors[neighbor] != color and colors[neighbor] != BORDER:
+                return False
+
+        friendly_corners = 0
+        off_board_corners = 0
+        for corner in (point - stride - 1, point - stride + 1, point + stride - 1, point + stride + 1):
+            if colors[corner] == color:
+                friendly_corners += 1
+            elif colors[corner] == BORDER:
+                off_board_corners += 1
+
+        if off_board_corners > 0:
+            return off_board_corners + friendly_corners == 4
+        return friendly_corners >= 3
+
+    def random_move(self, color, rand=random.random):
+        # a random legal point that doesn't fill one of our own eyes, or None
+        # to pass. Points found unplayable are swapped to the end of the
+        # empty list so each is tried at most once.
+        empties = self.empties
+        empty_index = self.empty_index
+        remaining = len(empties)
+
+        while remaining:
+            index = int(rand() * remaining)
+            point = empties[index]
+            if not self.is_eye(color, point) and self.is_legal(color, point):
+                return point
+
+            remaining -= 1
+            last = empties[remaining]
+            empties[index], empties[remaining] = last, point
+            empty_index[last], empty_index[point] = index, remaining
+
+        return None
+
+    def play_out(self, color, passes=0, max_moves=None, rand=random.random):
+        # random moves until both players pass in a row
+        if max_moves is None:
+            max_moves = 3 * self.num_rows * self.num_cols
+
+        for _ in range(max_moves):
+            if passes >= 2:
+                break
+
+            point = self.random_move(color, rand)
+            if point is None:
+                passes += 1
+                self.ko = -1
+            else:
+                passes = 0
+                self.place_stone(color, point)
+
+            color = 3 - color
+
+    def area_score(self):
+        # stones plus empty regions bordered by one colour only
+        colors = self.colors
+        stride = self.stride
+        score = [0, colors.count(1), colors.count(2)]
+        seen = set()
+
+        for point in self.empties:
+            if point in seen:
+                continue
+
+            region = [point]
+            seen.add(point)
+            borders = 0
+            for stone in region:
+                for neighbor in (stone - stride, stone + stride, stone - 1, stone + 1):
+                    neighbor_color = colors[neighbor]
+                    if neighbor_color == EMPTY:
+                        if neighbor not in seen:
+                            seen.add(neighbor)
+                            region.append(neighbor)
+                    elif neighbor_color != BORDER:
+                        borders |= neighbor_color
+
+            if borders == 1 or borders == 2:
+                score[borders] += len(region)
+
+        return score[1], score[2]
+
+
+def simulate_random_game(game_state, komi=7.5, max_moves=None, rand=random.random):
+    """Winner of a random game played out from game_state.
+
+    Plays the moves FastRandomBot would choose, legal points that don't fill
+    the player's own eyes, on a RolloutBoard rather than a chain of game
+    states, and area scores the end position.
+    """
+    if game_state.is_over():
+        return game_state.winner()
+
+    board = RolloutBoard.from_game_state(game_state)
+    last_move = game_state.last_move
+    passes = 1 if last_move is not None and last_move.is_pass else 0
+    board.play_out(game_state.next_player.value, passes, max_moves, rand)
+
+    black, white = board.area_score()
+    return GameResult(black, white, komi).winner
+
+
+class RolloutBatch:
+    """Random games played out in lockstep, one move of every game per step.
+
+    Each game is a row of (num_games, num_points) arrays holding the state
+    of a RolloutBoard: colors, a parent pointer for each stone leading to
+    the root of its string, pseudo-liberties by root, and a list of empty
+    points. A step draws a random empty point for every game at once and
+    checks just those points; the few games whose draws keep being illegal
+    or own eyes have all their empty points checked instead. Every round of
+    array operations covers all the games that still need a move.
+
+    Moves are picked like RolloutBoard.random_move picks them: legal points
+    that don't fill the player's own eyes, checking simple ko only.
+    """
+    def __init__(self, game_states):
+        board = game_states[0].board
+        self.num_rows = board.num_rows
+        self.num_cols = board.num_cols
+        self.num_games = num_games = len(game_states)
+        self.stride = stride = self.num_cols + 2
+        self.offsets = np.array([-stride, stride, -1, 1])
+        self.corner_offsets = np.array([-stride - 1, -stride + 1, stride - 1, stride + 1])
+
+        self.ko = np.full(num_games, -1)
+        self.passes = np.zeros(num_games, dtype=np.int8)
+        self.next_color = np.zeros(num_games, dtype=np.int8)
+        self.winners = [None] * num_games
+        boards = []
+
+        for i, game_state in enumerate(game_states):
+            if game_state.is_over():
+                self.winners[i] = game_state.winner()
+                self.passes[i] = 2
+            elif game_state.last_move is not None and game_state.last_move.is_pass:
+                self.passes[i] = 1
+
+            rollout_board = RolloutBoard.from_game_state(game_state)
+            boards.append(rollout_board)
+            self.ko[i] = rollout_board.ko
+            self.next_color[i] = game_state.next_player.value
+
+        # empty and border points are their own parents
+        self.colors = np.array([rollout_board.colors for rollout_board in boards], dtype=np.int8)
+        stones = (self.colors == 1) | (self.colors == 2)
+        self.parent = np.where(stones, np.array([rollout_board.head for rollout_board in boards]),
+                               np.arange(self.colors.shape[1]))
+        self.liberties = np.array([rollout_board.liberties for rollout_board in boards])
+
+        self.empties = np.zeros((num_games, self.num_rows * self.num_cols), dtype=np.int64)
+        self.num_empty = np.array([len(rollout_board.empties) for rollout_board in boards])
+        self.empty_index = np.array([rollout_board.empty_index for rollout_board in boards])
+        for i, rollout_board in enumerate(boards):
+            self.empties[i, :len(rollout_board.empties)] = rollout_board.empties
+
+    def is_active(self):
+        return self.passes < 2
+
+    def _find(self, games, points):
+        # roots of the strings at points, which are made to point straight
+        # at them
+        parent = self.parent.reshape(-1)
+        base = games * self.parent.shape[1]
+        roots = parent[base + points]
+
+        while True:
+            up = parent[base + roots]
+            if (up == roots).all():
+                parent[base + points] = roots
+                return roots
+            roots = up
+
+    def _playable(self, games, points):
+        # whether each point is legal and not an own eye in its game. The
+        # neighbours and corners of the points are (4, len(points)) arrays.
+        neighbors = points + self.offsets[:, None]
+        colors = self.colors[games, neighbors]
+        roots = self._find(games, neighbors)
+        liberties = self.liberties[games, roots]
+        color = self.next_color[games]
+
+        # pseudo-liberties the point itself gives each neighbouring string
+        touching = np.ones(neighbors.shape, dtype=np.int64)
+        for d in range(4):
+            for other in range(d):
+                same = roots[d] == roots[other]
+                touching[d] += same
+                touching[other] += same
+
+        legal = (colors == EMPTY).any(axis=0) | \
+            ((colors == color) & (liberties > touching)).any(axis=0) | \
+            ((colors == 3 - color) & (liberties == touching)).any(axis=0)
+        legal &= points != self.ko[games]
+
+        corner_colors = self.colors[games, points + self.corner_offsets[:, None]]
+        friendly_corners = (corner_colors == color).sum(axis=0)
+        off_board_corners = (corner_colors == BORDER).sum(axis=0)
+        eye = ((colors == color) | (colors == BORDER)).all(axis=0) & np.where(
+            off_board_corners > 0, off_board_corners + friendly_corners == 4, friendly_corners >= 3)
+
+        return legal & ~eye
+
+    def _choose(self, games, num_draws=2):
+        # a random playable point of each game, or -1 to pass. Points drawn
+        # and found unplayable are swapped to the end of the empty list so
+        # the next draw can't repeat them.
+        choice = np.full(len(games), -1)
+        remaining = self.num_empty[games].copy()
+        searching = np.flatnonzero(remaining > 0)
+
+        for _ in range(num_draws):
+            if not len(searching):
+                return choice
+
+            searched = games[searching]
+            index = (np.random.random_sample(len(searching)) * remaining[searching]).astype(np.int64)
+            points = self.empties[searched, index]
+            playable = self._playable(searched, points)
+            choice[searching[playable]] = points[playable]
+
+            failed = searching[~playable]
+            searched = games[failed]
+            index = index[~playable]
+            points = points[~playable]
+            remaining[failed] -= 1
+            last = self.empties[searched, remaining[failed]]
+            self.empties[searched, index], self.empties[searched, remaining[failed]] = last, points
+            self.empty_index[searched, last], self.empty_index[searched, points] = index, remaining[failed]
+
+            searching = failed[remaining[failed] > 0]
+
+        if len(searching):
+            # check every point not drawn yet and pick one of the playable
+            searched = games[searching]
+            untried = np.arange(self.empties.shape[1]) < remaining[searching, None]
+            rows, index = np.nonzero(untried)
+            points = self.empties[searched[rows], index]
+            keys = np.full(untried.shape, -1.0)
+            keys[rows, index] = np.where(self._playable(searched[rows], points),
+                                         np.random.random_sample(len(rows)), -1.0)
+
+            best = keys.argmax(axis=1)
+            found = keys[np.arange(len(searching)), best] >= 0
+            choice[searching[found]] = self.empties[searched[found], best[found]]
+
+        return choice
+
+    def _take_empty(self, games, points):
+        index = self.empty_index[games, points]
+        self.num_empty[games] -= 1
+        last = self.empties[games, self.num_empty[games]]
+        self.empties[games, index] = last
+        self.empty_index[games, last] = index
+        self.empty_index[games, points] = -1
+
+    def _add_empty(self, games, points):
+        # games in ascending order, a game once for each of its points
+        unique, first, counts = np.unique(games, return_index=True, return_counts=True)
+        index = self.num_empty[games] + np.arange(len(games)) - np.repeat(first, counts)
+        self.empties[games, index] = points
+        self.empty_index[games, points] = index
+        self.num_empty[unique] += counts
+
+    def _place_stones(self, games, points):
+        colors = self.colors
+        parent = self.parent
+        liberties = self.liberties
+        color = self.next_color[games]
+
+        self._take_empty(games, points)
+        neighbors = points + self.offsets[:, None]
+        neighbor_colors = colors[games, neighbors]
+        roots = self._find(games, neighbors)
+        colors[games, points] = color
+
+        stones = (neighbor_colors == 1) | (neighbor_colors == 2)
+        friends = neighbor_colors == color
+        for d in range(4):
+            # each game appears once per direction, so no updates collide
+            liberties[games[stones[d]], roots[d, stones[d]]] -= 1
+            for other in range(d):
+                friends[d] &= roots[d] != roots[other]
+
+        # the stone and the strings it joins hang off the first of them
+        joining = friends.any(axis=0)
+        root = np.where(joining, roots[friends.argmax(axis=0), np.arange(len(games))], points)
+        joined = np.where(friends, liberties[games, roots], 0).sum(axis=0)
+        parent[games, points] = root
+        for d in range(4):
+            parent[games[friends[d]], roots[d, friends[d]]] = root[friends[d]]
+        liberties[games, root] = (neighbor_colors == EMPTY).sum(axis=0) + joined
+
+        enemies = (neighbor_colors == 3 - color) & (liberties[games, roots] == 0)
+        self.ko[games] = -1
+        capturing = np.flatnonzero(enemies.any(axis=0))
+        if len(capturing):
+            captured_games = games[capturing]
+            string_roots = parent[captured_games]
+            while True:
+                up = np.take_along_axis(string_roots, string_roots, axis=1)
+                if (up == string_roots).all():
+                    break
+                string_roots = up
+            parent[captured_games] = string_roots
+
+            captured = np.zeros(string_roots.shape, dtype=bool)
+            for d in range(4):
+                captured |= string_roots == np.where(enemies[d, capturing], roots[d, capturing], -1)[:, None]
+
+            captured_rows, stones = np.nonzero(captured)
+            captured_games = captured_games[captured_rows]
+            colors[captured_games, stones] = EMPTY
+            parent[captured_games, stones] = stones
+            self._add_empty(captured_games, stones)
+
+            for offset in self.offsets:
+                neighbor = stones + offset
+                next_to = (colors[captured_games, neighbor] == 1) | (colors[captured_games, neighbor] == 2)
+                np.add.at(liberties, (captured_games[next_to],
+                                      self._find(captured_games[next_to], neighbor[next_to])), 1)
+
+            # ko: one stone taken by a lone stone left with a single liberty
+            num_captured = np.bincount(captured_rows, minlength=len(capturing))
+            lone = ~joining[capturing] & (liberties[games[capturing], points[capturing]] == 1)
+            single = np.flatnonzero((num_captured == 1) & lone)
+            self.ko[games[capturing[single]]] = stones[np.searchsorted(captured_rows, single)]
+
+        self.passes[games] = 0
+
+    def step(self):
+        games = np.flatnonzero(self.is_active())
+        choice = self._choose(games)
+        playing = choice >= 0
+
+        passing = games[~playing]
+        self.passes[passing] += 1
+        self.ko[passing] = -1
+
+        if playing.any():
+            self._place_stones(games[playing], choice[playing])
+
+        self.next_color[games] = 3 - self.next_color[games]
+
+    def play_out(self, max_moves=None):
+        if max_moves is None:
+            max_moves = 3 * self.num_rows * self.num_cols
+
+        for _ in range(max_moves):
+            if not self.is_active().any():
+                break
+            self.step()
+
+    def results(self, komi=7.5):
+        # area scores of the final positions
+        shape = (self.num_games, self.num_rows + 2, self.num_cols + 2)
+        boards = self.colors.reshape(shape)[:, 1:-1, 1:-1]
+        return [area_result(territory_status(board), komi) for board in boards]
+
+
+def simulate_random_games(game_states, komi=7.5, max_moves=None):
+    """Winners of random games played out from each of game_states together.
+
+    All the game states must have the same board size. The games are played
+    on a RolloutBatch, so the cost of each move is shared between them.
+    """
+    batch = RolloutBatch(game_states)
+    batch.play_out(max_moves)
+
+    return [winner if winner is not None else result.winner
+            for winner, result in zip(batch.winners, batch.results(komi))]
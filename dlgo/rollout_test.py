@@ -0,0 +1,105 @@
+import random
+import unittest
+
+import numpy as np
+
+from dlgo import scoring
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Player, Point
+from dlgo.rollout import RolloutBatch, RolloutBoard, simulate_random_game, simulate_random_games
+
+
+class RolloutBoardTest(unittest.TestCase):
+    def test_matches_game_state(self):
+        rng = random.Random(0)
+        game = GameState.new_game(7)
+        board = RolloutBoard.from_game_state(game)
+        stride = board.stride
+
+        while not game.is_over():
+            color = game.next_player.value
+            playable = np.zeros((7, 7), dtype=bool)
+            for point in board.empties:
+                playable[point // stride - 1, point % stride - 1] = \
+                    not board.is_eye(color, point) and board.is_legal(color, point)
+            self.assertTrue((game.legal_mask(exclude_eyes=True) == playable).all())
+
+            candidates = np.flatnonzero(playable).tolist()
+            if candidates:
+                row, col = divmod(rng.choice(candidates), 7)
+                board.place_stone(color, (row + 1) * stride + col + 1)
+                game = game.apply_move(Move.play(Point(row + 1, col + 1)))
+            else:
+                game = game.apply_move(Move.pass_turn())
+
+            colors = np.array(board.colors).reshape(9, stride)[1:-1, 1:-1]
+            self.assertTrue((scoring.board_colors(game.board) == colors).all())
+
+        result = scoring.compute_game_result(game)
+        self.assertEqual((result.b, result.w), board.area_score())
+
+    def test_ko(self):
+        game = GameState.new_game(5)
+        for point in [Point(1, 2), Point(1, 3), Point(2, 1), Point(2, 4), Point(3, 2), Point(3, 3),
+                      Point(5, 5), Point(2, 2)]:
+            game = game.apply_move(Move.play(point))
+        # black takes the ko
+        game = game.apply_move(Move.play(Point(2, 3)))
+
+        board = RolloutBoard.from_game_state(game)
+        self.assertEqual(2 * board.stride + 2, board.ko)
+        self.assertFalse(board.is_legal(Player.white.value, board.ko))
+
+
+class RolloutBatchTest(unittest.TestCase):
+    def test_matches_rollout_board(self):
+        np.random.seed(0)
+        game = GameState.new_game(7)
+        games = [game, game.apply_move(Move.play(Point(4, 4))), game.apply_move(Move.pass_turn())]
+        batch = RolloutBatch(games)
+        boards = [RolloutBoard.from_game_state(game) for game in games]
+
+        while batch.is_active().any():
+            colors = batch.colors.copy()
+            next_color = batch.next_color.copy()
+            active = batch.is_active()
+            batch.step()
+
+            for i, board in enumerate(boards):
+                if not active[i]:
+                    continue
+                color = int(next_color[i])
+                placed = np.flatnonzero((colors[i] == 0) & (batch.colors[i] != 0)).tolist()
+                if placed:
+                    self.assertFalse(board.is_eye(color, placed[0]))
+                    self.assertTrue(board.is_legal(color, placed[0]))
+                    board.place_stone(color, placed[0])
+                else:
+                    self.assertFalse([point for point in board.empties
+                                      if not board.is_eye(color, point) and board.is_legal(color, point)])
+                    board.ko = -1
+                self.assertEqual(board.colors, batch.colors[i].tolist())
+                self.assertEqual(board.ko, batch.ko[i])
+
+        for board, result in zip(boards, batch.results()):
+            self.assertEqual(board.area_score(), (result.b, result.w))
+
+
+class SimulateRandomGameTest(unittest.TestCase):
+    def test_simulate_random_game(self):
+        game = GameState.new_game(9)
+        self.assertIn(simulate_random_game(game), (Player.black, Player.white))
+
+        game = game.apply_move(Move.pass_turn()).apply_move(Move.pass_turn())
+        self.assertEqual(Player.white, simulate_random_game(game))
+
+    def test_simulate_random_games(self):
+        game = GameState.new_game(9)
+        over = game.apply_move(Move.pass_turn()).apply_move(Move.pass_turn())
+        winners = simulate_random_games([game, over, game])
+        self.assertEqual(3, len(winners))
+        self.assertEqual(Player.white, winners[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
 from __future__ import absolute_import
 from collections import namedtuple
+
+import numpy as np
+
 from dlgo.gotypes import Player
 from dlgo.gotypes import Point
 
@@ -25,6 +28,18 @@ class Territory:
                 self.num_dame += 1
                 self.dame_points.append(point)
 
+    @classmethod
+    def from_status(cls, status):
+        # from a territory_status array
+        territory = cls({})
+        territory.num_black_stones = np.count_nonzero(status == Player.black.value)
+        territory.num_white_stones = np.count_nonzero(status == Player.white.value)
+        territory.num_black_territory = np.count_nonzero(status == BLACK_TERRITORY)
+        territory.num_white_territory = np.count_nonzero(status == WHITE_TERRITORY)
+        territory.num_dame = np.count_nonzero(status == DAME)
+        territory.dame_points = [Point(row=r + 1, col=c + 1) for r, c in np.argwhere(status == DAME).tolist()]
+        return territory
+
 
 class GameResult(namedtuple('GameResult', 'b w komi')):
     @property
@@ -45,74 +60,193 @@ class GameResult(namedtuple('GameResult', 'b w komi')):
         return 'W+%.1f' % (w - self.b,)
 
 
-""" evaluate_territory:
-Map a board into territory and dame.
+# point status in the arrays territory_status returns; stones keep their
+# Player value
+BLACK_TERRITORY = 3
+WHITE_TERRITORY = 4
+DAME = 5
 
-Any points that are completely surrounded by a single color are
-counted as territory; it makes no attempt to identify even
-trivially dead groups.
-"""
+edge_tables = {}
 
 
-def evaluate_territory(board):
+def board_colors(board):
+    # (num_rows, num_cols) int8 array of Player values, 0 where empty
+    if hasattr(board, 'colors'):
+        return board.colors()
 
-    status = {}
-    for r in range(1, board.num_rows + 1):
-        for c in range(1, board.num_cols + 1):
-            p = Point(row=r, col=c)
-            if p in status:
-                continue
-            stone = board.get(p)
+    colors = np.zeros((board.num_rows, board.num_cols), dtype=np.int8)
+    for r in range(board.num_rows):
+        for c in range(board.num_cols):
+            stone = board.get(Point(row=r + 1, col=c + 1))
             if stone is not None:
-                status[p] = board.get(p)
-            else:
-                group, neighbors = _collect_region(p, board)
-                if len(neighbors) == 1:
-                    neighbor_stone = neighbors.pop()
-                    stone_str = 'b' if neighbor_stone == Player.black else 'w'
-                    fill_with = 'territory_' + stone_str
-                else:
-                    fill_with = 'dame'
-                for pos in group:
-                    status[pos] = fill_with
-    return Territory(status)
-
-
-""" _collect_region:
-
-Find the contiguous section of a board containing a point. Also
-identify all the boundary points.
-"""
-
-
-def _collect_region(start_pos, board, visited=None):
-
-    if visited is None:
-        visited = {}
-    if start_pos in visited:
-        return [], set()
-    all_points = [start_pos]
-    all_borders = set()
-    visited[start_pos] = True
-    here = board.get(start_pos)
-    deltas = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    for delta_r, delta_c in deltas:
-        next_p = Point(start_pos.row + delta_r, start_pos.col + delta_c)
-        if not board.is_on_grid(next_p):
-            continue
-        neighbor = board.get(next_p)
-        if neighbor == here:
-            points, borders = _collect_region(next_p, board, visited)
-            all_points += points
-            all_borders |= borders
-        else:
-            all_borders.add(neighbor)
-    return all_points, all_borders
+                colors[r, c] = stone.value
+    return colors
+
+
+def _edges(num_rows, num_cols):
+    # flat indices of the two ends of every pair of adjacent points
+    dim = (num_rows, num_cols)
+    if dim not in edge_tables:
+        index = np.arange(num_rows * num_cols).reshape(dim)
+        ends_a = np.concatenate([index[:, :-1].ravel(), index[:-1, :].ravel()])
+        ends_b = np.concatenate([index[:, 1:].ravel(), index[1:, :].ravel()])
+        edge_tables[dim] = ends_a, ends_b
+    return edge_tables[dim]
+
+
+def _adjacent(mask):
+    # points next to any point of a boolean (num_rows, num_cols) mask
+    adjacent = np.zeros_like(mask)
+    adjacent[1:, :] |= mask[:-1, :]
+    adjacent[:-1, :] |= mask[1:, :]
+    adjacent[:, 1:] |= mask[:, :-1]
+    adjacent[:, :-1] |= mask[:, 1:]
+    return adjacent
+
+
+def _may_split(empty, row, col):
+    # whether filling an empty point can split its region: it can't if its
+    # empty neighbours are joined through the empty corners between them
+    num_rows, num_cols = empty.shape
+    ring = [0 <= r < num_rows and 0 <= c < num_cols and empty[r, c] for r, c in (
+        (row - 1, col), (row - 1, col + 1), (row, col + 1), (row + 1, col + 1),
+        (row + 1, col), (row + 1, col - 1), (row, col - 1), (row - 1, col - 1))]
+    links = sum(1 for i in range(0, 8, 2) if ring[i] and ring[i + 1] and ring[(i + 2) % 8])
+    return sum(ring[0::2]) - links > 1
+
+
+def label_regions(mask):
+    """Connected components of a boolean (num_rows, num_cols) mask.
+
+    Every point of the mask is labelled with the smallest flat index in its
+    component, every other point with -1. Labels spread along the edges
+    between masked points and then jump to the label of their label, so it
+    takes a handful of array passes rather than one step per point.
+    """
+    ends_a, ends_b = _edges(*mask.shape)
+    flat = mask.ravel()
+    inside = flat[ends_a] & flat[ends_b]
+    ends_a, ends_b = ends_a[inside], ends_b[inside]
+    labels = np.where(flat, np.arange(flat.size), -1)
+
+    while True:
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, ends_a, labels[ends_b])
+        np.minimum.at(new_labels, ends_b, labels[ends_a])
+        new_labels[flat] = new_labels[new_labels[flat]]
+        if (new_labels == labels).all():
+            return labels.reshape(mask.shape)
+        labels = new_labels
+
+
+def territory_status(colors, labels=None):
+    """Map a board into stones, territory and dame.
+
+    colors is a board_colors array, labels the label_regions of its empty
+    points if already known. Any points that are completely surrounded by a
+    single color are counted as territory; it makes no attempt to identify
+    even trivially dead groups.
+    """
+    empty = colors == 0
+    if labels is None:
+        labels = label_regions(empty)
+
+    size = colors.size
+    touches_black = np.bincount(labels[empty & _adjacent(colors == Player.black.value)], minlength=size) > 0
+    touches_white = np.bincount(labels[empty & _adjacent(colors == Player.white.value)], minlength=size) > 0
+
+    region = labels[empty]
+    status = colors.copy()
+    status[empty] = np.where(touches_black[region] & ~touches_white[region], BLACK_TERRITORY,
+                             np.where(touches_white[region] & ~touches_black[region], WHITE_TERRITORY, DAME))
+    return status
 
 
-def compute_game_result(game_state):
-    territory = evaluate_territory(game_state.board)
+def evaluate_territory(board):
+    return Territory.from_status(territory_status(board_colors(board)))
+
+
+class AreaScore:
+    """Area score of a game kept up to date as stones are placed and captured.
+
+    Call update() with each new game state. Empty regions are only labelled
+    again where the changes since the last update can have split or joined
+    them; the rest keep their labels.
+    """
+    def __init__(self, board, komi=7.5):
+        self.komi = komi
+        self._hash = board.zobrist_hash()
+        self._colors = board_colors(board)
+        self._labels = label_regions(self._colors == 0)
+        self._status = territory_status(self._colors, self._labels)
+
+    def _next_colors(self, game_state):
+        # worked out from the last move when the previous state is the one
+        # scored last, otherwise read off the board
+        previous = game_state.previous_state
+        if previous is None or previous.board.zobrist_hash() != self._hash:
+            return board_colors(game_state.board)
+
+        colors = self._colors
+        move = game_state.last_move
+        if move.is_play:
+            colors = colors.copy()
+            colors[move.point.row - 1, move.point.col - 1] = previous.next_player.value
+            for neighbor in move.point.neighbors():
+                if game_state.board.is_on_grid(neighbor) and game_state.board.get(neighbor) is None \
+                        and colors[neighbor.row - 1, neighbor.col - 1]:
+                    for stone in previous.board.get_go_string(neighbor).stones:
+                        colors[stone.row - 1, stone.col - 1] = 0
+        return colors
+
+    def update(self, game_state):
+        colors = self._next_colors(game_state)
+        changed = colors != self._colors
+        self._hash = game_state.board.zobrist_hash()
+
+        if changed.any():
+            empty = colors == 0
+            emptied = changed & empty
+            labels = np.where(empty, self._labels, -1)
+
+            # captured points join the regions around them
+            dirty = emptied.copy()
+            if emptied.any():
+                regions = np.unique(self._labels[_adjacent(emptied) & (self._labels >= 0)])
+                dirty |= np.isin(labels, regions)
+
+            # a new stone can split the region it was played in
+            flat = labels.ravel()
+            for point in np.flatnonzero(changed & ~empty & (self._labels >= 0)).tolist():
+                region = self._labels.flat[point]
+                row, col = divmod(point, colors.shape[1])
+                if _may_split(empty, row, col):
+                    dirty |= labels == region
+                elif region == point:
+                    # the region was labelled by the point just filled
+                    remaining = np.flatnonzero(flat == region)
+                    flat[remaining] = remaining[:1]
+
+            if dirty.any():
+                labels[dirty] = label_regions(dirty)[dirty]
+
+            self._colors = colors
+            self._labels = labels
+            self._status = territory_status(colors, labels)
+
+        return self.result()
+
+    def result(self):
+        return area_result(self._status, self.komi)
+
+
+def area_result(status, komi=7.5):
+    # GameResult of a territory_status array: stones plus territory
     return GameResult(
-        territory.num_black_territory + territory.num_black_stones,
-        territory.num_white_territory + territory.num_white_stones,
-        komi=7.5)
+        np.count_nonzero((status == Player.black.value) | (status == BLACK_TERRITORY)),
+        np.count_nonzero((status == Player.white.value) | (status == WHITE_TERRITORY)),
+        komi=komi)
+
+
+def compute_game_result(game_state):
+    return area_result(territory_status(board_colors(game_state.board)))
@@ -0,0 +1,54 @@
+import random
+import unittest
+
+import numpy as np
+
+from dlgo import scoring
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Player, Point
+
+
+class ScoringTest(unittest.TestCase):
+    def test_territory(self):
+        # .b.w.
+        # bb.ww
+        # .....
+        game = GameState.new_game(5)
+        for point in [Point(1, 2), Point(1, 4), Point(2, 1), Point(2, 4), Point(2, 2), Point(2, 5)]:
+            game = game.apply_move(Move.play(point))
+
+        territory = scoring.evaluate_territory(game.board)
+        self.assertEqual((3, 3), (territory.num_black_stones, territory.num_white_stones))
+        self.assertEqual((1, 1), (territory.num_black_territory, territory.num_white_territory))
+        self.assertEqual(17, territory.num_dame)
+        self.assertIn(Point(1, 3), territory.dame_points)
+        self.assertEqual(scoring.GameResult(4, 4, komi=7.5), scoring.compute_game_result(game))
+
+    def test_label_regions(self):
+        mask = np.array([[1, 0, 1],
+                         [1, 0, 1],
+                         [1, 1, 0]], dtype=bool)
+        expected = [[0, -1, 2],
+                    [0, -1, 2],
+                    [0, 0, -1]]
+        self.assertEqual(expected, scoring.label_regions(mask).tolist())
+
+    def test_area_score_matches_full_scoring(self):
+        random.seed(6)
+
+        for board_type in ('fast', 'bitboard'):
+            game = GameState.new_game(9, board_type)
+            area_score = scoring.AreaScore(game.board)
+
+            while not game.is_over():
+                game = game.apply_move(random.choice([move for move in game.legal_moves() if not move.is_resign]))
+                self.assertEqual(scoring.compute_game_result(game), area_score.update(game))
+
+            # states that don't follow the last one scored are read off the board
+            other = GameState.new_game(9, board_type).apply_move(Move.play(Point(5, 5)))
+            self.assertEqual(scoring.GameResult(81, 0, komi=7.5), area_score.update(other))
+            self.assertEqual(Player.black, area_score.result().winner)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import time
+
+import numpy as np
+
+from dlgo.gotypes import Player
+
+__all__ = ['Clock', 'TimeManager', 'SearchBudget']
+
+
+class Clock:
+    """One player's clock under GTP time settings (Canadian byo-yomi).
+
+    time_left is the main time left while stones_left is 0, then the time
+    left in the current byo-yomi period for stones_left more stones.
+    """
+    def __init__(self, main_time, byo_yomi_time=0, byo_yomi_stones=0):
+        self.byo_yomi_time = byo_yomi_time
+        self.byo_yomi_stones = byo_yomi_stones
+        # GTP: byo-yomi time without stones means no time limit
+        self.unlimited = byo_yomi_time > 0 and byo_yomi_stones == 0
+
+        if main_time > 0 or byo_yomi_stones == 0:
+            self.time_left, self.stones_left = main_time, 0
+        else:
+            self.time_left, self.stones_left = byo_yomi_time, byo_yomi_stones
+
+    def set(self, time_left, stones_left):
+        self.time_left = time_left
+        self.stones_left = stones_left
+
+    def record_move(self, seconds):
+        # what a move that took seconds leaves on the clock
+        self.time_left -= seconds
+
+        if self.stones_left == 0:
+            if self.time_left <= 0 and self.byo_yomi_stones > 0:
+                self.time_left, self.stones_left = self.byo_yomi_time + self.time_left, self.byo_yomi_stones
+        else:
+            self.stones_left -= 1
+            if self.stones_left == 0:
+                self.time_left, self.stones_left = self.byo_yomi_time, self.byo_yomi_stones
+
+
+class TimeManager:
+    """Seconds to spend on the next move.
+
+    move_time caps every move. Once the time settings are known, the clock
+    of the player to move is split over the moves it still has to make:
+    main time over the moves expected until the end of the game, at least
+    min_moves_left of them, and a byo-yomi period over its stones. lag is
+    kept back for the time it takes to answer.
+    """
+    def __init__(self, move_time=None, game_length=0.7, min_moves_left=20, lag=0.5):
+        self.move_time = move_time
+        # expected game length, in moves per point of the board
+        self.game_length = game_length
+        self.min_moves_left = min_moves_left
+        self.lag = lag
+        self.clocks = {}
+
+    def set_time_settings(self, main_time, byo_yomi_time=0, byo_yomi_stones=0):
+        self.clocks = {player: Clock(main_time, byo_yomi_time, byo_yomi_stones) for player in Player}
+
+    def set_time_left(self, player, time_left, stones_left):
+        if player in self.clocks:
+            self.clocks[player].set(time_left, stones_left)
+
+    def record_move(self, player, seconds):
+        if player in self.clocks:
+            self.clocks[player].record_move(seconds)
+
+    def moves_left(self, game_state):
+        # the moves of the player to move until the end of the game
+        board = game_state.board
+        game_length = self.game_length * board.num_rows * board.num_cols
+
+        return max(self.min_moves_left, (game_length - game_state.depth) / 2)
+
+    def budget(self, game_state):
+        clock = self.clocks.get(game_state.next_player)
+        if clock is None or clock.unlimited:
+            return self.move_time
+
+        if clock.stones_left == 0:
+            seconds = clock.time_left / self.moves_left(game_state)
+            if clock.byo_yomi_stones > 0:
+                seconds = max(seconds, clock.byo_yomi_time / clock.byo_yomi_stones)
+        else:
+            seconds = clock.time_left / clock.stones_left
+        seconds = max(seconds - self.lag, seconds / 10)
+
+        return min(seconds, self.move_time) if self.move_time is not None else seconds
+
+
+class SearchBudget:
+    """Rounds and time left for one search.
+
+    A search is over after num_rounds rounds or once seconds have passed,
+    but plays at least one round even when the clock has run out, so there
+    is always a move to choose.
+    With stop_when_decided it stops as soon as the most visited move can
+    no longer be overtaken by another in the rounds left, estimated from
+    the rounds per second so far when the time is limited.
+    """
+    def __init__(self, num_rounds, seconds=None, stop_when_decided=False):
+        self.num_rounds = num_rounds
+        self.rounds_left = num_rounds
+        self.rounds_played = 0
+        self.start = time.perf_counter()
+        self.deadline = self.start + seconds if seconds is not None else None
+        self.stop_when_decided = stop_when_decided
+
+    def reserve(self, num_rounds):
+        # rounds to start now, up to num_rounds
+        num_rounds = min(num_rounds, self.rounds_left)
+        self.rounds_left -= num_rounds
+        return num_rounds
+
+    def finish(self, reserved, played):
+        # reserved rounds that were not played are left for later
+        self.rounds_left += reserved - played
+        self.rounds_played += played
+
+    def rounds_in_time_left(self):
+        if self.deadline is None:
+            return self.rounds_left
+
+        if self.rounds_played == 0:
+            return self.rounds_left
+
+        now = time.perf_counter()
+        rate = self.rounds_played / max(now - self.start, 1e-9)
+
+        return min(self.rounds_left, int(rate * (self.deadline - now)))
+
+    def is_over(self, visit_counts=None):
+        if self.rounds_left <= 0:
+            return True
+        if self.rounds_played == 0:
+            return False
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return True
+
+        return self.stop_when_decided and visit_counts is not None and \
+            is_decided(visit_counts, self.rounds_in_time_left())
+
+
+def is_decided(visit_counts, rounds_left):
+    # whether no move can catch up with the most visited one in rounds_left
+    # more rounds, even if they all go to the runner-up
+    visit_counts = np.asarray(visit_counts)
+    if len(visit_counts) < 2:
+        return len(visit_counts) == 1
+
+    second, best = np.partition(visit_counts, -2)[-2:]
+    return best - second > rounds_left
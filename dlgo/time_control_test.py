@@ -0,0 +1,99 @@
+import unittest
+
+from dlgo.goboard_fast import GameState
+from dlgo.gotypes import Player
+from dlgo.time_control import Clock, SearchBudget, TimeManager, is_decided
+
+
+class ClockTest(unittest.TestCase):
+    def test_main_time_runs_into_byo_yomi(self):
+        clock = Clock(10, 30, 5)
+        clock.record_move(8)
+        self.assertEqual((2, 0), (clock.time_left, clock.stones_left))
+        clock.record_move(4)
+        self.assertEqual((28, 5), (clock.time_left, clock.stones_left))
+
+    def test_byo_yomi_period_starts_over_after_its_stones(self):
+        clock = Clock(0, 30, 2)
+        clock.record_move(10)
+        self.assertEqual((20, 1), (clock.time_left, clock.stones_left))
+        clock.record_move(10)
+        self.assertEqual((30, 2), (clock.time_left, clock.stones_left))
+
+    def test_byo_yomi_without_stones_is_no_limit(self):
+        self.assertTrue(Clock(0, 1, 0).unlimited)
+
+
+class TimeManagerTest(unittest.TestCase):
+    def test_move_time_without_a_clock(self):
+        game = GameState.new_game(9)
+        self.assertIsNone(TimeManager().budget(game))
+        self.assertEqual(2.0, TimeManager(move_time=2.0).budget(game))
+
+    def test_main_time_is_split_over_the_moves_left(self):
+        manager = TimeManager(lag=0)
+        manager.set_time_settings(600)
+        game = GameState.new_game(19)
+
+        # 0.7 * 361 moves for the game, half of them ours
+        self.assertAlmostEqual(600 / (0.7 * 361 / 2), manager.budget(game))
+        manager.set_time_left(Player.black, 100, 0)
+        self.assertAlmostEqual(100 / (0.7 * 361 / 2), manager.budget(game))
+
+    def test_late_in_the_game_keeps_a_reserve(self):
+        manager = TimeManager(lag=0, min_moves_left=20)
+        manager.set_time_settings(100)
+        game = GameState.new_game(9)
+        game.depth = 200
+
+        self.assertAlmostEqual(5.0, manager.budget(game))
+
+    def test_byo_yomi_period_is_split_over_its_stones(self):
+        manager = TimeManager(lag=1, move_time=10)
+        manager.set_time_settings(0, 60, 10)
+        game = GameState.new_game(9)
+
+        self.assertAlmostEqual(5.0, manager.budget(game))
+        manager.set_time_left(Player.black, 30, 1)
+        self.assertAlmostEqual(10, manager.budget(game))
+
+
+class SearchBudgetTest(unittest.TestCase):
+    def test_rounds(self):
+        budget = SearchBudget(10)
+        self.assertEqual(8, budget.reserve(8))
+        budget.finish(8, 6)
+        self.assertFalse(budget.is_over())
+        self.assertEqual(4, budget.reserve(8))
+        budget.finish(4, 4)
+        self.assertTrue(budget.is_over())
+
+    def test_time(self):
+        self.assertFalse(SearchBudget(10, seconds=60).is_over())
+        budget = SearchBudget(10, seconds=0)
+        budget.finish(budget.reserve(1), 1)
+        self.assertTrue(budget.is_over())
+
+    def test_at_least_one_round_without_time(self):
+        budget = SearchBudget(10, seconds=0)
+        self.assertFalse(budget.is_over())
+        self.assertEqual(1, budget.reserve(1))
+        budget.finish(1, 0)
+        self.assertFalse(budget.is_over())
+
+    def test_stop_when_decided(self):
+        budget = SearchBudget(10, stop_when_decided=True)
+        budget.finish(budget.reserve(8), 8)
+        self.assertFalse(budget.is_over([5, 3, 0]))
+        self.assertTrue(budget.is_over([6, 2, 0]))
+        self.assertFalse(SearchBudget(10).is_over([6, 2, 0]))
+
+    def test_is_decided(self):
+        self.assertTrue(is_decided([7, 2, 1], 4))
+        self.assertFalse(is_decided([7, 3, 1], 4))
+        self.assertTrue(is_decided([1], 100))
+        self.assertFalse(is_decided([], 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import collections
+
+__all__ = ['TranspositionTable']
+
+
+class TranspositionTable:
+    """Search tree nodes by position, for sharing between move orders.
+
+    Nodes are keyed by (next player, board hash). The table holds at most
+    capacity nodes and evicts the least recently used one. A node is only
+    handed out for a position reached after the same number of moves as
+    its own, so the edges it adds always lead one move deeper and the search
+    graph cannot loop. Only positions reached by a play are shared: after
+    a pass or resignation the board alone doesn't tell if the game is over.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._nodes = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(game_state):
+        return game_state.next_player, game_state.board.zobrist_hash()
+
+    @staticmethod
+    def is_shared(game_state):
+        return game_state.last_move is None or game_state.last_move.is_play
+
+    def get(self, game_state):
+        if not self.is_shared(game_state):
+            return None
+
+        key = self.key(game_state)
+        entry = self._nodes.get(key)
+
+        if entry is None or entry[0] != game_state.depth:
+            self.misses += 1
+            return None
+
+        self._nodes.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, game_state, node):
+        if not self.is_shared(game_state):
+            return
+
+        key = self.key(game_state)
+        self._nodes[key] = (game_state.depth, node)
+        self._nodes.move_to_end(key)
+
+        while len(self._nodes) > self.capacity:
+            self._nodes.popitem(last=False)
+
+    def __len__(self):
+        return len(self._nodes)
@@ -0,0 +1,53 @@
+import unittest
+
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+from dlgo.transposition import TranspositionTable
+
+
+def play(*points):
+    game = GameState.new_game(5)
+    for point in points:
+        game = game.apply_move(Move.play(point) if point is not None else Move.pass_turn())
+    return game
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_move_orders_share_a_node(self):
+        table = TranspositionTable(10)
+        table.put(play(Point(1, 1), Point(2, 2), Point(3, 3)), 'node')
+
+        self.assertEqual('node', table.get(play(Point(3, 3), Point(2, 2), Point(1, 1))))
+        self.assertIsNone(table.get(play(Point(3, 3), Point(1, 1), Point(2, 2))))
+        self.assertEqual((1, 1), (table.hits, table.misses))
+
+    def test_same_position_after_a_different_number_of_moves(self):
+        table = TranspositionTable(10)
+        table.put(play(Point(1, 1)), 'node')
+
+        self.assertIsNone(table.get(play(None, None, Point(1, 1))))
+
+    def test_positions_after_a_pass_or_resignation_are_not_shared(self):
+        table = TranspositionTable(10)
+        table.put(play(Point(1, 1), None), 'passed')
+        table.put(play(Point(1, 1)).apply_move(Move.resign()), 'resigned')
+
+        self.assertEqual(0, len(table))
+        self.assertIsNone(table.get(play(None, Point(1, 1), None, None)))
+
+    def test_least_recently_used_is_evicted(self):
+        table = TranspositionTable(2)
+        first, second, third = play(Point(1, 1)), play(Point(1, 2)), play(Point(1, 3))
+        table.put(first, 1)
+        table.put(second, 2)
+        table.get(first)
+        table.put(third, 3)
+
+        self.assertEqual(2, len(table))
+        self.assertEqual(1, table.get(first))
+        self.assertIsNone(table.get(second))
+        self.assertEqual(3, table.get(third))
+
+
+if __name__ == '__main__':
+    unittest.main()
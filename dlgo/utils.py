@@ -46,17 +46,48 @@ def coords_from_point(point):
 
 
 class MoveAge:
+    """Age of every stone on a board, in stones placed since it was played.
+
+    Only the move number each stone was placed at is stored (-1 for empty
+    points), so placing a stone touches a single entry and the ages are
+    worked out from the current move number when asked for. Entries are
+    kept in one tuple per row; copies share the tuples, and a move replaces
+    only the row it changes.
+    """
     def __init__(self, board):
-        self.move_ages = -np.ones((board.num_rows, board.num_cols))
+        self.move_number = 0
+        self.placed_at = [(-1,) * board.num_cols] * board.num_rows
 
     def get(self, row, col):
-        return self.move_ages[row, col]
+        placed_at = self.placed_at[row][col]
+        return self.move_number - placed_at if placed_at > -1 else -1
+
+    def ages(self):
+        # ages of all points at once, -1 where there is no stone
+        placed_at = np.array(self.placed_at, dtype=np.int16)
+        return np.where(placed_at > -1, self.move_number - placed_at, -1)
+
+    def _set(self, point, placed_at):
+        row = self.placed_at[point.row - 1]
+        self.placed_at[point.row - 1] = row[:point.col - 1] + (placed_at,) + row[point.col:]
 
     def reset_age(self, point):
-        self.move_ages[point.row - 1, point.col - 1] = -1
+        self._set(point, -1)
 
     def add(self, point):
-        self.move_ages[point.row - 1, point.col - 1] = 0
+        # the stone at point is the newest one, all others get one move older
+        self.move_number += 1
+        self._set(point, self.move_number)
+
+    def __deepcopy__(self, memodict=None):
+        copied = MoveAge.__new__(MoveAge)
+        copied.move_number = self.move_number
+        copied.placed_at = list(self.placed_at)
+
+        return copied
+
+    def snapshot(self):
+        return self.move_number, list(self.placed_at)
 
-    def increment_all(self):
-        self.move_ages[self.move_ages > -1] += 1
+    def restore(self, snapshot):
+        self.move_number, self.placed_at = snapshot
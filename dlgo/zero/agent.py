@@ -1,35 +1,65 @@
+import contextlib
+import threading
+
 import numpy as np
 from keras.optimizers import SGD
 from dlgo import kerasutil
 from dlgo.agent import Agent
+from dlgo.goboard_fast import GameState, Move, get_grid
 from dlgo.encoders import get_encoder_by_name
+from dlgo.time_control import SearchBudget
+from dlgo.transposition import TranspositionTable
 from dlgo.zero.encoder import ZeroEncoder
 
 
-class Branch:
-    def __init__(self, prior):
-        self.prior = prior
-        self.visit_count = 0
-        self.total_value = 0.
+def same_move(move, other):
+    # Move == Move, where either may be None at the start of a game
+    if move is None or other is None:
+        return move is other
+    return move == other
 
 
 class ZeroTreeNode:
+    """A position in the search tree with the statistics of its branches.
+
+    Priors, visit counts and total values are arrays indexed like the
+    encoder's moves: point (row, col) at (row - 1) * num_cols + col - 1 and
+    the pass after the points. legal marks the moves that are branches.
+    """
     def __init__(self, state, value, priors, parent, last_move):
         self.state = state
         self.value = value
         self.parent = parent
         self.last_move = last_move
         self.total_visit_count = 1
-        self.branches = {}
 
-        for move, p in priors.items():
-            if state.is_valid_move(move):
-                self.branches[move] = Branch(p)
+        board = state.board
+        self.num_cols = board.num_cols
+        self.num_points = board.num_rows * board.num_cols
+        self.legal = np.append(state.legal_mask().ravel(), not state.is_over())
+        self.priors = np.asarray(priors, dtype=np.float64)
+        # whether the priors have the Dirichlet noise of a search root
+        self.noised = False
+        self.visit_counts = np.zeros(len(self.legal), dtype=np.int64)
+        self.total_values = np.zeros(len(self.legal))
 
         self.children = {}
 
+    def index(self, move):
+        if move.is_pass:
+            return self.num_points
+        return (move.point.row - 1) * self.num_cols + move.point.col - 1
+
+    def move(self, index):
+        if index == self.num_points:
+            return Move.pass_turn()
+        return get_grid(self.num_points // self.num_cols, self.num_cols).moves[index]
+
     def moves(self):
-        return self.branches.keys()
+        return [self.move(index) for index in np.flatnonzero(self.legal).tolist()]
+
+    def has_branches(self):
+        return self.legal.any()
 
     def add_child(self, move, child_node):
         self.children[move] = child_node
@@ -41,115 +71,346 @@ class ZeroTreeNode:
         return self.children[move]
 
     def record_visit(self, move, value):
+        index = self.index(move)
         self.total_visit_count += 1
-        self.branches[move].visit_count += 1
-        self.branches[move].total_value += value
+        self.visit_counts[index] += 1
+        self.total_values[index] += value
+
+    def add_virtual_loss(self, move, loss):
+        # count a visit that lost while a search through move is in flight,
+        # so other searches prefer other branches until it is backed up
+        self.record_visit(move, -loss)
+
+    def remove_virtual_loss(self, move, loss):
+        index = self.index(move)
+        self.total_visit_count -= 1
+        self.visit_counts[index] -= 1
+        self.total_values[index] += loss
 
     def expected_value(self, move):
-        branch = self.branches[move]
+        index = self.index(move)
+
+        return self.total_values[index] / self.visit_counts[index] if self.visit_counts[index] > 0 else 0.0
 
-        return branch.total_value / branch.visit_count if branch.visit_count > 0 else 0.0
+    def expected_values(self):
+        # expected_value of every move at once
+        visited = np.maximum(self.visit_counts, 1)
+        return np.where(self.visit_counts > 0, self.total_values / visited, 0.0)
 
     def prior(self, move):
-        return self.branches[move].prior
+        return self.priors[self.index(move)]
 
     def visit_count(self, move):
-        if move in self.branches:
-            return self.branches[move].visit_count
-
-        return 0
+        if move.is_resign:
+            return 0
+        index = self.index(move)
+        return self.visit_counts[index] if self.legal[index] else 0
 
 
 class ZeroAgent(Agent):
-    def __init__(self, model, encoder, rounds_per_move=1600, c=2.0):
+    def __init__(self, model, encoder, rounds_per_move=1600, c=2.0, num_threads=1, virtual_loss=1.0, batch_size=1,
+                 reuse_tree=False, transposition_size=None, early_stop=False, resolved_value=None):
         super().__init__()
 
         self.model = model
         self.encoder = encoder
         self.num_rounds = rounds_per_move
         self.c = c
+        # simulations in flight at once, each on its own thread sharing the
+        # tree; the virtual loss steers them apart
+        self.num_threads = num_threads
+        self.virtual_loss = virtual_loss
+        # leaves each simulate() call selects and evaluates with one predict
+        self.batch_size = batch_size
+        # carry the subtree under the move played and the opponent's reply
+        # over to the next select_move, with its visits. Off by default, as
+        # the carried-over visits end up in the collected policy targets.
+        self.reuse_tree = reuse_tree
+        self.root = None
+        # nodes kept by position, so the move orders that lead to the same
+        # position share its statistics and network evaluation
+        self.transpositions = TranspositionTable(transposition_size) if transposition_size else None
+        self.evaluation_cache = None
+        self.time_manager = None
+        # stop a search once the rounds left can't change the most visited
+        # move, or once the best move's value is beyond +-resolved_value
+        self.early_stop = early_stop
+        self.resolved_value = resolved_value
+        # rounds played and saved by the last search, and saved in all
+        self.rounds_played = 0
+        self.rounds_saved = 0
+        self.total_rounds_saved = 0
 
         self.collector = None
 
     def select_move(self, game_state):
-        root = self.create_node(game_state)
-
-        for i in range(self.num_rounds):
-            node = root
-            next_move = self.select_branch(node)
-            while node.has_child(next_move):
-                node = node.get_child(next_move)
-                next_move = self.select_branch(node)
-
-            new_state = node.state.apply_move(next_move)
-            child_node = self.create_node(
-                new_state, parent=node)
-
-            move = next_move
-            value = -1 * child_node.value
-            while node is not None:
-                node.record_visit(move, value)
-                move = node.last_move
-                node = node.parent
-                value = -1 * value
+        root = self.find_subtree(game_state) if self.reuse_tree else None
+        if root is None:
+            root = self.create_node(game_state.search_root(), game_state.last_move)
+        else:
+            self.detach(root)
+            if not root.noised:
+                root.priors = self.add_noise(root.priors)
+                root.noised = True
+
+        budget = self.search_budget(game_state)
+        self.search(root, budget)
+        self.rounds_played = budget.rounds_played
+        self.rounds_saved = max(0, budget.num_rounds - budget.rounds_played)
+        self.total_rounds_saved += self.rounds_saved
+
+        # the root's visit counts are in the encoder's move order
+        visit_counts = np.where(root.legal, root.visit_counts, 0)
 
         if self.collector is not None:
             root_state_tensor = self.encoder.encode(game_state)
-            visit_counts = np.array([
-                root.visit_count(
-                    self.encoder.decode_move_index(idx))
-                for idx in range(self.encoder.num_moves())
-            ])
             self.collector.record_decision(
                 root_state_tensor, visit_counts)
 
-        root_state_tensor = self.encoder.encode(game_state)
-        visit_counts = np.array([
-            root.visit_count(
-                self.encoder.decode_move_index(idx))
-            for idx in range(self.encoder.num_moves())
-        ])
-
-        return max(root.moves(), key=root.visit_count)
+        self.root = root
+        return root.move(int(np.argmax(np.where(root.legal, visit_counts, -1))))
+
+    def can_ponder(self):
+        return True
+
+    def ponder(self, game_state, stop, max_rounds=None):
+        # keep searching the position after our move until stop is set, so
+        # the next select_move resumes from the subtree of the reply. The
+        # tree is only worth pondering on if it is kept, so this turns tree
+        # reuse on.
+        self.reuse_tree = True
+        if game_state.is_over():
+            return
+
+        root = self.find_subtree(game_state)
+        if root is None:
+            root = self.create_node(game_state.search_root(), game_state.last_move)
+        else:
+            self.detach(root)
+        self.root = root
+
+        num_rounds = 0
+        while not stop.is_set() and (max_rounds is None or num_rounds < max_rounds):
+            num_leaves = self.batch_size if max_rounds is None else min(self.batch_size, max_rounds - num_rounds)
+            num_rounds += self.simulate(root, num_leaves)
+
+    def find_subtree(self, game_state):
+        # the node of the last search tree at game_state: the old root, one
+        # of its children, or a reply to one of them. Positions are matched
+        # by side to move, board hash and the move that led there.
+        if self.root is None:
+            return None
+
+        situation = (game_state.next_player, game_state.board.zobrist_hash())
+        last_move = game_state.last_move
+        nodes = [self.root]
+        for _ in range(3):
+            for node in nodes:
+                if (node.state.next_player, node.state.board.zobrist_hash()) == situation and \
+                        same_move(node.last_move, last_move):
+                    return node
+            nodes = [child for node in nodes for child in node.children.values()]
+
+        return None
+
+    @staticmethod
+    def detach(root):
+        # make a node of the last tree the root of the next one; the
+        # positions of the rest of the old tree are forgotten
+        root.parent = None
+        nodes, kept = [root], {}
+        while nodes:
+            node = nodes.pop()
+            if id(node) not in kept:
+                kept[id(node)] = node
+                nodes.extend(node.children.values())
+
+        GameState.rebase_history(node.state for node in kept.values())
+
+    @staticmethod
+    def add_noise(priors):
+        # add Dirichlet noise to encourage exploration
+        noise = np.random.dirichlet(0.03 * np.ones_like(priors))
+        return 0.75 * priors + 0.25 * noise
+
+    def search_budget(self, game_state):
+        # num_rounds at most; with a time manager, no longer than the time
+        # it gives the move, and no longer than it takes to decide it
+        seconds = self.time_manager.budget(game_state) if self.time_manager is not None else None
+        return SearchBudget(self.num_rounds, seconds, stop_when_decided=self.early_stop or seconds is not None)
+
+    def search_is_over(self, root, budget):
+        return budget.is_over(root.visit_counts) or (self.early_stop and self.is_resolved(root))
+
+    def is_resolved(self, root):
+        # the game is won or lost whatever the search finds: the most
+        # visited move, with at least a tenth of the rounds, is worth more
+        # than resolved_value or less than -resolved_value
+        if self.resolved_value is None:
+            return False
+
+        best = int(np.argmax(root.visit_counts))
+        if root.visit_counts[best] < max(1, self.num_rounds // 10):
+            return False
+
+        return abs(root.total_values[best] / root.visit_counts[best]) >= self.resolved_value
+
+    def search(self, root, budget):
+        if self.num_threads > 1:
+            self.search_in_threads(root, budget)
+        else:
+            while not self.search_is_over(root, budget):
+                num_leaves = budget.reserve(self.batch_size)
+                budget.finish(num_leaves, self.simulate(root, num_leaves))
+
+    def search_in_threads(self, root, budget=None):
+        # tree-parallel search: selection and backup take turns on the
+        # tree, while leaves are evaluated by several threads at once
+        lock = threading.Lock()
+        budget = budget if budget is not None else SearchBudget(self.num_rounds)
+
+        def run():
+            while True:
+                with lock:
+                    if self.search_is_over(root, budget):
+                        return
+                    num_leaves = budget.reserve(self.batch_size)
+                played = self.simulate(root, num_leaves, lock)
+                with lock:
+                    budget.finish(num_leaves, played)
+
+        threads = [threading.Thread(target=run) for _ in range(self.num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def simulate(self, root, num_leaves=1, lock=None):
+        # num_leaves rounds: walk down to each leaf with virtual losses on
+        # the way, evaluate the new leaves together, and back their values
+        # up in place of the losses. Returns the number of rounds played,
+        # less than num_leaves if some went to a leaf already expanded.
+        lock = lock if lock is not None else contextlib.nullcontext()
+
+        with lock:
+            selections = [self.select_leaf(root) for _ in range(num_leaves)]
+
+        to_expand = [(node, move) for path, node, move, leaf in selections if leaf is None]
+        new_nodes = iter(self.create_nodes([node.state.apply_move(move) for node, move in to_expand],
+                                           [move for node, move in to_expand],
+                                           [node for node, move in to_expand], lock))
+
+        num_played = 0
+        with lock:
+            for path, node, move, leaf in selections:
+                if leaf is None:
+                    leaf = next(new_nodes)
+                else:
+                    # a finished game, visited again
+                    leaf.total_visit_count += 1
+                for node, move in path:
+                    node.remove_virtual_loss(move, self.virtual_loss)
+                if leaf is None:
+                    continue
+                value = -1 * leaf.value
+                for node, move in reversed(path):
+                    node.record_visit(move, value)
+                    value = -1 * value
+                num_played += 1
+
+        return num_played
+
+    def select_leaf(self, root):
+        # the path to the branch to expand, with a virtual loss on each of
+        # its branches, and the node and move of that branch; leaf is the
+        # node reached instead if the game is over there
+        path = []
+        node = root
+        while True:
+            next_move = self.select_branch(node)
+            node.add_virtual_loss(next_move, self.virtual_loss)
+            path.append((node, next_move))
+            if not node.has_child(next_move):
+                return path, node, next_move, None
+            node = node.get_child(next_move)
+            if not node.has_branches():
+                return path, None, None, node
 
     def set_collector(self, collector):
         self.collector = collector
 
-    def create_node(self, game_state, move=None, parent=None):
-        state_tensor = self.encoder.encode(game_state)
-        model_input = np.array([state_tensor])
-        priors, values = self.model.predict(model_input)
-        priors = priors[0]
-
-        # add Dirichlet noise to encourage exploration
-        if parent is None:
-            noise = np.random.dirichlet(0.03 * np.ones_like(priors))
-            priors = 0.75 * priors + 0.25 * noise
-
-        value = values[0][0]
-
-        move_priors = {
-            self.encoder.decode_move_index(idx): p
-            for idx, p in enumerate(priors)
-        }
-        new_node = ZeroTreeNode(game_state, value, move_priors, parent, move)
-
-        if parent is not None:
-            parent.add_child(move, new_node)
-        return new_node
+    def set_evaluation_cache(self, evaluation_cache):
+        self.evaluation_cache = evaluation_cache
+
+    def set_time_manager(self, time_manager):
+        self.time_manager = time_manager
+
+    def diagnostics(self):
+        return {'rounds_played': self.rounds_played, 'rounds_saved': self.rounds_saved,
+                'total_rounds_saved': self.total_rounds_saved}
+
+    def create_node(self, game_state, move=None, parent=None, lock=None):
+        return self.create_nodes([game_state], [move], [parent], lock)[0]
+
+    def create_nodes(self, game_states, moves, parents, lock=None):
+        # evaluate game_states with a single predict and add them to the
+        # tree; positions in the transposition table take its node instead
+        if not game_states:
+            return []
+
+        lock = lock if lock is not None else contextlib.nullcontext()
+        shared = [None] * len(game_states)
+        if self.transpositions is not None:
+            with lock:
+                shared = [self.transpositions.get(game_state) if parent is not None else None
+                          for game_state, parent in zip(game_states, parents)]
+
+        to_evaluate = [game_state for game_state, node in zip(game_states, shared) if node is None]
+        evaluations = iter(())
+        if to_evaluate and self.evaluation_cache is not None:
+            outputs = self.evaluation_cache.predict(self.model, self.encoder, to_evaluate)
+            evaluations = ((priors, value[0]) for priors, value in outputs)
+        elif to_evaluate:
+            model_input = np.array([self.encoder.encode(game_state) for game_state in to_evaluate])
+            all_priors, values = self.model.predict(model_input)
+            evaluations = zip(all_priors, values[:, 0])
+        new_nodes = []
+
+        for game_state, move, parent, shared_node in zip(game_states, moves, parents, shared):
+            if shared_node is None:
+                priors, value = next(evaluations)
+                if parent is None:
+                    priors = self.add_noise(priors)
+                new_node = ZeroTreeNode(game_state, value, priors, parent, move)
+                new_node.noised = parent is None
+            else:
+                new_node = shared_node
+
+            if parent is not None:
+                with lock:
+                    # the same leaf may have been expanded meanwhile, by
+                    # another thread or earlier in the batch; its visit is
+                    # left out rather than counted twice
+                    if parent.has_child(move):
+                        new_node = None
+                    else:
+                        parent.add_child(move, new_node)
+                        if shared_node is not None:
+                            # the visit on the way here, as a new node
+                            # counts its own first one
+                            new_node.total_visit_count += 1
+                        if self.transpositions is not None:
+                            self.transpositions.put(game_state, new_node)
+            new_nodes.append(new_node)
+
+        return new_nodes
 
     def select_branch(self, node):
-        total_n = node.total_visit_count
-
-        # see 14.2.1 for explanation
-        def score_branch(move):
-            q = node.expected_value(move)
-            p = node.prior(move)
-            n = node.visit_count(move)
-
-            return q + self.c * p * np.sqrt(total_n) / (n + 1)
+        # see 14.2.1 for explanation; the score of every branch at once
+        scores = node.expected_values() + self.c * node.priors * np.sqrt(node.total_visit_count) / (
+            node.visit_counts + 1)
 
-        return max(node.moves(), key=score_branch)
+        return node.move(int(np.argmax(np.where(node.legal, scores, -np.inf))))
 
     def train(self, experience, learning_rate, batch_size):
         num_examples = experience.states.shape[0]
@@ -0,0 +1,303 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from dlgo.evaluation_cache import EvaluationCache
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Point
+from dlgo.time_control import TimeManager
+from dlgo.zero.agent import ZeroAgent
+from dlgo.zero.encoder import ZeroEncoder
+
+
+class UniformModel:
+    # priors proportional to the move index and a value of zero, so the
+    # search has something to prefer without a trained network
+    def __init__(self, num_moves):
+        self.priors = np.arange(1, num_moves + 1) / np.sum(np.arange(1, num_moves + 1))
+        self.batch_sizes = []
+
+    def predict(self, model_input, **kwargs):
+        self.batch_sizes.append(len(model_input))
+        return np.tile(self.priors, (len(model_input), 1)), np.zeros((len(model_input), 1))
+
+
+class TreeParallelTest(unittest.TestCase):
+    def search(self, num_threads, num_rounds=50, batch_size=1):
+        encoder = ZeroEncoder(5)
+        self.model = UniformModel(encoder.num_moves())
+        agent = ZeroAgent(self.model, encoder, rounds_per_move=num_rounds, num_threads=num_threads,
+                          batch_size=batch_size)
+        root = agent.create_node(GameState.new_game(5))
+        if num_threads > 1:
+            agent.search_in_threads(root)
+        else:
+            rounds_left = num_rounds
+            while rounds_left > 0:
+                rounds_left -= agent.simulate(root, min(batch_size, rounds_left))
+        return root
+
+    def assert_visits_add_up(self, node):
+        # every visit through a node went on to one of its branches, unless
+        # the game is over there, and the virtual losses are all taken back
+        if node.has_branches():
+            self.assertEqual(node.total_visit_count - 1, np.sum(node.visit_counts))
+        for move, child in node.children.items():
+            self.assertEqual(node.visit_count(move), child.total_visit_count)
+            self.assertAlmostEqual(0.0, node.total_values[node.index(move)])
+            self.assert_visits_add_up(child)
+
+    def test_visit_counts_sum_to_num_rounds(self):
+        for num_threads, batch_size in ((1, 1), (4, 1), (1, 8), (3, 4)):
+            root = self.search(num_threads, batch_size=batch_size)
+            self.assertEqual(50, sum(root.visit_count(move) for move in root.moves()))
+            self.assert_visits_add_up(root)
+
+    def test_leaves_are_evaluated_in_batches(self):
+        self.search(1, num_rounds=20, batch_size=8)
+        # the root, then batches of up to 8 new leaves
+        self.assertEqual(1, self.model.batch_sizes[0])
+        self.assertEqual(3, len(self.model.batch_sizes[1:]))
+        self.assertTrue(all(1 <= size <= 8 for size in self.model.batch_sizes[1:]))
+
+    def test_select_branch_matches_puct_over_legal_moves(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder)
+        root = self.search(1, num_rounds=30)
+
+        def score(move):
+            n = root.visit_count(move)
+            return root.expected_value(move) + agent.c * root.prior(move) * np.sqrt(root.total_visit_count) / (n + 1)
+
+        self.assertEqual(max(root.moves(), key=score), agent.select_branch(root))
+
+    def test_search_goes_deeper_than_the_root(self):
+        root = self.search(4, num_rounds=200)
+        self.assertTrue(any(child.children for child in root.children.values()))
+
+
+class TreeReuseTest(unittest.TestCase):
+    def test_search_resumes_from_the_opponents_reply(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=300, reuse_tree=True)
+        game = GameState.new_game(5)
+
+        move = agent.select_move(game)
+        game = game.apply_move(move)
+        old_root = agent.root
+        reply = max(old_root.get_child(move).children, key=old_root.get_child(move).visit_count)
+        reused = old_root.get_child(move).get_child(reply)
+        reused_visits = reused.total_visit_count
+        self.assertGreater(reused_visits, 1)
+
+        agent.select_move(game.apply_move(reply))
+        self.assertIs(reused, agent.root)
+        self.assertIsNone(agent.root.parent)
+        self.assertEqual(reused_visits + 300, agent.root.total_visit_count)
+
+    def test_pondered_visits_are_reused(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=50, reuse_tree=True)
+        game = GameState.new_game(5)
+        game = game.apply_move(agent.select_move(game))
+
+        agent.ponder(game, threading.Event(), max_rounds=200)
+        pondered = agent.root
+        self.assertEqual(game.board.zobrist_hash(), pondered.state.board.zobrist_hash())
+        reply = max(pondered.children, key=pondered.visit_count)
+        reused_visits = pondered.get_child(reply).total_visit_count
+        self.assertGreater(reused_visits, 1)
+
+        agent.select_move(game.apply_move(reply))
+        self.assertIs(pondered.get_child(reply), agent.root)
+        self.assertEqual(reused_visits + 50, agent.root.total_visit_count)
+
+    def test_reused_tree_keeps_only_its_positions(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=100, reuse_tree=True)
+        game = GameState.new_game(5)
+        for _ in range(3):
+            game = game.apply_move(agent.select_move(game))
+
+        self.assertEqual(4, sum(len(depths) for depths in game._history._depths.values()))
+        # the kept subtree's layer holds its own positions and no others
+        nodes, kept = [agent.root], set()
+        while nodes:
+            node = nodes.pop()
+            kept.add(id(node))
+            nodes.extend(node.children.values())
+        layer = agent.root.state._history
+        self.assertIs(game._history, layer.parent)
+        self.assertEqual(len(kept), sum(len(depths) for depths in layer._depths.values()))
+
+    def test_pondering_turns_tree_reuse_on(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=20)
+        game = GameState.new_game(5)
+        game = game.apply_move(agent.select_move(game))
+
+        agent.ponder(game, threading.Event(), max_rounds=30)
+        pondered = agent.root
+        self.assertTrue(agent.reuse_tree)
+        self.assertGreater(pondered.total_visit_count, 30)
+        reply = max(pondered.children, key=pondered.visit_count)
+        agent.select_move(game.apply_move(reply))
+        self.assertIs(pondered.get_child(reply), agent.root)
+
+    def test_unknown_position_gets_a_new_tree(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=20, reuse_tree=True)
+        agent.select_move(GameState.new_game(5))
+        old_root = agent.root
+
+        agent.select_move(GameState.new_game(5).apply_move(Move.play(Point(3, 3))).apply_move(
+            Move.play(Point(1, 1))).apply_move(Move.play(Point(5, 5))))
+        self.assertIsNot(old_root, agent.root)
+        self.assertEqual(21, agent.root.total_visit_count)
+
+    def test_reuse_is_off_by_default(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=20)
+        game = GameState.new_game(5)
+        agent.select_move(game)
+        agent.select_move(game)
+        self.assertEqual(21, agent.root.total_visit_count)
+
+    def test_noise_is_added_to_a_root_once(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=20, reuse_tree=True)
+        game = GameState.new_game(5)
+        agent.select_move(game)
+        priors = agent.root.priors.copy()
+
+        move = agent.select_move(game)
+        np.testing.assert_array_equal(priors, agent.root.priors)
+
+        child = agent.root.get_child(move)
+        child_priors = child.priors.copy()
+        self.assertFalse(child.noised)
+        agent.select_move(game.apply_move(move))
+        self.assertIs(child, agent.root)
+        self.assertTrue(child.noised)
+        self.assertFalse(np.array_equal(child_priors, child.priors))
+
+
+class TranspositionTest(unittest.TestCase):
+    def test_move_orders_share_a_node_and_its_evaluation(self):
+        encoder = ZeroEncoder(5)
+        model = UniformModel(encoder.num_moves())
+        agent = ZeroAgent(model, encoder, transposition_size=100)
+        first, second = Move.play(Point(1, 1)), Move.play(Point(3, 3))
+        reply = Move.play(Point(2, 2))
+
+        root = agent.create_node(GameState.new_game(5))
+        a, b = agent.create_nodes([root.state.apply_move(first), root.state.apply_move(second)],
+                                  [first, second], [root, root])
+        a_reply = agent.create_node(a.state.apply_move(reply), reply, a)
+        a_reply_second = agent.create_node(a_reply.state.apply_move(second), second, a_reply)
+        b_reply = agent.create_node(b.state.apply_move(reply), reply, b)
+        num_predicts = len(model.batch_sizes)
+        b_reply_first = agent.create_node(b_reply.state.apply_move(first), first, b_reply)
+
+        self.assertIs(a_reply_second, b_reply_first)
+        self.assertIs(a_reply_second, b_reply.get_child(first))
+        self.assertEqual(num_predicts, len(model.batch_sizes))
+        self.assertEqual(2, a_reply_second.total_visit_count)
+
+    def test_search_with_transpositions(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=100, transposition_size=50)
+        root = agent.create_node(GameState.new_game(5))
+        rounds_left = 100
+        while rounds_left > 0:
+            rounds_left -= agent.simulate(root, min(4, rounds_left))
+
+        self.assertEqual(100, sum(root.visit_count(move) for move in root.moves()))
+        self.assertLessEqual(len(agent.transpositions), 50)
+
+
+class EvaluationCacheTest(unittest.TestCase):
+    def test_second_search_of_a_position_is_served_from_the_cache(self):
+        encoder = ZeroEncoder(5)
+        model = UniformModel(encoder.num_moves())
+        agent = ZeroAgent(model, encoder, rounds_per_move=30, batch_size=4, reuse_tree=False)
+        cache = EvaluationCache()
+        agent.set_evaluation_cache(cache)
+        game = GameState.new_game(5)
+
+        agent.select_move(game)
+        num_predicted = sum(model.batch_sizes)
+        agent.select_move(game)
+        self.assertGreater(cache.hits, 0)
+        self.assertLess(sum(model.batch_sizes) - num_predicted, num_predicted)
+
+
+class TimeManagerTest(unittest.TestCase):
+    def test_search_stops_when_the_move_time_is_up(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(UniformModel(encoder.num_moves()), encoder, rounds_per_move=100000, batch_size=8)
+        agent.set_time_manager(TimeManager(move_time=0.2))
+        game = GameState.new_game(5)
+
+        start = time.perf_counter()
+        self.assertTrue(game.is_valid_move(agent.select_move(game)))
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertLess(agent.root.total_visit_count, 100000)
+
+
+class PeakedModel(UniformModel):
+    # almost all of the prior on one move; with black_wins, every position
+    # is won for black
+    def __init__(self, num_moves, move_index=12, black_wins=False):
+        super().__init__(num_moves)
+        self.priors = np.full(num_moves, 0.1 / (num_moves - 1))
+        self.priors[move_index] = 0.9
+        self.black_wins = black_wins
+
+    def predict(self, model_input, **kwargs):
+        priors, values = super().predict(model_input)
+        if self.black_wins:
+            # plane 9 is set when black is to move
+            values = np.where(model_input[:, 9, :1, 0] == 1, 1.0, -1.0)
+        return priors, values
+
+
+class EarlyStopTest(unittest.TestCase):
+    def test_search_stops_once_the_move_is_decided(self):
+        encoder = ZeroEncoder(5)
+        game = GameState.new_game(5)
+        moves = []
+        for early_stop in (False, True):
+            agent = ZeroAgent(PeakedModel(encoder.num_moves()), encoder, rounds_per_move=400, early_stop=early_stop)
+            np.random.seed(1)
+            moves.append(agent.select_move(game))
+
+        self.assertEqual(moves[0], moves[1])
+        self.assertGreater(agent.rounds_saved, 0)
+        self.assertEqual(400, agent.rounds_played + agent.rounds_saved)
+        best, second = np.sort(agent.root.visit_counts)[::-1][:2]
+        self.assertGreater(best - second, agent.rounds_saved)
+        self.assertEqual(agent.rounds_saved, agent.diagnostics()['total_rounds_saved'])
+
+    def test_search_stops_once_the_game_is_resolved(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(PeakedModel(encoder.num_moves(), black_wins=True), encoder, rounds_per_move=400,
+                          early_stop=True, resolved_value=0.9)
+        agent.select_move(GameState.new_game(5))
+
+        # black is to move: stopped as soon as the best move had 40 visits
+        self.assertEqual(40, np.max(agent.root.visit_counts))
+        self.assertLess(agent.rounds_played, 100)
+
+    def test_full_search_without_early_stop(self):
+        encoder = ZeroEncoder(5)
+        agent = ZeroAgent(PeakedModel(encoder.num_moves()), encoder, rounds_per_move=100)
+        agent.select_move(GameState.new_game(5))
+
+        self.assertEqual((100, 0), (agent.rounds_played, agent.rounds_saved))
+
+
+if __name__ == '__main__':
+    unittest.main()
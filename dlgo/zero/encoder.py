@@ -1,6 +1,6 @@
 import numpy as np
-from dlgo.goboard_fast import Move
-from dlgo.gotypes import Player, Point
+from dlgo.goboard_fast import Move, get_grid
+from dlgo.gotypes import Player
 
 
 class ZeroEncoder:
@@ -21,6 +21,9 @@ class ZeroEncoder:
         # 10: illegal moves due to ko
         self.num_planes = 11
 
+    def name(self):
+        return 'zeroencoder'
+
     def encode(self, game_state):
         board_tensor = np.zeros(self.shape())
         next_player = game_state.next_player
@@ -30,13 +33,15 @@ class ZeroEncoder:
         else:
             board_tensor[9] = 1
 
+        grid = get_grid(self.board_size, self.board_size)
+
         for r in range(self.board_size):
             for c in range(self.board_size):
-                p = Point(row=r + 1, col=c + 1)
-                go_string = game_state.board.get_go_string(p)
+                move = grid.moves[r * self.board_size + c]
+                go_string = game_state.board.get_go_string(move.point)
 
                 if go_string is None:
-                    if game_state.does_move_violate_ko(next_player, Move.play(p)):
+                    if game_state.does_move_violate_ko(next_player, move):
                         board_tensor[10][r][c] = 1
 
                 else:
@@ -62,10 +67,7 @@ class ZeroEncoder:
         if index == self.board_size * self.board_size:
             return Move.pass_turn()
 
-        row = index // self.board_size
-        col = index % self.board_size
-
-        return Move.play(Point(row=row + 1, col=col + 1))
+        return get_grid(self.board_size, self.board_size).moves[index]
 
     def num_moves(self):
         return self.board_size * self.board_size + 1
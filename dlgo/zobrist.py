@@ -1,1091 +1,54 @@
-from .gotypes import Player, Point
+import numpy as np
 
-__all__ = ['HASH_CODE', 'EMPTY_BOARD']
+from .gotypes import Player
 
-HASH_CODE = {
-    (Point(row=1, col=1), Player.black): 2731588189990774503,
-    (Point(row=1, col=1), Player.white): 4092699675410065495,
-    (Point(row=1, col=1), None): 5272947021152202456,
-    (Point(row=1, col=2), Player.black): 5456984681340677556,
-    (Point(row=1, col=2), Player.white): 2935789462107022002,
-    (Point(row=1, col=2), None): 8762277061166746143,
-    (Point(row=1, col=3), Player.black): 7731294355443980506,
-    (Point(row=1, col=3), Player.white): 1870148210000306750,
-    (Point(row=1, col=3), None): 6509470887255794106,
-    (Point(row=1, col=4), Player.black): 6710043500389328950,
-    (Point(row=1, col=4), Player.white): 1601567679683015918,
-    (Point(row=1, col=4), None): 5665763396711978458,
-    (Point(row=1, col=5), Player.black): 3839003975545060301,
-    (Point(row=1, col=5), Player.white): 5531844491018805142,
-    (Point(row=1, col=5), None): 8884877104203904093,
-    (Point(row=1, col=6), Player.black): 7487535145989458075,
-    (Point(row=1, col=6), Player.white): 2493859915213342005,
-    (Point(row=1, col=6), None): 6337563360328485006,
-    (Point(row=1, col=7), Player.black): 6812093387162737507,
-    (Point(row=1, col=7), Player.white): 1089574137524953299,
-    (Point(row=1, col=7), None): 5348875279133894900,
-    (Point(row=1, col=8), Player.black): 7462077248823755463,
-    (Point(row=1, col=8), Player.white): 2584408821363750249,
-    (Point(row=1, col=8), None): 7558105700104803208,
-    (Point(row=1, col=9), Player.black): 8598633437213382558,
-    (Point(row=1, col=9), Player.white): 5923818162209815861,
-    (Point(row=1, col=9), None): 5606997762879050118,
-    (Point(row=1, col=10), Player.black): 3324996222272145060,
-    (Point(row=1, col=10), Player.white): 4131675209185684235,
-    (Point(row=1, col=10), None): 5073310715736954008,
-    (Point(row=1, col=11), Player.black): 353948910392191144,
-    (Point(row=1, col=11), Player.white): 1923369450175170556,
-    (Point(row=1, col=11), None): 7678702399098774751,
-    (Point(row=1, col=12), Player.black): 7638655955523331478,
-    (Point(row=1, col=12), Player.white): 4138543266236694027,
-    (Point(row=1, col=12), None): 3887000692048566267,
-    (Point(row=1, col=13), Player.black): 3914513542572663603,
-    (Point(row=1, col=13), Player.white): 4960751556979009461,
-    (Point(row=1, col=13), None): 1182173788001496391,
-    (Point(row=1, col=14), Player.black): 9135468075244725327,
-    (Point(row=1, col=14), Player.white): 9148085211441372667,
-    (Point(row=1, col=14), None): 2407322383597670056,
-    (Point(row=1, col=15), Player.black): 4945441988464567069,
-    (Point(row=1, col=15), Player.white): 9121558631010866128,
-    (Point(row=1, col=15), None): 5860404091511290597,
-    (Point(row=1, col=16), Player.black): 5585001560248410618,
-    (Point(row=1, col=16), Player.white): 7413910690022687741,
-    (Point(row=1, col=16), None): 2245816239634038954,
-    (Point(row=1, col=17), Player.black): 1277256925926047007,
-    (Point(row=1, col=17), Player.white): 5755263581395473872,
-    (Point(row=1, col=17), None): 5455969915735292425,
-    (Point(row=1, col=18), Player.black): 8896216664165966964,
-    (Point(row=1, col=18), Player.white): 2074115185407595016,
-    (Point(row=1, col=18), None): 7296340796988828745,
-    (Point(row=1, col=19), Player.black): 7274468392269770171,
-    (Point(row=1, col=19), Player.white): 2405924044537352593,
-    (Point(row=1, col=19), None): 3105681969592784397,
-    (Point(row=2, col=1), Player.black): 2001353931977942029,
-    (Point(row=2, col=1), Player.white): 6744271365860430591,
-    (Point(row=2, col=1), None): 7300265493771211435,
-    (Point(row=2, col=2), Player.black): 8174811385763630796,
-    (Point(row=2, col=2), Player.white): 5953236283213289208,
-    (Point(row=2, col=2), None): 8187137174875608896,
-    (Point(row=2, col=3), Player.black): 3900748591899117584,
-    (Point(row=2, col=3), Player.white): 5644927951595274964,
-    (Point(row=2, col=3), None): 9166142693296694461,
-    (Point(row=2, col=4), Player.black): 8692952463733458363,
-    (Point(row=2, col=4), Player.white): 8122571908403526202,
-    (Point(row=2, col=4), None): 7820815205172399431,
-    (Point(row=2, col=5), Player.black): 8072451895289214573,
-    (Point(row=2, col=5), Player.white): 6775238268156116819,
-    (Point(row=2, col=5), None): 8154944268168103243,
-    (Point(row=2, col=6), Player.black): 7757218294447331177,
-    (Point(row=2, col=6), Player.white): 6632563597021205614,
-    (Point(row=2, col=6), None): 1272110349827435799,
-    (Point(row=2, col=7), Player.black): 6697271311807794396,
-    (Point(row=2, col=7), Player.white): 6067809477490807115,
-    (Point(row=2, col=7), None): 5978625823495638983,
-    (Point(row=2, col=8), Player.black): 7543834685504965161,
-    (Point(row=2, col=8), Player.white): 4489382848516556919,
-    (Point(row=2, col=8), None): 1393903201381132592,
-    (Point(row=2, col=9), Player.black): 8737997612137718380,
-    (Point(row=2, col=9), Player.white): 1183073537580276285,
-    (Point(row=2, col=9), None): 26217385678760613,
-    (Point(row=2, col=10), Player.black): 7475789009488036990,
-    (Point(row=2, col=10), Player.white): 85371448822207844,
-    (Point(row=2, col=10), None): 4642946093738346973,
-    (Point(row=2, col=11), Player.black): 5396385303524054027,
-    (Point(row=2, col=11), Player.white): 4793745737219333482,
-    (Point(row=2, col=11), None): 189547593477336475,
-    (Point(row=2, col=12), Player.black): 4836602860031548684,
-    (Point(row=2, col=12), Player.white): 3774742180441446174,
-    (Point(row=2, col=12), None): 8343039148777672929,
-    (Point(row=2, col=13), Player.black): 3235875972757667373,
-    (Point(row=2, col=13), Player.white): 4638542916509008561,
-    (Point(row=2, col=13), None): 2256196578844467592,
-    (Point(row=2, col=14), Player.black): 7505358493006439467,
-    (Point(row=2, col=14), Player.white): 3055748720272572275,
-    (Point(row=2, col=14), None): 3757030129208648232,
-    (Point(row=2, col=15), Player.black): 8296692273825138796,
-    (Point(row=2, col=15), Player.white): 4297548865820819848,
-    (Point(row=2, col=15), None): 6693928949632135568,
-    (Point(row=2, col=16), Player.black): 339364909171782980,
-    (Point(row=2, col=16), Player.white): 3910772130522349591,
-    (Point(row=2, col=16), None): 2429495853391584095,
-    (Point(row=2, col=17), Player.black): 6883827289000606028,
-    (Point(row=2, col=17), Player.white): 7073216619662945412,
-    (Point(row=2, col=17), None): 6019320940219113948,
-    (Point(row=2, col=18), Player.black): 1442875519088900588,
-    (Point(row=2, col=18), Player.white): 5342668278564576262,
-    (Point(row=2, col=18), None): 3281076246683285018,
-    (Point(row=2, col=19), Player.black): 6900037937668791528,
-    (Point(row=2, col=19), Player.white): 8612528823083036413,
-    (Point(row=2, col=19), None): 4308252608980078692,
-    (Point(row=3, col=1), Player.black): 9030794589984636364,
-    (Point(row=3, col=1), Player.white): 9090475766504403064,
-    (Point(row=3, col=1), None): 4988024211524257817,
-    (Point(row=3, col=2), Player.black): 4778353717619534059,
-    (Point(row=3, col=2), Player.white): 3266160965762288010,
-    (Point(row=3, col=2), None): 161896547986143460,
-    (Point(row=3, col=3), Player.black): 1279861413584995330,
-    (Point(row=3, col=3), Player.white): 7619952647441454317,
-    (Point(row=3, col=3), None): 4906134258287468011,
-    (Point(row=3, col=4), Player.black): 7531554673818749124,
-    (Point(row=3, col=4), Player.white): 378220432892613645,
-    (Point(row=3, col=4), None): 1188214587809844025,
-    (Point(row=3, col=5), Player.black): 324302185999707082,
-    (Point(row=3, col=5), Player.white): 6903495945814975805,
-    (Point(row=3, col=5), None): 115637689489713056,
-    (Point(row=3, col=6), Player.black): 9185612152648906252,
-    (Point(row=3, col=6), Player.white): 2861190274691557000,
-    (Point(row=3, col=6), None): 5439994574777799445,
-    (Point(row=3, col=7), Player.black): 945019470869004990,
-    (Point(row=3, col=7), Player.white): 7296651881515817588,
-    (Point(row=3, col=7), None): 6495238082177111469,
-    (Point(row=3, col=8), Player.black): 1802778809389863897,
-    (Point(row=3, col=8), Player.white): 275670057930332276,
-    (Point(row=3, col=8), None): 8167906915636840142,
-    (Point(row=3, col=9), Player.black): 3795530065484197398,
-    (Point(row=3, col=9), Player.white): 8504934394700851069,
-    (Point(row=3, col=9), None): 2040312535264283238,
-    (Point(row=3, col=10), Player.black): 5432639705432164849,
-    (Point(row=3, col=10), Player.white): 2331881663339404628,
-    (Point(row=3, col=10), None): 6806273036412358038,
-    (Point(row=3, col=11), Player.black): 3631810456484272284,
-    (Point(row=3, col=11), Player.white): 1343642532171632128,
-    (Point(row=3, col=11), None): 6162407244414152984,
-    (Point(row=3, col=12), Player.black): 6829184645565575467,
-    (Point(row=3, col=12), Player.white): 7448883772271031029,
-    (Point(row=3, col=12), None): 7866735849741826772,
-    (Point(row=3, col=13), Player.black): 2833067373595888125,
-    (Point(row=3, col=13), Player.white): 4910094234373347946,
-    (Point(row=3, col=13), None): 4531836803318527317,
-    (Point(row=3, col=14), Player.black): 184359037017430167,
-    (Point(row=3, col=14), Player.white): 9122080906783768387,
-    (Point(row=3, col=14), None): 1436344813152379356,
-    (Point(row=3, col=15), Player.black): 8798652644791323575,
-    (Point(row=3, col=15), Player.white): 3248269005972968654,
-    (Point(row=3, col=15), None): 9148508903696279191,
-    (Point(row=3, col=16), Player.black): 8059860354597545114,
-    (Point(row=3, col=16), Player.white): 2596887820817850027,
-    (Point(row=3, col=16), None): 7781065118547279281,
-    (Point(row=3, col=17), Player.black): 5291913012142490335,
-    (Point(row=3, col=17), Player.white): 6626521798801277488,
-    (Point(row=3, col=17), None): 8517200132871802196,
-    (Point(row=3, col=18), Player.black): 1462474395206850917,
-    (Point(row=3, col=18), Player.white): 4284270443682492486,
-    (Point(row=3, col=18), None): 8772070071827877086,
-    (Point(row=3, col=19), Player.black): 1367184410487678978,
-    (Point(row=3, col=19), Player.white): 7277702295374592273,
-    (Point(row=3, col=19), None): 3171961854648018619,
-    (Point(row=4, col=1), Player.black): 7571852456907830229,
-    (Point(row=4, col=1), Player.white): 7569189994126534266,
-    (Point(row=4, col=1), None): 8971995841130631844,
-    (Point(row=4, col=2), Player.black): 3883310570304476489,
-    (Point(row=4, col=2), Player.white): 886832741706820566,
-    (Point(row=4, col=2), None): 7225165048550052396,
-    (Point(row=4, col=3), Player.black): 3386881216755633052,
-    (Point(row=4, col=3), Player.white): 5169719714919933982,
-    (Point(row=4, col=3), None): 6600540228138675047,
-    (Point(row=4, col=4), Player.black): 1491094909655544040,
-    (Point(row=4, col=4), Player.white): 6494998793673118230,
-    (Point(row=4, col=4), None): 2566737909122060977,
-    (Point(row=4, col=5), Player.black): 5240719804582549950,
-    (Point(row=4, col=5), Player.white): 636988603183212065,
-    (Point(row=4, col=5), None): 8618747881376285667,
-    (Point(row=4, col=6), Player.black): 2157585840553463915,
-    (Point(row=4, col=6), Player.white): 1095047340650842930,
-    (Point(row=4, col=6), None): 1615901295469124965,
-    (Point(row=4, col=7), Player.black): 4125368702553039856,
-    (Point(row=4, col=7), Player.white): 4278930490306700161,
-    (Point(row=4, col=7), None): 7313561521951018118,
-    (Point(row=4, col=8), Player.black): 8209085486551625077,
-    (Point(row=4, col=8), Player.white): 2162685459162107937,
-    (Point(row=4, col=8), None): 5429620585675536861,
-    (Point(row=4, col=9), Player.black): 3113555090190520146,
-    (Point(row=4, col=9), Player.white): 3232452616595015285,
-    (Point(row=4, col=9), None): 9019272725408766537,
-    (Point(row=4, col=10), Player.black): 531731152248907871,
-    (Point(row=4, col=10), Player.white): 155116604612494502,
-    (Point(row=4, col=10), None): 402755630216770748,
-    (Point(row=4, col=11), Player.black): 6642989261829131394,
-    (Point(row=4, col=11), Player.white): 703144083571051032,
-    (Point(row=4, col=11), None): 5691235189564412155,
-    (Point(row=4, col=12), Player.black): 4172892209202869996,
-    (Point(row=4, col=12), Player.white): 6494509759939257862,
-    (Point(row=4, col=12), None): 7251514981404670276,
-    (Point(row=4, col=13), Player.black): 5230682818592659414,
-    (Point(row=4, col=13), Player.white): 4133168440990999763,
-    (Point(row=4, col=13), None): 8096705839229058800,
-    (Point(row=4, col=14), Player.black): 7763900195817181183,
-    (Point(row=4, col=14), Player.white): 7986882451211273056,
-    (Point(row=4, col=14), None): 2205669344180980019,
-    (Point(row=4, col=15), Player.black): 3095102562431807671,
-    (Point(row=4, col=15), Player.white): 334728202847256505,
-    (Point(row=4, col=15), None): 1159909074511554612,
-    (Point(row=4, col=16), Player.black): 7497476929767590767,
-    (Point(row=4, col=16), Player.white): 4182944134555080787,
-    (Point(row=4, col=16), None): 2971785700638713388,
-    (Point(row=4, col=17), Player.black): 2995236150558652224,
-    (Point(row=4, col=17), Player.white): 554416917902784164,
-    (Point(row=4, col=17), None): 1784623879055848332,
-    (Point(row=4, col=18), Player.black): 808546190707402976,
-    (Point(row=4, col=18), Player.white): 3918380283215261091,
-    (Point(row=4, col=18), None): 1593241662879330334,
-    (Point(row=4, col=19), Player.black): 5671086600936182633,
-    (Point(row=4, col=19), Player.white): 403291830753554100,
-    (Point(row=4, col=19), None): 2798707322827987840,
-    (Point(row=5, col=1), Player.black): 7521903294045967713,
-    (Point(row=5, col=1), Player.white): 8289332163540594656,
-    (Point(row=5, col=1), None): 904529899954680591,
-    (Point(row=5, col=2), Player.black): 1629615846894674985,
-    (Point(row=5, col=2), Player.white): 4117705909385449694,
-    (Point(row=5, col=2), None): 6061569826874152021,
-    (Point(row=5, col=3), Player.black): 4882482723804052699,
-    (Point(row=5, col=3), Player.white): 2732219935663909152,
-    (Point(row=5, col=3), None): 1920300441318747962,
-    (Point(row=5, col=4), Player.black): 6894158870355908673,
-    (Point(row=5, col=4), Player.white): 1278938772933853125,
-    (Point(row=5, col=4), None): 1446706438971417057,
-    (Point(row=5, col=5), Player.black): 2625378579649855881,
-    (Point(row=5, col=5), Player.white): 6597843886959614786,
-    (Point(row=5, col=5), None): 4329505538966352801,
-    (Point(row=5, col=6), Player.black): 1862173480108410301,
-    (Point(row=5, col=6), Player.white): 2683770432244694782,
-    (Point(row=5, col=6), None): 1649161374128636393,
-    (Point(row=5, col=7), Player.black): 5435373189575475168,
-    (Point(row=5, col=7), Player.white): 7588430875432616521,
-    (Point(row=5, col=7), None): 4808311700872032833,
-    (Point(row=5, col=8), Player.black): 1522870939609533240,
-    (Point(row=5, col=8), Player.white): 4310321551333092623,
-    (Point(row=5, col=8), None): 3426008179875399010,
-    (Point(row=5, col=9), Player.black): 372736591882970720,
-    (Point(row=5, col=9), Player.white): 3424445473480319454,
-    (Point(row=5, col=9), None): 6731714597838056191,
-    (Point(row=5, col=10), Player.black): 5652878056177088400,
-    (Point(row=5, col=10), Player.white): 7854458574727847398,
-    (Point(row=5, col=10), None): 7223715564942961775,
-    (Point(row=5, col=11), Player.black): 3920530803450251464,
-    (Point(row=5, col=11), Player.white): 3215657772429167201,
-    (Point(row=5, col=11), None): 1131046732327313267,
-    (Point(row=5, col=12), Player.black): 4780547112475071713,
-    (Point(row=5, col=12), Player.white): 6260809788709743563,
-    (Point(row=5, col=12), None): 2326180090424951966,
-    (Point(row=5, col=13), Player.black): 5966570999871283514,
-    (Point(row=5, col=13), Player.white): 7979539991743235061,
-    (Point(row=5, col=13), None): 1471957691476433789,
-    (Point(row=5, col=14), Player.black): 6743519974433761568,
-    (Point(row=5, col=14), Player.white): 8676637054760502605,
-    (Point(row=5, col=14), None): 7229138639681211746,
-    (Point(row=5, col=15), Player.black): 9191769680185270266,
-    (Point(row=5, col=15), Player.white): 689460672391753348,
-    (Point(row=5, col=15), None): 3773764196356591862,
-    (Point(row=5, col=16), Player.black): 4451650553495681400,
-    (Point(row=5, col=16), Player.white): 3175141216554660312,
-    (Point(row=5, col=16), None): 3486524145000277518,
-    (Point(row=5, col=17), Player.black): 4046075256540341891,
-    (Point(row=5, col=17), Player.white): 2306882086945059777,
-    (Point(row=5, col=17), None): 483359882487647525,
-    (Point(row=5, col=18), Player.black): 4326968975158616293,
-    (Point(row=5, col=18), Player.white): 8259164206387935201,
-    (Point(row=5, col=18), None): 8390284670038941284,
-    (Point(row=5, col=19), Player.black): 6489805712001827824,
-    (Point(row=5, col=19), Player.white): 4697356109928747867,
-    (Point(row=5, col=19), None): 3473950665016705746,
-    (Point(row=6, col=1), Player.black): 691584237302094571,
-    (Point(row=6, col=1), Player.white): 3930483357720154313,
-    (Point(row=6, col=1), None): 2477761949599944626,
-    (Point(row=6, col=2), Player.black): 304221740386218501,
-    (Point(row=6, col=2), Player.white): 312863285951836926,
-    (Point(row=6, col=2), None): 6097882751756569675,
-    (Point(row=6, col=3), Player.black): 2141936552245860931,
-    (Point(row=6, col=3), Player.white): 6070900135575003660,
-    (Point(row=6, col=3), None): 2763880332920338219,
-    (Point(row=6, col=4), Player.black): 1334111191599507589,
-    (Point(row=6, col=4), Player.white): 4552526941389041337,
-    (Point(row=6, col=4), None): 2007557492277478007,
-    (Point(row=6, col=5), Player.black): 3426425630199864623,
-    (Point(row=6, col=5), Player.white): 8345216314105320345,
-    (Point(row=6, col=5), None): 8905798950159123981,
-    (Point(row=6, col=6), Player.black): 4571935499896586889,
-    (Point(row=6, col=6), Player.white): 6745460218852355993,
-    (Point(row=6, col=6), None): 787856383559899750,
-    (Point(row=6, col=7), Player.black): 264637501422028823,
-    (Point(row=6, col=7), Player.white): 800433748377698258,
-    (Point(row=6, col=7), None): 6894564598981076021,
-    (Point(row=6, col=8), Player.black): 2418127479431571009,
-    (Point(row=6, col=8), Player.white): 2134789082548710440,
-    (Point(row=6, col=8), None): 2092125005196140822,
-    (Point(row=6, col=9), Player.black): 3694404869001152560,
-    (Point(row=6, col=9), Player.white): 4062557820765757515,
-    (Point(row=6, col=9), None): 9180904980046455334,
-    (Point(row=6, col=10), Player.black): 412074346030706410,
-    (Point(row=6, col=10), Player.white): 556687531724902279,
-    (Point(row=6, col=10), None): 714817318103225142,
-    (Point(row=6, col=11), Player.black): 546339718107406081,
-    (Point(row=6, col=11), Player.white): 810587658398465534,
-    (Point(row=6, col=11), None): 5191750045978279824,
-    (Point(row=6, col=12), Player.black): 6883344114779415570,
-    (Point(row=6, col=12), Player.white): 6865892101302797370,
-    (Point(row=6, col=12), None): 5105944559399611421,
-    (Point(row=6, col=13), Player.black): 6195817550967557791,
-    (Point(row=6, col=13), Player.white): 2806903124428747300,
-    (Point(row=6, col=13), None): 6325311228163763354,
-    (Point(row=6, col=14), Player.black): 5620299018473321504,
-    (Point(row=6, col=14), Player.white): 8795956265462667367,
-    (Point(row=6, col=14), None): 1914669398691593577,
-    (Point(row=6, col=15), Player.black): 6032214599107327825,
-    (Point(row=6, col=15), Player.white): 6447709836167192535,
-    (Point(row=6, col=15), None): 1731694585716552154,
-    (Point(row=6, col=16), Player.black): 5259830714202669150,
-    (Point(row=6, col=16), Player.white): 5991534476368907608,
-    (Point(row=6, col=16), None): 412623824655523439,
-    (Point(row=6, col=17), Player.black): 5235938110478098713,
-    (Point(row=6, col=17), Player.white): 7176585241966717184,
-    (Point(row=6, col=17), None): 6268230716789910488,
-    (Point(row=6, col=18), Player.black): 6494460288374005352,
-    (Point(row=6, col=18), Player.white): 4631940740048583931,
-    (Point(row=6, col=18), None): 3971783380391996826,
-    (Point(row=6, col=19), Player.black): 4580887479904724528,
-    (Point(row=6, col=19), Player.white): 39814267067199336,
-    (Point(row=6, col=19), None): 7944207734261600692,
-    (Point(row=7, col=1), Player.black): 4920123922694184562,
-    (Point(row=7, col=1), Player.white): 7292224482675842237,
-    (Point(row=7, col=1), None): 6684975777298503926,
-    (Point(row=7, col=2), Player.black): 6354478703681979555,
-    (Point(row=7, col=2), Player.white): 4750130819643105904,
-    (Point(row=7, col=2), None): 7430500336525932639,
-    (Point(row=7, col=3), Player.black): 2056015251926354490,
-    (Point(row=7, col=3), Player.white): 8827046802639403124,
-    (Point(row=7, col=3), None): 260614665597775251,
-    (Point(row=7, col=4), Player.black): 5782865298950535217,
-    (Point(row=7, col=4), Player.white): 2311962609513886999,
-    (Point(row=7, col=4), None): 1489961581217045372,
-    (Point(row=7, col=5), Player.black): 4502536469992711476,
-    (Point(row=7, col=5), Player.white): 7434127488754416326,
-    (Point(row=7, col=5), None): 3002743912405456435,
-    (Point(row=7, col=6), Player.black): 5271388928266618408,
-    (Point(row=7, col=6), Player.white): 6907787301416825885,
-    (Point(row=7, col=6), None): 957256585064081332,
-    (Point(row=7, col=7), Player.black): 4336529040147775908,
-    (Point(row=7, col=7), Player.white): 6686607229363106352,
-    (Point(row=7, col=7), None): 8154627963182939315,
-    (Point(row=7, col=8), Player.black): 8719963716282423589,
-    (Point(row=7, col=8), Player.white): 5439946693203258263,
-    (Point(row=7, col=8), None): 6251079187781637230,
-    (Point(row=7, col=9), Player.black): 144981169466806791,
-    (Point(row=7, col=9), Player.white): 8610048630060490237,
-    (Point(row=7, col=9), None): 4911134421179164891,
-    (Point(row=7, col=10), Player.black): 3245507113733762003,
-    (Point(row=7, col=10), Player.white): 8548233166704218261,
-    (Point(row=7, col=10), None): 4109871961519229987,
-    (Point(row=7, col=11), Player.black): 4737663931081025750,
-    (Point(row=7, col=11), Player.white): 1406014403360927318,
-    (Point(row=7, col=11), None): 5045212855636685722,
-    (Point(row=7, col=12), Player.black): 4721865538381738718,
-    (Point(row=7, col=12), Player.white): 5283558359085489811,
-    (Point(row=7, col=12), None): 7579396118847294829,
-    (Point(row=7, col=13), Player.black): 2976576865580854546,
-    (Point(row=7, col=13), Player.white): 9060758392402062717,
-    (Point(row=7, col=13), None): 8440241944764119994,
-    (Point(row=7, col=14), Player.black): 141433029116801726,
-    (Point(row=7, col=14), Player.white): 2315499518207063637,
-    (Point(row=7, col=14), None): 9055312133758620372,
-    (Point(row=7, col=15), Player.black): 4365580629191690394,
-    (Point(row=7, col=15), Player.white): 1199219296886841876,
-    (Point(row=7, col=15), None): 4870800588130673383,
-    (Point(row=7, col=16), Player.black): 7351313033838330177,
-    (Point(row=7, col=16), Player.white): 4530412990134770204,
-    (Point(row=7, col=16), None): 7663876307664026289,
-    (Point(row=7, col=17), Player.black): 8996667852839455471,
-    (Point(row=7, col=17), Player.white): 4399314105818417580,
-    (Point(row=7, col=17), None): 8599859476196087175,
-    (Point(row=7, col=18), Player.black): 8858975476598185458,
-    (Point(row=7, col=18), Player.white): 5626875465161727800,
-    (Point(row=7, col=18), None): 3343379415750149738,
-    (Point(row=7, col=19), Player.black): 1702731889307598786,
-    (Point(row=7, col=19), Player.white): 3258040183914995809,
-    (Point(row=7, col=19), None): 5904442061670638312,
-    (Point(row=8, col=1), Player.black): 5555867413277077296,
-    (Point(row=8, col=1), Player.white): 5327048557715970688,
-    (Point(row=8, col=1), None): 5838870677123291028,
-    (Point(row=8, col=2), Player.black): 601990921925916287,
-    (Point(row=8, col=2), Player.white): 948993858214697871,
-    (Point(row=8, col=2), None): 2132276682437220958,
-    (Point(row=8, col=3), Player.black): 1339827754749678981,
-    (Point(row=8, col=3), Player.white): 1347003358691972271,
-    (Point(row=8, col=3), None): 5806611081160864613,
-    (Point(row=8, col=4), Player.black): 2250047436934922562,
-    (Point(row=8, col=4), Player.white): 7437251299990650943,
-    (Point(row=8, col=4), None): 3719021806335020097,
-    (Point(row=8, col=5), Player.black): 6437906001842536916,
-    (Point(row=8, col=5), Player.white): 6685177653137553982,
-    (Point(row=8, col=5), None): 524338706658274310,
-    (Point(row=8, col=6), Player.black): 5395447649433615817,
-    (Point(row=8, col=6), Player.white): 674372046994321763,
-    (Point(row=8, col=6), None): 2235143068890524323,
-    (Point(row=8, col=7), Player.black): 6236600533832601560,
-    (Point(row=8, col=7), Player.white): 762846874226528059,
-    (Point(row=8, col=7), None): 6094694226532303808,
-    (Point(row=8, col=8), Player.black): 6739733932966401129,
-    (Point(row=8, col=8), Player.white): 4984764473379761007,
-    (Point(row=8, col=8), None): 701875273247874370,
-    (Point(row=8, col=9), Player.black): 4010200259758412491,
-    (Point(row=8, col=9), Player.white): 8536742370966951871,
-    (Point(row=8, col=9), None): 463497949016608036,
-    (Point(row=8, col=10), Player.black): 1462851682604920539,
-    (Point(row=8, col=10), Player.white): 944277338076487862,
-    (Point(row=8, col=10), None): 4372086501330314487,
-    (Point(row=8, col=11), Player.black): 4991108218319024165,
-    (Point(row=8, col=11), Player.white): 5112712536656657862,
-    (Point(row=8, col=11), None): 2324855975534861938,
-    (Point(row=8, col=12), Player.black): 1851116604726334231,
-    (Point(row=8, col=12), Player.white): 2920511107788149192,
-    (Point(row=8, col=12), None): 7445788418525747722,
-    (Point(row=8, col=13), Player.black): 6493331630231288536,
-    (Point(row=8, col=13), Player.white): 9147219403954394637,
-    (Point(row=8, col=13), None): 4309939453465723104,
-    (Point(row=8, col=14), Player.black): 9163019886528341320,
-    (Point(row=8, col=14), Player.white): 1383747533707104449,
-    (Point(row=8, col=14), None): 6510235757522236580,
-    (Point(row=8, col=15), Player.black): 2494358377368637655,
-    (Point(row=8, col=15), Player.white): 8204568065998061928,
-    (Point(row=8, col=15), None): 4803282078123011733,
-    (Point(row=8, col=16), Player.black): 7610026855688597538,
-    (Point(row=8, col=16), Player.white): 4817093287948944788,
-    (Point(row=8, col=16), None): 5643053863667601247,
-    (Point(row=8, col=17), Player.black): 8572798246938562477,
-    (Point(row=8, col=17), Player.white): 3830735583893915405,
-    (Point(row=8, col=17), None): 4304605183899967454,
-    (Point(row=8, col=18), Player.black): 339307956060329918,
-    (Point(row=8, col=18), Player.white): 8592928918228871795,
-    (Point(row=8, col=18), None): 2589310786650585700,
-    (Point(row=8, col=19), Player.black): 5250678981985239545,
-    (Point(row=8, col=19), Player.white): 6307810094834377095,
-    (Point(row=8, col=19), None): 8084107053129702088,
-    (Point(row=9, col=1), Player.black): 2199747611118146314,
-    (Point(row=9, col=1), Player.white): 689460745940856644,
-    (Point(row=9, col=1), None): 4716539889311894172,
-    (Point(row=9, col=2), Player.black): 1351665858705489044,
-    (Point(row=9, col=2), Player.white): 2976502424714597568,
-    (Point(row=9, col=2), None): 4935505270128773527,
-    (Point(row=9, col=3), Player.black): 5481785588851005001,
-    (Point(row=9, col=3), Player.white): 6120638363851299486,
-    (Point(row=9, col=3), None): 9024468235409355150,
-    (Point(row=9, col=4), Player.black): 6549624295080798972,
-    (Point(row=9, col=4), Player.white): 1055083463087490656,
-    (Point(row=9, col=4), None): 7076514431483110925,
-    (Point(row=9, col=5), Player.black): 1809275483716116184,
-    (Point(row=9, col=5), Player.white): 993544279407877752,
-    (Point(row=9, col=5), None): 9171496401707639184,
-    (Point(row=9, col=6), Player.black): 3371173776857561062,
-    (Point(row=9, col=6), Player.white): 1719780451662265311,
-    (Point(row=9, col=6), None): 7057331969633345379,
-    (Point(row=9, col=7), Player.black): 5304207672039660231,
-    (Point(row=9, col=7), Player.white): 7141102166682428585,
-    (Point(row=9, col=7), None): 994034950813872612,
-    (Point(row=9, col=8), Player.black): 4076985495876275285,
-    (Point(row=9, col=8), Player.white): 4881694056361507673,
-    (Point(row=9, col=8), None): 4285798752046749340,
-    (Point(row=9, col=9), Player.black): 124825228095079664,
-    (Point(row=9, col=9), Player.white): 7794136167555252936,
-    (Point(row=9, col=9), None): 7346793615749683516,
-    (Point(row=9, col=10), Player.black): 4568059669407278801,
-    (Point(row=9, col=10), Player.white): 3410625405626973727,
-    (Point(row=9, col=10), None): 5943057426357488480,
-    (Point(row=9, col=11), Player.black): 4906007893929837459,
-    (Point(row=9, col=11), Player.white): 7621328326358939194,
-    (Point(row=9, col=11), None): 4740777112803052135,
-    (Point(row=9, col=12), Player.black): 8422230582488712780,
-    (Point(row=9, col=12), Player.white): 8120131716132351390,
-    (Point(row=9, col=12), None): 2985282384125908922,
-    (Point(row=9, col=13), Player.black): 1004954624641506013,
-    (Point(row=9, col=13), Player.white): 1869209858336785700,
-    (Point(row=9, col=13), None): 8217257352834899455,
-    (Point(row=9, col=14), Player.black): 7550523573026120818,
-    (Point(row=9, col=14), Player.white): 2798972505543321072,
-    (Point(row=9, col=14), None): 5762594309157601017,
-    (Point(row=9, col=15), Player.black): 6335340439539586063,
-    (Point(row=9, col=15), Player.white): 5398287739406946977,
-    (Point(row=9, col=15), None): 9160134688501944746,
-    (Point(row=9, col=16), Player.black): 1703930867173285815,
-    (Point(row=9, col=16), Player.white): 5749096474556157064,
-    (Point(row=9, col=16), None): 3382524435287833761,
-    (Point(row=9, col=17), Player.black): 8395061551681096016,
-    (Point(row=9, col=17), Player.white): 4593893265058421771,
-    (Point(row=9, col=17), None): 6332984846885624033,
-    (Point(row=9, col=18), Player.black): 2444494570372837710,
-    (Point(row=9, col=18), Player.white): 529677356080764900,
-    (Point(row=9, col=18), None): 5130967971282924969,
-    (Point(row=9, col=19), Player.black): 1589719843676986624,
-    (Point(row=9, col=19), Player.white): 5063023608640427812,
-    (Point(row=9, col=19), None): 4823970550785639308,
-    (Point(row=10, col=1), Player.black): 5703393939443666328,
-    (Point(row=10, col=1), Player.white): 8537028179157134568,
-    (Point(row=10, col=1), None): 941446265300737338,
-    (Point(row=10, col=2), Player.black): 5795901617617731944,
-    (Point(row=10, col=2), Player.white): 8238325456394048867,
-    (Point(row=10, col=2), None): 6277112724124801950,
-    (Point(row=10, col=3), Player.black): 5300424940056689080,
-    (Point(row=10, col=3), Player.white): 3980799770352005274,
-    (Point(row=10, col=3), None): 3927448061738420470,
-    (Point(row=10, col=4), Player.black): 9107584520203057249,
-    (Point(row=10, col=4), Player.white): 2689192319935758255,
-    (Point(row=10, col=4), None): 7727509046030748795,
-    (Point(row=10, col=5), Player.black): 362434429131546000,
-    (Point(row=10, col=5), Player.white): 723815135175553289,
-    (Point(row=10, col=5), None): 4327771754709911837,
-    (Point(row=10, col=6), Player.black): 4233088143159028064,
-    (Point(row=10, col=6), Player.white): 481414362903752040,
-    (Point(row=10, col=6), None): 7392234216902726287,
-    (Point(row=10, col=7), Player.black): 2172116918077848948,
-    (Point(row=10, col=7), Player.white): 6185106617070691119,
-    (Point(row=10, col=7), None): 8613558859251208378,
-    (Point(row=10, col=8), Player.black): 1616038475651649669,
-    (Point(row=10, col=8), Player.white): 2585404907909789195,
-    (Point(row=10, col=8), None): 811832365871209263,
-    (Point(row=10, col=9), Player.black): 434172424831632959,
-    (Point(row=10, col=9), Player.white): 823733489204558137,
-    (Point(row=10, col=9), None): 7991640393313564563,
-    (Point(row=10, col=10), Player.black): 972582428682554508,
-    (Point(row=10, col=10), Player.white): 6596723300162515102,
-    (Point(row=10, col=10), None): 7395632388901250263,
-    (Point(row=10, col=11), Player.black): 4283609031027267906,
-    (Point(row=10, col=11), Player.white): 3248834610381584308,
-    (Point(row=10, col=11), None): 1414291435599066928,
-    (Point(row=10, col=12), Player.black): 8297866862006921323,
-    (Point(row=10, col=12), Player.white): 7589533636880379052,
-    (Point(row=10, col=12), None): 6438493241625329885,
-    (Point(row=10, col=13), Player.black): 7111030612929460126,
-    (Point(row=10, col=13), Player.white): 2849989828495378173,
-    (Point(row=10, col=13), None): 7509341160691100623,
-    (Point(row=10, col=14), Player.black): 8146372623170876765,
-    (Point(row=10, col=14), Player.white): 3936897773353974543,
-    (Point(row=10, col=14), None): 3146795622291309713,
-    (Point(row=10, col=15), Player.black): 8300979705230421746,
-    (Point(row=10, col=15), Player.white): 1923463252676465911,
-    (Point(row=10, col=15), None): 569018077066884551,
-    (Point(row=10, col=16), Player.black): 4365757818693589324,
-    (Point(row=10, col=16), Player.white): 9078273140850651634,
-    (Point(row=10, col=16), None): 5739214573932765445,
-    (Point(row=10, col=17), Player.black): 1032537758289383179,
-    (Point(row=10, col=17), Player.white): 5308085378286852886,
-    (Point(row=10, col=17), None): 2018502585480240136,
-    (Point(row=10, col=18), Player.black): 2174393744498956522,
-    (Point(row=10, col=18), Player.white): 5275223160925366957,
-    (Point(row=10, col=18), None): 3266635150748131783,
-    (Point(row=10, col=19), Player.black): 816192617332966672,
-    (Point(row=10, col=19), Player.white): 981358230762915431,
-    (Point(row=10, col=19), None): 6090677771348962465,
-    (Point(row=11, col=1), Player.black): 2587403763695283759,
-    (Point(row=11, col=1), Player.white): 4284477981249563388,
-    (Point(row=11, col=1), None): 5405737755851551070,
-    (Point(row=11, col=2), Player.black): 3062594018986111807,
-    (Point(row=11, col=2), Player.white): 1218031969393788391,
-    (Point(row=11, col=2), None): 5819299529019613720,
-    (Point(row=11, col=3), Player.black): 6836942078287472124,
-    (Point(row=11, col=3), Player.white): 331491355451634264,
-    (Point(row=11, col=3), None): 3042699857730410148,
-    (Point(row=11, col=4), Player.black): 5020425034560616831,
-    (Point(row=11, col=4), Player.white): 6869956434482551187,
-    (Point(row=11, col=4), None): 5273762941568536782,
-    (Point(row=11, col=5), Player.black): 4369884430636339669,
-    (Point(row=11, col=5), Player.white): 3539068151739986845,
-    (Point(row=11, col=5), None): 2545633568063821591,
-    (Point(row=11, col=6), Player.black): 1722510112442831774,
-    (Point(row=11, col=6), Player.white): 8819318178955485945,
-    (Point(row=11, col=6), None): 7870158541449737070,
-    (Point(row=11, col=7), Player.black): 8239487574243263991,
-    (Point(row=11, col=7), Player.white): 1156992553432870340,
-    (Point(row=11, col=7), None): 4535735021984655213,
-    (Point(row=11, col=8), Player.black): 7594304898754549268,
-    (Point(row=11, col=8), Player.white): 5282088876719831211,
-    (Point(row=11, col=8), None): 8638552532769372945,
-    (Point(row=11, col=9), Player.black): 7109483303267193431,
-    (Point(row=11, col=9), Player.white): 7375547681793063482,
-    (Point(row=11, col=9), None): 6417816051291806205,
-    (Point(row=11, col=10), Player.black): 4071068608671260085,
-    (Point(row=11, col=10), Player.white): 1183158527039914507,
-    (Point(row=11, col=10), None): 3655793022745858172,
-    (Point(row=11, col=11), Player.black): 1885811310876238687,
-    (Point(row=11, col=11), Player.white): 7926343516403975246,
-    (Point(row=11, col=11), None): 8041487656152937843,
-    (Point(row=11, col=12), Player.black): 709977688823125270,
-    (Point(row=11, col=12), Player.white): 8963910601206749993,
-    (Point(row=11, col=12), None): 50097237380060685,
-    (Point(row=11, col=13), Player.black): 1945886946705215152,
-    (Point(row=11, col=13), Player.white): 8647061965900004351,
-    (Point(row=11, col=13), None): 3686672751686077322,
-    (Point(row=11, col=14), Player.black): 7530986707619918003,
-    (Point(row=11, col=14), Player.white): 6093550119592142498,
-    (Point(row=11, col=14), None): 4868969470220719684,
-    (Point(row=11, col=15), Player.black): 2208792676095986668,
-    (Point(row=11, col=15), Player.white): 7088732216341157593,
-    (Point(row=11, col=15), None): 2647683366483775065,
-    (Point(row=11, col=16), Player.black): 967076163220112298,
-    (Point(row=11, col=16), Player.white): 537491211278313019,
-    (Point(row=11, col=16), None): 8168328815734704789,
-    (Point(row=11, col=17), Player.black): 741850709845872750,
-    (Point(row=11, col=17), Player.white): 6843553519007459128,
-    (Point(row=11, col=17), None): 654033632218324354,
-    (Point(row=11, col=18), Player.black): 8429016817865964946,
-    (Point(row=11, col=18), Player.white): 8963994672192554198,
-    (Point(row=11, col=18), None): 4199884374299622864,
-    (Point(row=11, col=19), Player.black): 5124796628613282462,
-    (Point(row=11, col=19), Player.white): 7324811183075408521,
-    (Point(row=11, col=19), None): 906562786627855283,
-    (Point(row=12, col=1), Player.black): 7376454035926188802,
-    (Point(row=12, col=1), Player.white): 2415096915182637098,
-    (Point(row=12, col=1), None): 456215349487030467,
-    (Point(row=12, col=2), Player.black): 4426600536032165442,
-    (Point(row=12, col=2), Player.white): 7887006188540731848,
-    (Point(row=12, col=2), None): 3840795437080946068,
-    (Point(row=12, col=3), Player.black): 2902641188059528647,
-    (Point(row=12, col=3), Player.white): 8106961926484800677,
-    (Point(row=12, col=3), None): 2306631624585489244,
-    (Point(row=12, col=4), Player.black): 7511430739974511238,
-    (Point(row=12, col=4), Player.white): 1044628568639636067,
-    (Point(row=12, col=4), None): 864703599977243891,
-    (Point(row=12, col=5), Player.black): 2606499528196148427,
-    (Point(row=12, col=5), Player.white): 7880165110210227814,
-    (Point(row=12, col=5), None): 9078852883993045035,
-    (Point(row=12, col=6), Player.black): 5641742804207148793,
-    (Point(row=12, col=6), Player.white): 9050321337935087328,
-    (Point(row=12, col=6), None): 2005382496943539201,
-    (Point(row=12, col=7), Player.black): 7230658787488351227,
-    (Point(row=12, col=7), Player.white): 1267974644523870615,
-    (Point(row=12, col=7), None): 9098438551189398497,
-    (Point(row=12, col=8), Player.black): 7914097054028956772,
-    (Point(row=12, col=8), Player.white): 676941833249043071,
-    (Point(row=12, col=8), None): 2489635891663775150,
-    (Point(row=12, col=9), Player.black): 8239501080948884005,
-    (Point(row=12, col=9), Player.white): 191157743743732221,
-    (Point(row=12, col=9), None): 3108268897439384687,
-    (Point(row=12, col=10), Player.black): 6187863536067620016,
-    (Point(row=12, col=10), Player.white): 4433202480043701987,
-    (Point(row=12, col=10), None): 715748187006129650,
-    (Point(row=12, col=11), Player.black): 4832904234547948628,
-    (Point(row=12, col=11), Player.white): 703805407478288588,
-    (Point(row=12, col=11), None): 4515386557691025570,
-    (Point(row=12, col=12), Player.black): 8791304040125695451,
-    (Point(row=12, col=12), Player.white): 6411467165919206213,
-    (Point(row=12, col=12), None): 399911092376046219,
-    (Point(row=12, col=13), Player.black): 5441366133317820004,
-    (Point(row=12, col=13), Player.white): 7547493795222689896,
-    (Point(row=12, col=13), None): 1088156061555610420,
-    (Point(row=12, col=14), Player.black): 8581850588844313943,
-    (Point(row=12, col=14), Player.white): 8427351860231901936,
-    (Point(row=12, col=14), None): 6228373729797042020,
-    (Point(row=12, col=15), Player.black): 2863429652872138824,
-    (Point(row=12, col=15), Player.white): 4867912297900987247,
-    (Point(row=12, col=15), None): 391450405635879653,
-    (Point(row=12, col=16), Player.black): 533276136512345574,
-    (Point(row=12, col=16), Player.white): 767481817412774519,
-    (Point(row=12, col=16), None): 2723937893941835524,
-    (Point(row=12, col=17), Player.black): 4919400796593899014,
-    (Point(row=12, col=17), Player.white): 7991657740882753015,
-    (Point(row=12, col=17), None): 4347785180095823048,
-    (Point(row=12, col=18), Player.black): 8543838058417682263,
-    (Point(row=12, col=18), Player.white): 6911949647854313868,
-    (Point(row=12, col=18), None): 1759129431931873061,
-    (Point(row=12, col=19), Player.black): 4563111086848102167,
-    (Point(row=12, col=19), Player.white): 2212872472496832803,
-    (Point(row=12, col=19), None): 6433949442140158921,
-    (Point(row=13, col=1), Player.black): 8721942574052021693,
-    (Point(row=13, col=1), Player.white): 5724388117900346850,
-    (Point(row=13, col=1), None): 3930472178427294575,
-    (Point(row=13, col=2), Player.black): 6495441963901614783,
-    (Point(row=13, col=2), Player.white): 6173006670505416376,
-    (Point(row=13, col=2), None): 186302317067580235,
-    (Point(row=13, col=3), Player.black): 8600086193270735066,
-    (Point(row=13, col=3), Player.white): 6804123090132842966,
-    (Point(row=13, col=3), None): 6413901084033919473,
-    (Point(row=13, col=4), Player.black): 3536090382490575232,
-    (Point(row=13, col=4), Player.white): 4102748505578922176,
-    (Point(row=13, col=4), None): 3497326942784060522,
-    (Point(row=13, col=5), Player.black): 7389619416245028925,
-    (Point(row=13, col=5), Player.white): 931067049978937439,
-    (Point(row=13, col=5), None): 130512525498498480,
-    (Point(row=13, col=6), Player.black): 4061298539610621766,
-    (Point(row=13, col=6), Player.white): 3078352097151038216,
-    (Point(row=13, col=6), None): 2194743517777238483,
-    (Point(row=13, col=7), Player.black): 3059351960330273342,
-    (Point(row=13, col=7), Player.white): 5928731209113787794,
-    (Point(row=13, col=7), None): 4698929222361691945,
-    (Point(row=13, col=8), Player.black): 4947398134046533756,
-    (Point(row=13, col=8), Player.white): 3254925856585344548,
-    (Point(row=13, col=8), None): 5742675397900067836,
-    (Point(row=13, col=9), Player.black): 8539175663991204045,
-    (Point(row=13, col=9), Player.white): 6242282257046241475,
-    (Point(row=13, col=9), None): 8432081462325506450,
-    (Point(row=13, col=10), Player.black): 6565980351613155217,
-    (Point(row=13, col=10), Player.white): 2364063191748004769,
-    (Point(row=13, col=10), None): 4364423386534981810,
-    (Point(row=13, col=11), Player.black): 5670413563972845476,
-    (Point(row=13, col=11), Player.white): 4843101134800665179,
-    (Point(row=13, col=11), None): 4376298703750110361,
-    (Point(row=13, col=12), Player.black): 8448393038925014874,
-    (Point(row=13, col=12), Player.white): 3610785462864863884,
-    (Point(row=13, col=12), None): 943412574159591699,
-    (Point(row=13, col=13), Player.black): 6095339789466213091,
-    (Point(row=13, col=13), Player.white): 7848788109572147572,
-    (Point(row=13, col=13), None): 8400426275938543277,
-    (Point(row=13, col=14), Player.black): 2475836108517347973,
-    (Point(row=13, col=14), Player.white): 771291786582047757,
-    (Point(row=13, col=14), None): 4053307980508072625,
-    (Point(row=13, col=15), Player.black): 3866802176694908464,
-    (Point(row=13, col=15), Player.white): 7986296935936185449,
-    (Point(row=13, col=15), None): 3717690518140988970,
-    (Point(row=13, col=16), Player.black): 3398906110176949898,
-    (Point(row=13, col=16), Player.white): 4765575639861764093,
-    (Point(row=13, col=16), None): 5557127437701133494,
-    (Point(row=13, col=17), Player.black): 5661256411599459413,
-    (Point(row=13, col=17), Player.white): 757990961887908618,
-    (Point(row=13, col=17), None): 2259111980089504030,
-    (Point(row=13, col=18), Player.black): 5221079751409210825,
-    (Point(row=13, col=18), Player.white): 1070610375794411341,
-    (Point(row=13, col=18), None): 3622386228141306378,
-    (Point(row=13, col=19), Player.black): 1198695215761849141,
-    (Point(row=13, col=19), Player.white): 5053587751102064457,
-    (Point(row=13, col=19), None): 655289654759861303,
-    (Point(row=14, col=1), Player.black): 4462602829081543442,
-    (Point(row=14, col=1), Player.white): 1853538006922946393,
-    (Point(row=14, col=1), None): 8874418459913246830,
-    (Point(row=14, col=2), Player.black): 5405270812426483859,
-    (Point(row=14, col=2), Player.white): 2798988217330201598,
-    (Point(row=14, col=2), None): 8952624747216682829,
-    (Point(row=14, col=3), Player.black): 3158376797775673092,
-    (Point(row=14, col=3), Player.white): 4596438133655074464,
-    (Point(row=14, col=3), None): 2172032960756081848,
-    (Point(row=14, col=4), Player.black): 1860364888567210583,
-    (Point(row=14, col=4), Player.white): 7594666874561488949,
-    (Point(row=14, col=4), None): 951294898068067459,
-    (Point(row=14, col=5), Player.black): 4152081736917280667,
-    (Point(row=14, col=5), Player.white): 5497039066433127310,
-    (Point(row=14, col=5), None): 8365665779509218673,
-    (Point(row=14, col=6), Player.black): 2825213441315210712,
-    (Point(row=14, col=6), Player.white): 1906718977934586677,
-    (Point(row=14, col=6), None): 2098275391754392419,
-    (Point(row=14, col=7), Player.black): 700877886558921820,
-    (Point(row=14, col=7), Player.white): 5268529796746144092,
-    (Point(row=14, col=7), None): 366261543764272374,
-    (Point(row=14, col=8), Player.black): 3781013136295640086,
-    (Point(row=14, col=8), Player.white): 4283441754123156263,
-    (Point(row=14, col=8), None): 7522233400592191612,
-    (Point(row=14, col=9), Player.black): 4451232217776808913,
-    (Point(row=14, col=9), Player.white): 8535257598254516911,
-    (Point(row=14, col=9), None): 4370440172150638116,
-    (Point(row=14, col=10), Player.black): 311693384355378584,
-    (Point(row=14, col=10), Player.white): 4815410031457428084,
-    (Point(row=14, col=10), None): 716701220320565047,
-    (Point(row=14, col=11), Player.black): 4639573953762214941,
-    (Point(row=14, col=11), Player.white): 6043211079053881323,
-    (Point(row=14, col=11), None): 3168022304199491799,
-    (Point(row=14, col=12), Player.black): 5025865767471100084,
-    (Point(row=14, col=12), Player.white): 1806325340905616875,
-    (Point(row=14, col=12), None): 5031753776166746948,
-    (Point(row=14, col=13), Player.black): 1906221725019119053,
-    (Point(row=14, col=13), Player.white): 2051495015948088271,
-    (Point(row=14, col=13), None): 5592448445573794580,
-    (Point(row=14, col=14), Player.black): 4626391786839381397,
-    (Point(row=14, col=14), Player.white): 5316210941452930078,
-    (Point(row=14, col=14), None): 3215481098304059341,
-    (Point(row=14, col=15), Player.black): 1771340965586600938,
-    (Point(row=14, col=15), Player.white): 8138789780068825793,
-    (Point(row=14, col=15), None): 7930425959172529015,
-    (Point(row=14, col=16), Player.black): 6591643749633497962,
-    (Point(row=14, col=16), Player.white): 3902407688630442478,
-    (Point(row=14, col=16), None): 6001792185104984792,
-    (Point(row=14, col=17), Player.black): 4621517427542057093,
-    (Point(row=14, col=17), Player.white): 5943131067739206689,
-    (Point(row=14, col=17), None): 6083186629831243050,
-    (Point(row=14, col=18), Player.black): 2648128573808593769,
-    (Point(row=14, col=18), Player.white): 4422798962997850498,
-    (Point(row=14, col=18), None): 1819003316936483752,
-    (Point(row=14, col=19), Player.black): 456633851235452227,
-    (Point(row=14, col=19), Player.white): 3938705745234126675,
-    (Point(row=14, col=19), None): 1617151500127387575,
-    (Point(row=15, col=1), Player.black): 8934655130395411747,
-    (Point(row=15, col=1), Player.white): 6740070735165332497,
-    (Point(row=15, col=1), None): 8966449715911177364,
-    (Point(row=15, col=2), Player.black): 7231329375645642734,
-    (Point(row=15, col=2), Player.white): 2028079069521787201,
-    (Point(row=15, col=2), None): 4152507743647230997,
-    (Point(row=15, col=3), Player.black): 2840850505739313040,
-    (Point(row=15, col=3), Player.white): 2530518044215747483,
-    (Point(row=15, col=3), None): 2052164191441663921,
-    (Point(row=15, col=4), Player.black): 880738727157024928,
-    (Point(row=15, col=4), Player.white): 576482927618882724,
-    (Point(row=15, col=4), None): 8031741936364696910,
-    (Point(row=15, col=5), Player.black): 2272090419170098876,
-    (Point(row=15, col=5), Player.white): 6451667127701698632,
-    (Point(row=15, col=5), None): 753686320598899189,
-    (Point(row=15, col=6), Player.black): 2467172833598969647,
-    (Point(row=15, col=6), Player.white): 2299279714082480754,
-    (Point(row=15, col=6), None): 3896814511077079250,
-    (Point(row=15, col=7), Player.black): 586951823432973264,
-    (Point(row=15, col=7), Player.white): 2492490960948947443,
-    (Point(row=15, col=7), None): 4057018484877899846,
-    (Point(row=15, col=8), Player.black): 6756760461933745212,
-    (Point(row=15, col=8), Player.white): 2305988440485863380,
-    (Point(row=15, col=8), None): 5290933509796156653,
-    (Point(row=15, col=9), Player.black): 8303620122163658431,
-    (Point(row=15, col=9), Player.white): 5089397903212517881,
-    (Point(row=15, col=9), None): 5955257491621717764,
-    (Point(row=15, col=10), Player.black): 1897487806116535361,
-    (Point(row=15, col=10), Player.white): 771353585928593281,
-    (Point(row=15, col=10), None): 1045685019877621795,
-    (Point(row=15, col=11), Player.black): 5961483892418160363,
-    (Point(row=15, col=11), Player.white): 1857558316673855766,
-    (Point(row=15, col=11), None): 1084620574215175529,
-    (Point(row=15, col=12), Player.black): 21672730940036519,
-    (Point(row=15, col=12), Player.white): 4868585089666375669,
-    (Point(row=15, col=12), None): 6002536264589117956,
-    (Point(row=15, col=13), Player.black): 7098090812934590832,
-    (Point(row=15, col=13), Player.white): 6081314166943153879,
-    (Point(row=15, col=13), None): 3737295446814595455,
-    (Point(row=15, col=14), Player.black): 5986603938258709859,
-    (Point(row=15, col=14), Player.white): 6428441200482015726,
-    (Point(row=15, col=14), None): 7984251303778461239,
-    (Point(row=15, col=15), Player.black): 6715149900452538665,
-    (Point(row=15, col=15), Player.white): 7320593271714759115,
-    (Point(row=15, col=15), None): 1783003107854326425,
-    (Point(row=15, col=16), Player.black): 6051824272274555070,
-    (Point(row=15, col=16), Player.white): 7456396933484886680,
-    (Point(row=15, col=16), None): 9120851401456466194,
-    (Point(row=15, col=17), Player.black): 9205864070899872504,
-    (Point(row=15, col=17), Player.white): 560847454218065520,
-    (Point(row=15, col=17), None): 6485883532114362023,
-    (Point(row=15, col=18), Player.black): 8129967315976263098,
-    (Point(row=15, col=18), Player.white): 7686748293140976457,
-    (Point(row=15, col=18), None): 8671099862622425606,
-    (Point(row=15, col=19), Player.black): 8317838781703674152,
-    (Point(row=15, col=19), Player.white): 7766061654328752726,
-    (Point(row=15, col=19), None): 966723957371532275,
-    (Point(row=16, col=1), Player.black): 867645109782671668,
-    (Point(row=16, col=1), Player.white): 6337197068958504939,
-    (Point(row=16, col=1), None): 1646551304474148590,
-    (Point(row=16, col=2), Player.black): 4273901626343529079,
-    (Point(row=16, col=2), Player.white): 4425565643112713542,
-    (Point(row=16, col=2), None): 355367028372742238,
-    (Point(row=16, col=3), Player.black): 2439983459557563983,
-    (Point(row=16, col=3), Player.white): 6320438292052045625,
-    (Point(row=16, col=3), None): 8203149314473250272,
-    (Point(row=16, col=4), Player.black): 6205715894281816416,
-    (Point(row=16, col=4), Player.white): 118291019044960381,
-    (Point(row=16, col=4), None): 122932753212710483,
-    (Point(row=16, col=5), Player.black): 5422663810833475863,
-    (Point(row=16, col=5), Player.white): 1182300043119786270,
-    (Point(row=16, col=5), None): 288776412793633387,
-    (Point(row=16, col=6), Player.black): 3699213482397461969,
-    (Point(row=16, col=6), Player.white): 2948434734595050108,
-    (Point(row=16, col=6), None): 2700759796923801527,
-    (Point(row=16, col=7), Player.black): 6902590916165580704,
-    (Point(row=16, col=7), Player.white): 3665401783065853738,
-    (Point(row=16, col=7), None): 6615782357449758610,
-    (Point(row=16, col=8), Player.black): 8526003738677493621,
-    (Point(row=16, col=8), Player.white): 5837405103571477802,
-    (Point(row=16, col=8), None): 928496846692198646,
-    (Point(row=16, col=9), Player.black): 3845286763446227784,
-    (Point(row=16, col=9), Player.white): 7271782829085245744,
-    (Point(row=16, col=9), None): 37441608377608565,
-    (Point(row=16, col=10), Player.black): 8010202122636250160,
-    (Point(row=16, col=10), Player.white): 7993166190946552087,
-    (Point(row=16, col=10), None): 556799778342359678,
-    (Point(row=16, col=11), Player.black): 8501934740604741339,
-    (Point(row=16, col=11), Player.white): 964220122363251776,
-    (Point(row=16, col=11), None): 860335763904730991,
-    (Point(row=16, col=12), Player.black): 3746016469071710117,
-    (Point(row=16, col=12), Player.white): 1415609571837132813,
-    (Point(row=16, col=12), None): 6509766112759859043,
-    (Point(row=16, col=13), Player.black): 2800758757150543588,
-    (Point(row=16, col=13), Player.white): 6870325606907497457,
-    (Point(row=16, col=13), None): 8347554546805625427,
-    (Point(row=16, col=14), Player.black): 1269983680725669354,
-    (Point(row=16, col=14), Player.white): 5283259063529901189,
-    (Point(row=16, col=14), None): 8951787883660804594,
-    (Point(row=16, col=15), Player.black): 6577967698115004798,
-    (Point(row=16, col=15), Player.white): 3863247048398790623,
-    (Point(row=16, col=15), None): 6256750032119644322,
-    (Point(row=16, col=16), Player.black): 2615073818034553927,
-    (Point(row=16, col=16), Player.white): 7611646725471609361,
-    (Point(row=16, col=16), None): 8715703136205629212,
-    (Point(row=16, col=17), Player.black): 4536237593798686899,
-    (Point(row=16, col=17), Player.white): 5050157438289756914,
-    (Point(row=16, col=17), None): 7827838102221486680,
-    (Point(row=16, col=18), Player.black): 5803917297910417186,
-    (Point(row=16, col=18), Player.white): 1782963552616878697,
-    (Point(row=16, col=18), None): 2303548808415259937,
-    (Point(row=16, col=19), Player.black): 5626364363486573015,
-    (Point(row=16, col=19), Player.white): 6029043239920198661,
-    (Point(row=16, col=19), None): 8757887525302229813,
-    (Point(row=17, col=1), Player.black): 1992889319760176610,
-    (Point(row=17, col=1), Player.white): 9189452000269572274,
-    (Point(row=17, col=1), None): 4905467933400669779,
-    (Point(row=17, col=2), Player.black): 7426527714530108157,
-    (Point(row=17, col=2), Player.white): 1907859183800596411,
-    (Point(row=17, col=2), None): 4771526147175859464,
-    (Point(row=17, col=3), Player.black): 801797020661395053,
-    (Point(row=17, col=3), Player.white): 6687176734500717375,
-    (Point(row=17, col=3), None): 8225585214768321387,
-    (Point(row=17, col=4), Player.black): 3383826466584510646,
-    (Point(row=17, col=4), Player.white): 758582172891218170,
-    (Point(row=17, col=4), None): 3145636060070227816,
-    (Point(row=17, col=5), Player.black): 4194697508564773256,
-    (Point(row=17, col=5), Player.white): 3391428786875763395,
-    (Point(row=17, col=5), None): 5967138820737884495,
-    (Point(row=17, col=6), Player.black): 2325124550728647914,
-    (Point(row=17, col=6), Player.white): 2079565397503027825,
-    (Point(row=17, col=6), None): 4587184138067971035,
-    (Point(row=17, col=7), Player.black): 4041026812205666746,
-    (Point(row=17, col=7), Player.white): 5655486039698795379,
-    (Point(row=17, col=7), None): 5120640784234962962,
-    (Point(row=17, col=8), Player.black): 2930769085124847597,
-    (Point(row=17, col=8), Player.white): 9139586437661172108,
-    (Point(row=17, col=8), None): 8539632799599900562,
-    (Point(row=17, col=9), Player.black): 5803728524106911801,
-    (Point(row=17, col=9), Player.white): 7483549501265408773,
-    (Point(row=17, col=9), None): 6231684873672726536,
-    (Point(row=17, col=10), Player.black): 6332000596335232276,
-    (Point(row=17, col=10), Player.white): 2726630775182936002,
-    (Point(row=17, col=10), None): 8185585154226410801,
-    (Point(row=17, col=11), Player.black): 7524526567653633475,
-    (Point(row=17, col=11), Player.white): 5579970663084032628,
-    (Point(row=17, col=11), None): 3057825194641888089,
-    (Point(row=17, col=12), Player.black): 3393880737065250410,
-    (Point(row=17, col=12), Player.white): 1754035170100121449,
-    (Point(row=17, col=12), None): 1737911484947502630,
-    (Point(row=17, col=13), Player.black): 4942330602632647647,
-    (Point(row=17, col=13), Player.white): 2747525372299834801,
-    (Point(row=17, col=13), None): 8520057291146424708,
-    (Point(row=17, col=14), Player.black): 7440299499218011796,
-    (Point(row=17, col=14), Player.white): 1087853129704249266,
-    (Point(row=17, col=14), None): 5730995536975688679,
-    (Point(row=17, col=15), Player.black): 8381088259419347232,
-    (Point(row=17, col=15), Player.white): 8530252470479322245,
-    (Point(row=17, col=15), None): 1680091031784392334,
-    (Point(row=17, col=16), Player.black): 6329369147089557975,
-    (Point(row=17, col=16), Player.white): 6226132541820439079,
-    (Point(row=17, col=16), None): 1217060408891629153,
-    (Point(row=17, col=17), Player.black): 8510909313130218816,
-    (Point(row=17, col=17), Player.white): 2809618266432359816,
-    (Point(row=17, col=17), None): 8986885964074694820,
-    (Point(row=17, col=18), Player.black): 937567447451492152,
-    (Point(row=17, col=18), Player.white): 3897233293390510584,
-    (Point(row=17, col=18), None): 635004636260074958,
-    (Point(row=17, col=19), Player.black): 5711776692886433842,
-    (Point(row=17, col=19), Player.white): 990378072633891425,
-    (Point(row=17, col=19), None): 6718874742366359636,
-    (Point(row=18, col=1), Player.black): 4447931338987391578,
-    (Point(row=18, col=1), Player.white): 6960476114299744913,
-    (Point(row=18, col=1), None): 2645412660348270081,
-    (Point(row=18, col=2), Player.black): 7226963344588768417,
-    (Point(row=18, col=2), Player.white): 8567629667262567815,
-    (Point(row=18, col=2), None): 7575981273972274660,
-    (Point(row=18, col=3), Player.black): 5318059945354967209,
-    (Point(row=18, col=3), Player.white): 873663999994033027,
-    (Point(row=18, col=3), None): 3695452752212025008,
-    (Point(row=18, col=4), Player.black): 6861425314545431565,
-    (Point(row=18, col=4), Player.white): 3348318710224952970,
-    (Point(row=18, col=4), None): 6278429053017590696,
-    (Point(row=18, col=5), Player.black): 4532799092657969786,
-    (Point(row=18, col=5), Player.white): 877999067260272988,
-    (Point(row=18, col=5), None): 9129747666010947853,
-    (Point(row=18, col=6), Player.black): 3782020681276091653,
-    (Point(row=18, col=6), Player.white): 7242139944827122683,
-    (Point(row=18, col=6), None): 6867185658720811165,
-    (Point(row=18, col=7), Player.black): 3539009107190127659,
-    (Point(row=18, col=7), Player.white): 6116273575465483945,
-    (Point(row=18, col=7), None): 9079803346677547011,
-    (Point(row=18, col=8), Player.black): 7072141708500202089,
-    (Point(row=18, col=8), Player.white): 4515954709844337948,
-    (Point(row=18, col=8), None): 8660456669946246606,
-    (Point(row=18, col=9), Player.black): 7485984276317691123,
-    (Point(row=18, col=9), Player.white): 291827410519072658,
-    (Point(row=18, col=9), None): 4966770482903477901,
-    (Point(row=18, col=10), Player.black): 3855668877195775269,
-    (Point(row=18, col=10), Player.white): 8525967334656526594,
-    (Point(row=18, col=10), None): 5515676746611674315,
-    (Point(row=18, col=11), Player.black): 4503998343741921742,
-    (Point(row=18, col=11), Player.white): 8709285677475531225,
-    (Point(row=18, col=11), None): 6651599428705189777,
-    (Point(row=18, col=12), Player.black): 9000529270854642645,
-    (Point(row=18, col=12), Player.white): 8214016419396429986,
-    (Point(row=18, col=12), None): 727909862826818096,
-    (Point(row=18, col=13), Player.black): 7689436730354812015,
-    (Point(row=18, col=13), Player.white): 4619127735240439154,
-    (Point(row=18, col=13), None): 4851349490180652032,
-    (Point(row=18, col=14), Player.black): 6253228598824637813,
-    (Point(row=18, col=14), Player.white): 3040559269289813386,
-    (Point(row=18, col=14), None): 3776424765643074763,
-    (Point(row=18, col=15), Player.black): 6489788385016240790,
-    (Point(row=18, col=15), Player.white): 3421242306646489195,
-    (Point(row=18, col=15), None): 6450066488597719318,
-    (Point(row=18, col=16), Player.black): 8972116846035425215,
-    (Point(row=18, col=16), Player.white): 8044437016537519990,
-    (Point(row=18, col=16), None): 6701164411718242908,
-    (Point(row=18, col=17), Player.black): 4118761374538561411,
-    (Point(row=18, col=17), Player.white): 4500807658864783521,
-    (Point(row=18, col=17), None): 3687064506880084567,
-    (Point(row=18, col=18), Player.black): 2389470140062982573,
-    (Point(row=18, col=18), Player.white): 980979418011529029,
-    (Point(row=18, col=18), None): 7384231058984677961,
-    (Point(row=18, col=19), Player.black): 7176889933649878186,
-    (Point(row=18, col=19), Player.white): 7140088451287201533,
-    (Point(row=18, col=19), None): 5066238110984315485,
-    (Point(row=19, col=1), Player.black): 8556929223978844074,
-    (Point(row=19, col=1), Player.white): 550710570267110336,
-    (Point(row=19, col=1), None): 9078568103517168973,
-    (Point(row=19, col=2), Player.black): 1116165004592315126,
-    (Point(row=19, col=2), Player.white): 2783035203898542730,
-    (Point(row=19, col=2), None): 6832653574079751529,
-    (Point(row=19, col=3), Player.black): 8852320938313886625,
-    (Point(row=19, col=3), Player.white): 1794844634671866136,
-    (Point(row=19, col=3), None): 1244083257016968931,
-    (Point(row=19, col=4), Player.black): 2938713595152277517,
-    (Point(row=19, col=4), Player.white): 2982565994192073743,
-    (Point(row=19, col=4), None): 5672934810605569576,
-    (Point(row=19, col=5), Player.black): 1524774446320670982,
-    (Point(row=19, col=5), Player.white): 3583833216166751868,
-    (Point(row=19, col=5), None): 2420759168071314230,
-    (Point(row=19, col=6), Player.black): 3830612259819653766,
-    (Point(row=19, col=6), Player.white): 1878512172791157430,
-    (Point(row=19, col=6), None): 3026798841635928259,
-    (Point(row=19, col=7), Player.black): 1043096293735227020,
-    (Point(row=19, col=7), Player.white): 2350333000547753307,
-    (Point(row=19, col=7), None): 2152124424083590966,
-    (Point(row=19, col=8), Player.black): 7735780061246053002,
-    (Point(row=19, col=8), Player.white): 357984693614714216,
-    (Point(row=19, col=8), None): 3074140781355605523,
-    (Point(row=19, col=9), Player.black): 886343935829831037,
-    (Point(row=19, col=9), Player.white): 671338368421540351,
-    (Point(row=19, col=9), None): 4385317072137268908,
-    (Point(row=19, col=10), Player.black): 3367614816803396178,
-    (Point(row=19, col=10), Player.white): 9176451748199592648,
-    (Point(row=19, col=10), None): 6011030964042496721,
-    (Point(row=19, col=11), Player.black): 8550026293683920612,
-    (Point(row=19, col=11), Player.white): 562667112140663286,
-    (Point(row=19, col=11), None): 2171880067883193386,
-    (Point(row=19, col=12), Player.black): 3949938844332410051,
-    (Point(row=19, col=12), Player.white): 9037511714753446403,
-    (Point(row=19, col=12), None): 1770023979298575379,
-    (Point(row=19, col=13), Player.black): 4290116806239935128,
-    (Point(row=19, col=13), Player.white): 132498428927462245,
-    (Point(row=19, col=13), None): 1897186352325836882,
-    (Point(row=19, col=14), Player.black): 3995719482357792909,
-    (Point(row=19, col=14), Player.white): 1687012637054248338,
-    (Point(row=19, col=14), None): 5453738262708520352,
-    (Point(row=19, col=15), Player.black): 6144239322466414547,
-    (Point(row=19, col=15), Player.white): 2088432605415095772,
-    (Point(row=19, col=15), None): 4962779131045859148,
-    (Point(row=19, col=16), Player.black): 7504133929067036323,
-    (Point(row=19, col=16), Player.white): 5709758513855587789,
-    (Point(row=19, col=16), None): 5279645296925838246,
-    (Point(row=19, col=17), Player.black): 4082689986052035992,
-    (Point(row=19, col=17), Player.white): 6852925282118810911,
-    (Point(row=19, col=17), None): 3959313562922456441,
-    (Point(row=19, col=18), Player.black): 3844817345827210474,
-    (Point(row=19, col=18), Player.white): 2777229414398762907,
-    (Point(row=19, col=18), None): 5585289319550230611,
-    (Point(row=19, col=19), Player.black): 2850768361777422327,
-    (Point(row=19, col=19), Player.white): 7585488395510178546,
-    (Point(row=19, col=19), None): 4683599941023963763,
-}
+__all__ = ['EMPTY', 'EMPTY_BOARD', 'SIDE_TO_MOVE', 'get_hash_table', 'get_hash_codes', 'situation_hash']
+
+# point states, the columns of a hash table; black and white match Player.value
+EMPTY = 0
 
 EMPTY_BOARD = 0
+
+SEED = 20190321
+MAX63 = 0x7fffffffffffffff
+
+# key xor-ed into a board hash when white is to move
+SIDE_TO_MOVE = int(np.random.default_rng(SEED).integers(0, MAX63, dtype=np.uint64))
+
+tables = {}
+code_lists = {}
+
+
+def get_hash_table(num_rows, num_cols):
+    # (num_points, 3) array of keys, one row per point in row-major order
+    # ((row - 1) * num_cols + col - 1) and one column per point state. Each
+    # board size has its own seed, so its keys never depend on which other
+    # sizes were generated first.
+    dim = (num_rows, num_cols)
+
+    if dim not in tables:
+        rng = np.random.default_rng([SEED, num_rows, num_cols])
+        tables[dim] = rng.integers(0, MAX63, size=(num_rows * num_cols, 3), dtype=np.uint64)
+
+    return tables[dim]
+
+
+def get_hash_codes(num_rows, num_cols):
+    # the same keys as lists of Python ints, which are much quicker to index
+    # and xor one stone at a time than NumPy scalars
+    dim = (num_rows, num_cols)
+
+    if dim not in code_lists:
+        code_lists[dim] = get_hash_table(num_rows, num_cols).tolist()
+
+    return code_lists[dim]
+
+
+def situation_hash(board_hash, next_player):
+    # a single key for (next_player, board) situations
+    return board_hash ^ SIDE_TO_MOVE if next_player is Player.white else board_hash
+
+
+# the sizes self-play and the GTP frontends use
+for size in (9, 13, 19):
+    get_hash_table(size, size)
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from dlgo import zobrist
+from dlgo.goboard_fast import GameState, Move
+from dlgo.gotypes import Player, Point
+
+
+class ZobristTest(unittest.TestCase):
+    def test_tables(self):
+        table = zobrist.get_hash_table(9, 9)
+        self.assertEqual((81, 3), table.shape)
+        self.assertEqual(np.uint64, table.dtype)
+        self.assertIs(table, zobrist.get_hash_table(9, 9))
+        self.assertEqual(81 * 3, len(np.unique(table)))
+
+        # keys of a size don't depend on what was generated before
+        del zobrist.tables[9, 9]
+        np.testing.assert_array_equal(table, zobrist.get_hash_table(9, 9))
+
+    def test_side_to_move(self):
+        game = GameState.new_game(7)
+        board_hash = game.board.zobrist_hash()
+        self.assertNotEqual(zobrist.situation_hash(board_hash, Player.black),
+                            zobrist.situation_hash(board_hash, Player.white))
+
+        game = game.apply_move(Move.pass_turn())
+        self.assertEqual(board_hash, game.board.zobrist_hash())
+        self.assertTrue(game.is_situation_repeated((Player.black, board_hash)))
+        self.assertTrue(game.is_situation_repeated((Player.white, board_hash)))
+        self.assertFalse(game.is_situation_repeated((Player.white, board_hash ^ 1)))
+
+        game = game.apply_move(Move.play(Point(4, 4)))
+        self.assertNotEqual(board_hash, game.board.zobrist_hash())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ from collections import namedtuple
 import h5py
 
 # from dlgo import agent
+from dlgo import ownership
 from dlgo import scoring
 from dlgo import rl
 from dlgo.goboard_fast import GameState, Player, Point
@@ -47,7 +48,7 @@ def name(player):
     return 'W'
 
 
-def simulate_game(black_player, white_player):
+def simulate_game(black_player, white_player, max_moves=None, ownership_playouts=100):
     moves = []
     game = GameState.new_game(BOARD_SIZE)
     agents = {
@@ -55,12 +56,18 @@ def simulate_game(black_player, white_player):
         Player.white: white_player,
     }
     while not game.is_over():
+        if max_moves is not None and len(moves) >= max_moves:
+            break
         next_move = agents[game.next_player].select_move(game)
         moves.append(next_move)
         game = game.apply_move(next_move)
 
     print_board(game.board)
-    game_result = scoring.compute_game_result(game)
+    if game.is_over():
+        game_result = scoring.compute_game_result(game)
+    else:
+        # cut short: take off the stones random playouts find dead
+        game_result = ownership.compute_game_result(game, ownership_playouts)
     print(game_result)
 
     return GameRecord(
@@ -78,6 +85,9 @@ def main():
     # parser.add_argument('--game-log-out', required=True)
     parser.add_argument('--experience-out', required=True)
     parser.add_argument('--temperature', type=float, default=0.0)
+    parser.add_argument('--max-moves', type=int, default=None,
+                        help='Stop games after this many moves and score them by ownership estimate')
+    parser.add_argument('--ownership-playouts', type=int, default=100)
 
     args = parser.parse_args()
     global BOARD_SIZE
@@ -104,7 +114,7 @@ def main():
             black_player, white_player = agent1, agent2
         else:
             white_player, black_player = agent1, agent2
-        game_record = simulate_game(black_player, white_player)
+        game_record = simulate_game(black_player, white_player, args.max_moves, args.ownership_playouts)
         if game_record.winner == color1:
             print('Agent 1 wins.')
             collector1.complete_episode(reward=1)
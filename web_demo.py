@@ -16,10 +16,11 @@ def main():
     parser.add_argument('--predict-agent')
     parser.add_argument('--q-agent')
     parser.add_argument('--ac-agent')
+    parser.add_argument('--mcts-workers', type=int, default=1, help='Processes searching each MCTS move.')
 
     args = parser.parse_args()
 
-    bots = {'mcts': mcts.MCTSAgent(800, temperature=0.7)}
+    bots = {'mcts': mcts.MCTSAgent(800, temperature=0.7, num_workers=args.mcts_workers)}
     if args.pg_agent:
         bots['pg'] = agent.load_policy_agent(h5py.File(args.pg_agent))
     if args.predict_agent:
@@ -34,7 +35,10 @@ def main():
         bots['ac'] = ac_bot
 
     web_app = httpfrontend.get_web_app(bots)
-    web_app.run(host=args.bind_address, port=args.port, threaded=False)
+    try:
+        web_app.run(host=args.bind_address, port=args.port, threaded=False)
+    finally:
+        bots['mcts'].close()
 
 
 if __name__ == '__main__':